@@ -1,24 +1,106 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-import bcrypt
+import logging
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException, status
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app.database import get_db, settings
+from app.database import AsyncSessionLocal, get_async_db, settings
+from app.hashing import PasswordHasher
+from app.user_versions import UserVersionCache
 from app import models, schemas
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Общий движок хеширования паролей (пул процессов запускается при первом обращении)
+password_hasher = PasswordHasher(
+    workers=settings.hashing_pool_workers,
+    queue_depth=settings.hashing_queue_depth,
+    rounds=settings.bcrypt_rounds
+)
+
+# Известные версии пользователей для режима доверия claims токена
+user_versions = UserVersionCache(ttl_seconds=settings.token_version_ttl_seconds)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Проверка пароля"""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return password_hasher.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Хеширование пароля"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    return password_hasher.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Проверка пароля без блокировки event loop"""
+    return await password_hasher.verify_async(plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Хеширование пароля без блокировки event loop"""
+    return await password_hasher.hash_async(password)
+
+def build_token_claims(user: models.User) -> dict:
+    """Claims токена для пользователя"""
+    claims = {
+        "sub": user.username,
+        "user_id": user.id,  # Include user_id for User Service integration
+        "email": user.email
+    }
+    if settings.trust_token_claims:
+        # Достаточно для ответа /users/me без обращения к БД
+        claims.update({
+            "is_active": user.is_active,
+            "is_superuser": user.is_superuser,
+            "ver": user.token_version,
+            "created_at": int(user.created_at.timestamp()) if user.created_at else None
+        })
+        user_versions.set(user.id, user.token_version)
+    return claims
+
+def _user_from_claims(payload: dict) -> models.User:
+    """Пользователь (не связанный с сессией), восстановленный из claims токена"""
+    created_at = payload.get("created_at")
+    return models.User(
+        id=payload["user_id"],
+        username=payload["sub"],
+        email=payload.get("email"),
+        is_active=payload["is_active"],
+        is_superuser=payload["is_superuser"],
+        token_version=payload["ver"],
+        created_at=datetime.fromtimestamp(created_at, timezone.utc) if created_at is not None else None
+    )
+
+# Поля, попадающие в claims токена: их изменение делает выданные токены устаревшими
+CLAIM_FIELDS = ("username", "email", "is_active", "is_superuser")
+
+@event.listens_for(models.User, "before_update")
+def _bump_version_on_claims_change(mapper, connection, target):
+    """Увеличение token_version при изменении claims через ORM"""
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in CLAIM_FIELDS):
+        target.token_version = (target.token_version or 1) + 1
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _forget_user_version(mapper, connection, target):
+    """Сброс известной версии: следующий запрос перечитает пользователя из БД
+
+    Кеш версий локален для процесса; в других экземплярах устаревание
+    ограничено TOKEN_VERSION_TTL_SECONDS.
+    """
+    user_versions.invalidate(target.id)
+
+async def bump_token_version(db: AsyncSession, user_id: int):
+    """Пометить claims ранее выданных токенов пользователя устаревшими"""
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(token_version=models.User.token_version + 1)
+    )
+    await db.commit()
+    user_versions.invalidate(user_id)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Создание JWT токена"""
@@ -31,53 +113,82 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def authenticate_user(db: Session, username: str, password: str):
+async def _store_password_hash(user_id: int, old_hash: str, new_hash: str) -> bool:
+    """Замена хеша, только если он не изменился с момента входа"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(models.User)
+            .where(models.User.id == user_id, models.User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+async def rehash_password(user_id: int, old_hash: str, password: str):
+    """Перехеширование пароля с целевой стоимостью (фоновая задача)"""
+    try:
+        new_hash = await get_password_hash_async(password)
+        await _store_password_hash(user_id, old_hash, new_hash)
+    except Exception as e:
+        logger.warning("Password rehash for user %s failed: %s", user_id, e)
+
+async def authenticate_user(
+    db: AsyncSession,
+    username: str,
+    password: str,
+    background_tasks: Optional[BackgroundTasks] = None
+):
     """Аутентификация пользователя"""
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = await get_user_by_username(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return False
     if not user.is_active:
         return False
+    # Хеш со стоимостью, отличной от целевой, обновляется после ответа
+    if background_tasks is not None and password_hasher.needs_rehash(user.hashed_password):
+        background_tasks.add_task(rehash_password, user.id, user.hashed_password, password)
     return user
 
-def get_user_by_username(db: Session, username: str):
+async def get_user_by_username(db: AsyncSession, username: str):
     """Получение пользователя по username"""
-    return db.query(models.User).filter(models.User.username == username).first()
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
 
-def get_user_by_email(db: Session, email: str):
+async def get_user_by_email(db: AsyncSession, email: str):
     """Получение пользователя по email"""
-    return db.query(models.User).filter(models.User.email == email).first()
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
 
-def create_user(db: Session, user: schemas.UserCreate):
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
     """Создание нового пользователя"""
     # Проверка существования пользователя
-    if get_user_by_username(db, user.username):
+    if await get_user_by_username(db, user.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
-    if get_user_by_email(db, user.email):
+    if await get_user_by_email(db, user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение текущего пользователя из токена"""
     credentials_exception = HTTPException(
@@ -94,9 +205,19 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = get_user_by_username(db, username=token_data.username)
+    # Быстрый путь: claims актуальны, если версия пользователя не менялась
+    if settings.trust_token_claims and "ver" in payload and "user_id" in payload:
+        if user_versions.is_current(payload["user_id"], payload["ver"]):
+            return _user_from_claims(payload)
+    
+    user = await get_user_by_username(db, username=token_data.username)
     if user is None:
         raise credentials_exception
+    if settings.trust_token_claims:
+        user_versions.set(user.id, user.token_version)
+    # Claims токена устарели (пользователь изменен или отключен) - нужен новый вход
+    if "ver" in payload and payload["ver"] != user.token_version:
+        raise credentials_exception
     return user
 
 async def get_current_active_user(
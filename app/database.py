@@ -1,8 +1,12 @@
-from sqlalchemy import create_engine
+from typing import Optional
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
+from app.metrics import timed_pool
 
 class Settings(BaseSettings):
     database_url: str = Field(
@@ -15,7 +19,21 @@ class Settings(BaseSettings):
     )
     algorithm: str = Field(default="HS256", alias="ALGORITHM")
     access_token_expire_minutes: int = Field(default=30, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
-    
+    # Пул процессов для bcrypt: None - по числу ядер, 0 - хеширование в вызывающем потоке
+    hashing_pool_workers: Optional[int] = Field(default=None, alias="HASHING_POOL_WORKERS")
+    # Максимум операций хеширования в работе/очереди, сверх него - 503
+    hashing_queue_depth: int = Field(default=64, alias="HASHING_QUEUE_DEPTH")
+    # Целевая стоимость bcrypt; хеши с другой стоимостью перехешируются при входе
+    bcrypt_rounds: int = Field(default=12, alias="BCRYPT_ROUNDS")
+    # Бюджет задержки хеширования: если задан, стоимость подбирается бенчмарком при старте
+    bcrypt_latency_budget_ms: Optional[float] = Field(default=None, alias="BCRYPT_LATENCY_BUDGET_MS")
+    # Доверять claims токена (is_active, is_superuser, версия) без запроса к БД
+    trust_token_claims: bool = Field(default=False, alias="AUTH_TRUST_TOKEN_CLAIMS")
+    # Как долго известная версия пользователя считается актуальной
+    token_version_ttl_seconds: float = Field(default=30.0, alias="TOKEN_VERSION_TTL_SECONDS")
+    # Cache-Control max-age статических файлов (HTML всегда перепроверяется)
+    static_max_age_seconds: int = Field(default=3600, alias="STATIC_MAX_AGE_SECONDS")
+
     model_config = SettingsConfigDict(
         env_file=".env", 
         case_sensitive=False,
@@ -70,9 +88,13 @@ except Exception:
 connect_args = {
     "connect_timeout": 10,  # Таймаут подключения 10 секунд
 }
+if database_url.startswith("sqlite"):
+    # SQLite (тесты) не знает connect_timeout
+    connect_args = {"check_same_thread": False}
 
 engine = create_engine(
     database_url,
+    poolclass=timed_pool(QueuePool, "sync"),  # ожидание соединения попадает в /metrics
     pool_pre_ping=True,  # Проверка соединения перед использованием
     pool_size=5,  # Размер пула соединений
     max_overflow=10,  # Максимальное количество дополнительных соединений
@@ -81,8 +103,47 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def to_async_url(url: str) -> str:
+    """URL для async engine: psycopg3 работает и в async режиме, SQLite - через aiosqlite"""
+    if url.startswith("postgresql://") or url.startswith("postgres://"):
+        return "postgresql+psycopg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+# Async engine для async endpoints: запросы к БД не блокируют event loop
+async_engine = create_async_engine(
+    to_async_url(database_url),
+    poolclass=timed_pool(AsyncAdaptedQueuePool, "async"),
+    pool_pre_ping=True,
+    pool_size=5,
+    max_overflow=10,
+    pool_recycle=3600,
+    connect_args=connect_args
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+def add_missing_columns(conn, table) -> None:
+    """Добавление колонок, появившихся после создания таблицы
+
+    create_all не изменяет существующие таблицы. Добавляются только nullable
+    колонки и колонки со строковым server_default - такими и делаются новые.
+    Вызывается через ``conn.run_sync`` при запуске.
+    """
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+        default = column.server_default.arg if column.server_default is not None else None
+        if isinstance(default, str):
+            ddl += f" DEFAULT {default}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+        conn.execute(text(ddl))
+
 def get_db():
     db = SessionLocal()
     try:
@@ -90,3 +151,6 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
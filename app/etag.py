@@ -0,0 +1,19 @@
+"""ETag и условные GET-запросы"""
+import hashlib
+from typing import Optional
+
+
+def make_etag(*parts) -> str:
+    """Сильный ETag из компонентов версии"""
+    digest = hashlib.blake2b(":".join(str(part) for part in parts).encode("utf-8"), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверка If-None-Match (для GET по RFC 9110 - слабое сравнение)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
@@ -0,0 +1,199 @@
+"""Движок хеширования паролей в отдельном пуле процессов
+
+bcrypt намеренно медленный, поэтому его нельзя выполнять в event loop:
+проверка одного пароля блокирует все остальные запросы. Движок выносит
+вычисления в ограниченный пул процессов, ограничивает глубину очереди и
+быстро отказывает, когда пул перегружен.
+
+Модуль не импортирует остальные модули приложения: дочерние процессы
+запускаются через spawn и импортируют только его.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUNDS = 12
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+class HashingPoolSaturated(Exception):
+    """Очередь пула хеширования заполнена"""
+
+
+def _hash_password(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _check_password(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def get_hash_rounds(hashed_password: str) -> Optional[int]:
+    """Стоимость (cost) из хеша вида $2b$12$..."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_rounds(
+    budget_seconds: float,
+    min_rounds: int = MIN_ROUNDS,
+    max_rounds: int = MAX_ROUNDS,
+    samples: int = 3
+) -> int:
+    """Подбор максимальной стоимости bcrypt, укладывающейся в бюджет задержки
+
+    Каждый шаг стоимости удваивает время, поэтому достаточно замерить
+    минимальную стоимость и экстраполировать, а затем проверить результат.
+    """
+    def measure(rounds: int) -> float:
+        salt = bcrypt.gensalt(rounds=rounds)
+        best = float("inf")
+        for _ in range(samples):
+            started = time.perf_counter()
+            bcrypt.hashpw(b"calibration-password", salt)
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    base = measure(min_rounds)
+    rounds = min_rounds
+    while rounds < max_rounds and base * 2 ** (rounds + 1 - min_rounds) <= budget_seconds:
+        rounds += 1
+    while rounds > min_rounds and measure(rounds) > budget_seconds:
+        rounds -= 1
+    logger.info("bcrypt cost calibrated to %d for a %.0f ms budget", rounds, budget_seconds * 1000)
+    return rounds
+
+
+class PasswordHasher:
+    """Ограниченный пул процессов для bcrypt со счетчиками задержек
+
+    workers=None - по числу ядер, workers=0 - без пула (вычисления в
+    вызывающем потоке, для отладки и тестов).
+    """
+
+    OPERATIONS = ("hash", "verify")
+
+    def __init__(self, workers: Optional[int] = None, queue_depth: int = 64, rounds: int = DEFAULT_ROUNDS):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.queue_depth = queue_depth
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            operation: {"count": 0, "errors": 0, "rejected": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            for operation in self.OPERATIONS
+        }
+
+    def start(self) -> None:
+        """Запуск пула процессов (идемпотентно)"""
+        with self._lock:
+            if self._executor is None and self.workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+    def shutdown(self) -> None:
+        """Остановка пула процессов"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Снимок счетчиков по операциям"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "rounds": self.rounds,
+                "in_flight": self._in_flight,
+                "operations": {name: dict(values) for name, values in self._stats.items()},
+            }
+
+    def _acquire(self, operation: str) -> None:
+        with self._lock:
+            if self._in_flight >= self.queue_depth:
+                self._stats[operation]["rejected"] += 1
+                raise HashingPoolSaturated(
+                    f"Password hashing queue is full ({self.queue_depth} operations in flight)"
+                )
+            self._in_flight += 1
+
+    def _release(self, operation: str, started: float, failed: bool) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            stats = self._stats[operation]
+            stats["count"] += 1
+            stats["total_seconds"] += elapsed
+            if elapsed > stats["max_seconds"]:
+                stats["max_seconds"] = elapsed
+            if failed:
+                stats["errors"] += 1
+
+    def _submit(self, operation: str, fn, *args) -> Future:
+        """Постановка операции в пул с учетом лимита очереди"""
+        if self.workers > 0:
+            self.start()
+        self._acquire(operation)
+        started = time.perf_counter()
+        if self._executor is None:
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            try:
+                future = self._executor.submit(fn, *args)
+            except Exception:
+                self._release(operation, started, failed=True)
+                raise
+        future.add_done_callback(
+            lambda f: self._release(operation, started, failed=f.cancelled() or f.exception() is not None)
+        )
+        return future
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Отличается ли стоимость хеша от целевой"""
+        return get_hash_rounds(hashed_password) != self.rounds
+
+    def hash(self, password: str) -> str:
+        """Хеширование пароля (блокирует вызывающий поток)"""
+        future = self._submit("hash", _hash_password, password.encode("utf-8"), self.rounds)
+        return future.result().decode("utf-8")
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Проверка пароля (блокирует вызывающий поток)"""
+        return self._submit(
+            "verify", _check_password, plain_password.encode("utf-8"), hashed_password.encode("utf-8")
+        ).result()
+
+    async def hash_async(self, password: str) -> str:
+        """Хеширование пароля без блокировки event loop"""
+        if self.workers == 0:
+            return await asyncio.to_thread(self.hash, password)
+        future = self._submit("hash", _hash_password, password.encode("utf-8"), self.rounds)
+        return (await asyncio.wrap_future(future)).decode("utf-8")
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Проверка пароля без блокировки event loop"""
+        if self.workers == 0:
+            return await asyncio.to_thread(self.verify, plain_password, hashed_password)
+        future = self._submit(
+            "verify", _check_password, plain_password.encode("utf-8"), hashed_password.encode("utf-8")
+        )
+        return await asyncio.wrap_future(future)
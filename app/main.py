@@ -1,24 +1,40 @@
 from datetime import timedelta
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from app import models, schemas, auth
-from app.database import engine, get_db, settings
+from app.database import add_missing_columns, async_engine, engine, get_async_db, settings
+from app.hashing import HashingPoolSaturated, calibrate_rounds
+from app.etag import etag_matches, make_etag
+from app.static_assets import StaticAssets
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, metrics_registry, pool_collector
+
+# Веб-интерфейс из памяти, сжатый один раз при запуске
+static_assets = StaticAssets("app/static", max_age=settings.static_max_age_seconds)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Создание таблиц при запуске приложения"""
     try:
-        models.Base.metadata.create_all(bind=engine)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+            # Колонки, добавленные в модель позже (token_version)
+            await conn.run_sync(add_missing_columns, models.User.__table__)
         print("✅ Database tables created successfully")
     except Exception as e:
         print(f"⚠️  Warning: Could not create database tables: {e}")
         print("⚠️  Make sure PostgreSQL is running and DATABASE_URL is correct")
+    if settings.bcrypt_latency_budget_ms:
+        auth.password_hasher.rounds = calibrate_rounds(settings.bcrypt_latency_budget_ms / 1000)
+        print(f"✅ bcrypt cost calibrated: {auth.password_hasher.rounds}")
+    auth.password_hasher.start()
+    static_assets.load()
     yield
+    auth.password_hasher.shutdown()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Medical Analysis Auth Service",
@@ -27,21 +43,56 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Гистограммы задержек и число запросов в обработке для /metrics
+app.add_middleware(MetricsMiddleware)
+
+def hashing_collector():
+    """Счетчики пула bcrypt как семейства метрик"""
+    stats = auth.password_hasher.stats()
+    operations = stats["operations"]
+    return [
+        ("password_hashing_in_flight", "gauge", "Операции хеширования в работе и очереди", [({}, stats["in_flight"])]),
+        ("password_hashing_seconds_total", "counter", "Суммарное время операций bcrypt", [
+            ({"operation": name}, values["total_seconds"]) for name, values in operations.items()
+        ]),
+        ("password_hashing_operations_total", "counter", "Операции bcrypt по исходу", [
+            ({"operation": name, "outcome": outcome}, values[outcome])
+            for name, values in operations.items()
+            for outcome in ("count", "errors", "rejected")
+        ]),
+        ("password_hashing_max_seconds", "gauge", "Самая долгая операция bcrypt", [
+            ({"operation": name}, values["max_seconds"]) for name, values in operations.items()
+        ]),
+    ]
+
+metrics_registry.add_collector(pool_collector({"sync": engine, "async": async_engine.sync_engine}))
+metrics_registry.add_collector(hashing_collector)
+
 # Подключение статических файлов
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", static_assets, name="static")
+
+@app.exception_handler(HashingPoolSaturated)
+async def hashing_pool_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    """Быстрый отказ, когда пул хеширования паролей перегружен"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Service is busy, try again later"},
+        headers={"Retry-After": "1"},
+    )
 
 @app.post("/register", response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Регистрация нового пользователя"""
-    return auth.create_user(db=db, user=user)
+    return await auth.create_user(db=db, user=user)
 
 @app.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
+    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение JWT токена для аутентификации"""
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user(db, form_data.username, form_data.password, background_tasks)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,42 +101,65 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = auth.create_access_token(
-        data={
-            "sub": user.username,
-            "user_id": user.id,  # Include user_id for User Service integration
-            "email": user.email
-        }, 
+        data=auth.build_token_claims(user),
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/users/me", response_model=schemas.UserResponse)
-async def read_users_me(current_user: models.User = Depends(auth.get_current_active_user)):
-    """Получение информации о текущем пользователе"""
+async def read_users_me(
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """Получение информации о текущем пользователе
+
+    ETag строится из token_version и полей ответа. В режиме доверия claims
+    пользователь восстанавливается из токена, поэтому 304 отдается без
+    обращения к БД.
+    """
+    etag = make_etag(
+        current_user.id,
+        current_user.token_version,
+        current_user.username,
+        current_user.email,
+        current_user.is_active,
+        current_user.is_superuser,
+    )
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return current_user
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Метрики в формате Prometheus"""
+    return Response(metrics_registry.render(), media_type=CONTENT_TYPE)
+
 @app.get("/health")
-def health_check():
+async def health_check():
     """Проверка здоровья сервиса"""
     try:
         # Проверка подключения к БД
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         return {
             "status": "healthy",
-            "database": "connected"
+            "database": "connected",
+            "hashing": auth.password_hasher.stats()
         }
     except Exception as e:
         return {
             "status": "degraded",
             "database": "disconnected",
-            "error": str(e)
+            "error": str(e),
+            "hashing": auth.password_hasher.stats()
         }
 
 @app.get("/")
-def root():
+def root(request: Request):
     """Корневой endpoint - возвращает веб-интерфейс"""
-    return FileResponse("app/static/index.html")
+    return static_assets.response("index.html", request)
 
 @app.get("/api")
 def api_info():
@@ -0,0 +1,158 @@
+"""Раздача статических файлов из памяти в предварительно сжатом виде"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from app.etag import etag_matches
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость: только gzip
+    brotli = None
+
+# Порядок предпочтения при одинаковом q у клиента
+ENCODINGS = ("br", "gzip", "identity")
+
+# Файлы меньше этого размера не сжимаются
+MIN_COMPRESS_SIZE = 256
+
+
+@dataclass
+class StaticAsset:
+    """Файл и его сжатые варианты"""
+    media_type: str
+    digest: str
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: str) -> str:
+        # Сильные ETag разных кодировок одного содержимого должны различаться
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.digest}{suffix}"'
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding в виде {кодировка: q}"""
+    accepted: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: Optional[str], available) -> str:
+    """Лучшая из доступных кодировок для заголовка Accept-Encoding"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*")
+    identity_q = accepted.get("identity", wildcard if wildcard is not None else 1.0)
+    best, best_q = "identity", 0.0
+    for encoding in ENCODINGS[:-1]:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best if best_q > 0 and best_q >= identity_q else "identity"
+
+
+class StaticAssets:
+    """ASGI-приложение, раздающее каталог из памяти
+
+    Файлы читаются и сжимаются один раз (gzip и brotli, если установлен),
+    запрос стоит одного поиска в словаре. Ответы несут ETag по хешу
+    содержимого и учитывают ``Accept-Encoding``; HTML перепроверяется при
+    каждом использовании (``no-cache``), остальное кешируется на ``max_age`` секунд.
+    """
+
+    def __init__(self, directory: str, max_age: int = 3600, min_compress_size: int = MIN_COMPRESS_SIZE):
+        self.directory = directory
+        self.max_age = max_age
+        self.min_compress_size = min_compress_size
+        self._assets: Optional[Dict[str, StaticAsset]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Чтение и сжатие всех файлов каталога"""
+        assets: Dict[str, StaticAsset] = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path, "rb") as asset_file:
+                    content = asset_file.read()
+                relative = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                assets[relative] = self._build(relative, content)
+        with self._lock:
+            self._assets = assets
+
+    def _build(self, name: str, content: bytes) -> StaticAsset:
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        asset = StaticAsset(media_type, hashlib.blake2b(content, digest_size=12).hexdigest())
+        asset.variants["identity"] = content
+        if len(content) >= self.min_compress_size:
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < len(content):
+                asset.variants["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(content, quality=11)
+                if len(compressed) < len(content):
+                    asset.variants["br"] = compressed
+        return asset
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """Файл по пути относительно каталога (загрузка при первом обращении)"""
+        if self._assets is None:
+            self.load()
+        return self._assets.get(path.lstrip("/"))
+
+    def response(self, path: str, request: Request) -> Response:
+        """Ответ с выбранной кодировкой (304 при совпадении ETag)"""
+        asset = self.get(path)
+        if asset is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        encoding = choose_encoding(request.headers.get("accept-encoding"), asset.variants)
+        etag = asset.etag(encoding)
+        cache_control = "no-cache" if asset.media_type.startswith("text/html") else f"public, max-age={self.max_age}"
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        body = asset.variants[encoding]
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(body, media_type=asset.media_type, headers=headers)
+
+    def stats(self) -> dict:
+        """Число файлов и объем в памяти по кодировкам"""
+        assets = self._assets or {}
+        sizes: Dict[str, int] = {}
+        for asset in assets.values():
+            for encoding, body in asset.variants.items():
+                sizes[encoding] = sizes.get(encoding, 0) + len(body)
+        return {"files": len(assets), "bytes": sizes}
+
+    async def __call__(self, scope, receive, send) -> None:
+        request = Request(scope, receive)
+        if request.method not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        else:
+            # Внутри Mount совпавший префикс входит в root_path
+            response = self.response(scope["path"][len(scope.get("root_path", "")):], request)
+        await response(scope, receive, send)
@@ -0,0 +1,52 @@
+"""Кеш версий пользователей для проверки актуальности claims в токене"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class UserVersionCache:
+    """Последние известные token_version пользователей (LRU с TTL)
+
+    Если версия из токена совпадает с версией в кеше, claims токена
+    актуальны и БД можно не опрашивать. Отсутствие или истечение записи
+    считается устареванием: тогда версия перечитывается из БД.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 30.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._versions: "OrderedDict[int, tuple[int, float]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[int]:
+        """Актуальная версия пользователя или None"""
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is None:
+                return None
+            version, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._versions[user_id]
+                return None
+            self._versions.move_to_end(user_id)
+            return version
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        """Совпадает ли версия из токена с известной версией"""
+        return self.get(user_id) == version
+
+    def set(self, user_id: int, version: int) -> None:
+        """Запомнить версию, прочитанную из БД"""
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._versions[user_id] = (version, time.monotonic() + self.ttl_seconds)
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > self.max_size:
+                self._versions.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Забыть версию пользователя"""
+        with self._lock:
+            self._versions.pop(user_id, None)
@@ -0,0 +1,248 @@
+"""Benchmark: per-request authentication primitives
+
+Micro-benchmarks for the CPU behind ``/token`` and authenticated routes:
+
+* ``app.auth``: ``create_access_token``, ``jwt.decode``, ``get_password_hash``
+  and ``verify_password`` (per bcrypt cost, hashing in the calling thread);
+* User Service ``get_current_user``: the decode step, the profile lookup
+  (``get_by_auth_user_id`` + ``Principal.from_user`` on in-memory SQLite),
+  and the whole dependency cold (principal cache off) and cached;
+* pydantic: ``UserCreate`` validation and ``UserResponse`` from ORM objects
+  (User Service responses per role count).
+
+Token benchmarks take ``--claim-bytes`` (size of an extra claim) and
+``--bcrypt-rounds`` sets the bcrypt costs. With pyperf installed the suite
+runs under ``pyperf.Runner`` (worker processes, ``-o result.json``,
+``--rigorous``...); otherwise a built-in runner calibrates loops to
+``--min-time`` per sample and reports the same mean +- std dev lines.
+
+    python -m benchmarks.bench_auth --bcrypt-rounds 4 12 --claim-bytes 0 1024 --bench jwt
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple
+
+if not __package__:
+    # pyperf workers run this file as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read at import time: hash in-thread, never touch a real database
+os.environ.setdefault("HASHING_POOL_WORKERS", "0")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("USER_SERVICE_DATABASE_URL", "sqlite://")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+try:
+    import pyperf
+except ImportError:  # optional: built-in runner
+    pyperf = None
+
+
+class Case(NamedTuple):
+    name: str
+    fn: Callable[[], object]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="+", default=[4, 12])
+    parser.add_argument("--claim-bytes", type=int, nargs="+", default=[0, 1024])
+    parser.add_argument("--roles", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--bench", help="only run benchmarks whose name contains this")
+
+
+def token_cases(args) -> List[Case]:
+    from jose import jwt
+    from app import auth
+
+    cases = []
+    for size in args.claim_bytes:
+        claims = {"sub": "loaduser", "user_id": 42, "email": "loaduser@example.com"}
+        if size:
+            claims["extra"] = "x" * size
+        token = auth.create_access_token(claims)
+        cases.append(Case(f"create_access_token[claims+{size}B]", lambda claims=claims: auth.create_access_token(claims)))
+        cases.append(Case(
+            f"jwt_decode[claims+{size}B]",
+            lambda token=token: jwt.decode(token, auth.settings.secret_key, algorithms=[auth.settings.algorithm])
+        ))
+    return cases
+
+
+def password_cases(args) -> List[Case]:
+    from app import auth
+    from app.hashing import PasswordHasher
+
+    cases = []
+    for rounds in args.bcrypt_rounds:
+        hasher = PasswordHasher(workers=0, rounds=rounds)
+        hashed = hasher.hash("load-test-password")
+        cases.append(Case(f"get_password_hash[rounds={rounds}]", lambda h=hasher: h.hash("load-test-password")))
+        cases.append(Case(
+            f"verify_password[rounds={rounds}]",
+            lambda h=hasher, hashed=hashed: h.verify("load-test-password", hashed)
+        ))
+    # The module-level helpers add the hasher bookkeeping on top
+    auth.password_hasher.rounds = min(args.bcrypt_rounds)
+    cases.append(Case(
+        f"auth.verify_password[rounds={auth.password_hasher.rounds}]",
+        lambda hashed=auth.get_password_hash("load-test-password"): auth.verify_password("load-test-password", hashed)
+    ))
+    return cases
+
+
+def user_service_cases(args) -> List[Case]:
+    from jose import jwt
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from user_service.api.middleware.auth import get_current_user
+    from user_service.domain.models.principal import Principal
+    from user_service.domain.models.user import Base, Role, User
+    from user_service.infrastructure.cache.principal_cache import PrincipalCache
+    from user_service.infrastructure.database.database import settings
+    from user_service.infrastructure.repositories.user_repository import UserRepository
+    import user_service.api.middleware.auth as auth_middleware
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    roles = [Role(name=name) for name in ("PATIENT", "DOCTOR", "ADMIN")]
+    db.add_all(
+        User(auth_user_id=i, first_name="Имя", last_name="Фамилия", email=f"user{i}@example.com", roles=[roles[0]])
+        for i in range(1, 1001)
+    )
+    db.commit()
+    repo = UserRepository(db)
+    token = jwt.encode(
+        {"sub": "user500@example.com", "user_id": 500, "exp": datetime.now() + timedelta(days=1)},
+        settings.secret_key,
+        algorithm=settings.algorithm,
+    )
+    loop = asyncio.new_event_loop()
+
+    def lookup():
+        db.expunge_all()
+        return Principal.from_user(repo.get_by_auth_user_id(500))
+
+    def dependency(cache: PrincipalCache):
+        def run():
+            auth_middleware.principal_cache = cache
+            db.expunge_all()
+            return loop.run_until_complete(get_current_user(token=token, db=db))
+        return run
+
+    warm_cache = PrincipalCache()
+    return [
+        Case("get_current_user.decode", lambda: jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])),
+        Case("get_current_user.lookup", lookup),
+        Case("get_current_user[cold]", dependency(PrincipalCache(max_size=0))),
+        Case("get_current_user[cached]", dependency(warm_cache)),
+    ]
+
+
+def schema_cases(args) -> List[Case]:
+    from app import models, schemas
+    from user_service.api.schemas import UserResponse
+    from user_service.domain.models.user import Role, User
+
+    payload = {"username": "loaduser", "email": "loaduser@example.com", "password": "load-test-password"}
+    auth_user = models.User(
+        id=1, username="loaduser", email="loaduser@example.com",
+        is_active=True, is_superuser=False, created_at=datetime(2024, 1, 1)
+    )
+    cases = [
+        Case("UserCreate.validate", lambda: schemas.UserCreate.model_validate(payload)),
+        Case("auth.UserResponse.from_orm", lambda: schemas.UserResponse.model_validate(auth_user)),
+    ]
+    for count in args.roles:
+        user = User(
+            id=1, auth_user_id=1, first_name="Имя", last_name="Фамилия", email="user@example.com",
+            is_blocked=False, created_at=datetime(2024, 1, 1),
+            roles=[Role(id=i, name=f"ROLE{i}", description="role") for i in range(count)],
+        )
+        cases.append(Case(f"users.UserResponse.from_orm[roles={count}]", lambda user=user: UserResponse.model_validate(user)))
+    return cases
+
+
+def build_cases(args) -> List[Case]:
+    cases = token_cases(args) + password_cases(args) + user_service_cases(args) + schema_cases(args)
+    if args.bench:
+        cases = [case for case in cases if args.bench in case.name]
+    return cases
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("sec", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def measure(fn: Callable, loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter() - started
+
+
+def run_builtin(case: Case, min_time: float, samples: int) -> dict:
+    """Calibrate loops to ``min_time``, one warm-up sample, then ``samples`` timings"""
+    loops = 1
+    while True:
+        elapsed = measure(case.fn, loops)
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+    values = [measure(case.fn, loops) / loops for _ in range(samples)]
+    return {
+        "name": case.name,
+        "loops": loops,
+        "samples": samples,
+        "mean_s": statistics.mean(values),
+        "stdev_s": statistics.stdev(values) if samples > 1 else 0.0,
+        "median_s": statistics.median(values),
+        "min_s": min(values),
+    }
+
+
+def main():
+    if pyperf is not None:
+        runner = pyperf.Runner(
+            add_cmdline_args=lambda cmd, args: cmd.extend(
+                ["--bcrypt-rounds", *map(str, args.bcrypt_rounds)]
+                + ["--claim-bytes", *map(str, args.claim_bytes)]
+                + ["--roles", *map(str, args.roles)]
+                + (["--bench", args.bench] if args.bench else [])
+            )
+        )
+        add_arguments(runner.argparser)
+        args = runner.parse_args()
+        for case in build_cases(args):
+            runner.bench_func(case.name, case.fn)
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per sample")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for case in build_cases(args):
+        result = run_builtin(case, args.min_time, args.samples)
+        results.append(result)
+        if not args.json:
+            print(f"{case.name}: Mean +- std dev: {format_time(result['mean_s'])} +- {format_time(result['stdev_s'])}")
+    if args.json:
+        print(json.dumps({"runner": "builtin", "python": sys.version.split()[0], "benchmarks": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
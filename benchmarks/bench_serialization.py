@@ -0,0 +1,151 @@
+"""Benchmark: user list serialization paths
+
+Compares, for pages of 1k and 10k users:
+
+* ``encoder``  - pydantic models from ORM objects, then jsonable_encoder and
+  json.dumps (FastAPI's response path before dump_json existed);
+* ``adapter``  - precompiled TypeAdapter: validate from attributes, dump_json;
+* ``rows``     - plain row dicts straight to JSON bytes (orjson if installed).
+
+With ``--db`` the timings include loading the page from an in-memory SQLite
+database (ORM objects with selectinload vs column rows), which is what the
+endpoint actually does.
+
+    python -m benchmarks.bench_serialization --rows 1000 10000 --repeat 5 --db
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from user_service.api.schemas import UserListResponse, UserResponse
+from user_service.api.serialization import dumps, orjson
+from user_service.domain.models.user import Base, User, Role
+from user_service.infrastructure.repositories.user_repository import UserRepository
+
+USER_LIST_ADAPTER = TypeAdapter(UserListResponse)
+USERS_ADAPTER = TypeAdapter(List[UserResponse])
+
+
+def make_session(count: int):
+    """In-memory database with ``count`` patients"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    role = Role(name="PATIENT")
+    started = datetime(2024, 1, 1)
+    db.add_all(
+        User(
+            auth_user_id=i,
+            first_name=f"Имя{i}",
+            last_name=f"Фамилия{i}",
+            middle_name="Отчество",
+            email=f"user{i}@example.com",
+            phone=f"+7900{i:07d}",
+            is_blocked=False,
+            created_at=started + timedelta(seconds=i),
+            roles=[role],
+        )
+        for i in range(count)
+    )
+    db.commit()
+    return db
+
+
+def encoder_path(users, count):
+    response = UserListResponse(users=users, total=count, page=1, page_size=count)
+    return json.dumps(
+        jsonable_encoder(response), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def adapter_path(users, count):
+    return USER_LIST_ADAPTER.dump_json(UserListResponse(
+        users=USERS_ADAPTER.validate_python(users, from_attributes=True),
+        total=count,
+        page=1,
+        page_size=count,
+    ))
+
+
+def rows_path(rows, count):
+    return dumps({
+        "users": rows,
+        "total": count,
+        "total_exact": True,
+        "page": 1,
+        "page_size": count,
+        "next_cursor": None,
+    })
+
+
+def measure(fn, repeat: int) -> float:
+    """Median wall time in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(count: int, repeat: int, with_db: bool) -> dict:
+    db = make_session(count)
+    repo = UserRepository(db)
+    users = repo.page_users(limit=count)
+    rows = repo.page_user_rows(limit=count)
+    if with_db:
+        cases = {
+            "encoder": lambda: encoder_path(repo.page_users(limit=count), count),
+            "adapter": lambda: adapter_path(repo.page_users(limit=count), count),
+            "rows": lambda: rows_path(repo.page_user_rows(limit=count), count),
+        }
+    else:
+        cases = {
+            "encoder": lambda: encoder_path(users, count),
+            "adapter": lambda: adapter_path(users, count),
+            "rows": lambda: rows_path(rows, count),
+        }
+    results = {}
+    for name, fn in cases.items():
+        fn()  # warm-up
+        if with_db:
+            db.expunge_all()
+        results[name] = measure(fn, repeat)
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", action="store_true", help="include loading the page from SQLite")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    report = {
+        "orjson": orjson is not None,
+        "db": args.db,
+        "results": {count: run(count, args.repeat, args.db) for count in args.rows},
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"orjson: {'yes' if report['orjson'] else 'no (stdlib json)'}, including DB load: {args.db}")
+    print(f"{'rows':>8} {'encoder ms':>12} {'adapter ms':>12} {'rows ms':>10} {'speedup':>8}")
+    for count, results in report["results"].items():
+        print(
+            f"{count:>8} {results['encoder']:>12.1f} {results['adapter']:>12.1f} "
+            f"{results['rows']:>10.1f} {results['encoder'] / results['rows']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
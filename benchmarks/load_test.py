@@ -0,0 +1,332 @@
+"""Load test: both FastAPI apps in-process through httpx.ASGITransport
+
+Seeds a database, runs each application's lifespan and drives it with
+concurrent virtual users picking operations from a weighted mix:
+
+* ``auth``  - Auth Service: ``POST /token`` and ``GET /users/me``;
+* ``users`` - User Service: own profile (plain and conditional GET), admin
+  list and search, profile updates, block/restore of separate profiles.
+
+There is no network or server in the loop, so the numbers show application,
+ORM and database cost and are comparable between commits. Each operation is
+reported with RPS, p50/p95/p99 latency and SQL statements per request.
+
+By default every service gets a fresh SQLite file in a temporary directory;
+``--database-url`` runs against a local (empty, disposable) Postgres instead.
+bcrypt runs at ``--bcrypt-rounds`` (4 by default, so logins measure the
+service rather than the hash; use 12 for production cost).
+
+    python -m benchmarks.load_test --service both --users 200 --concurrency 16 --requests 2000 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+SECRET_KEY = "load-test-secret"
+
+
+def configure_environment(args, directory: str) -> None:
+    """Settings are read at import time, so this runs before importing the apps"""
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{directory}/auth.db"
+    os.environ["USER_SERVICE_DATABASE_URL"] = args.database_url or f"sqlite:///{directory}/users.db"
+    os.environ["SECRET_KEY"] = SECRET_KEY
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Latency, errors and SQL statements per operation"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.queries: Dict[str, int] = defaultdict(int)
+
+    async def call(self, name: str, send, expected=(200,)) -> httpx.Response:
+        from user_service.infrastructure.database.query_counter import track_queries
+
+        with track_queries() as stats:
+            started = time.perf_counter()
+            response = await send()
+            self.latencies[name].append(time.perf_counter() - started)
+        self.queries[name] += stats.count
+        if response.status_code not in expected:
+            self.errors[name] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        operations = {}
+        for name, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            operations[name] = {
+                "requests": len(latencies),
+                "errors": self.errors[name],
+                "rps": round(len(latencies) / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+                "queries_per_request": round(self.queries[name] / len(latencies), 2),
+            }
+        total = sum(op["requests"] for op in operations.values())
+        return {
+            "requests": total,
+            "errors": sum(op["errors"] for op in operations.values()),
+            "elapsed_s": round(elapsed, 3),
+            "rps": round(total / elapsed, 1),
+            "operations": operations,
+        }
+
+
+async def drive(
+    scenarios: List[Tuple[str, float, Callable]],
+    virtual_users: list,
+    concurrency: int,
+    total_requests: int,
+    seed: int
+) -> Tuple[Recorder, float]:
+    """Run weighted scenarios from ``concurrency`` workers until the budget is spent"""
+    recorder = Recorder()
+    names = [name for name, _, _ in scenarios]
+    weights = [weight for _, weight, _ in scenarios]
+    actions = {name: action for name, _, action in scenarios}
+    remaining = total_requests
+
+    async def worker(index: int):
+        nonlocal remaining
+        rng = random.Random(seed + index)
+        while remaining > 0:
+            remaining -= 1
+            name = rng.choices(names, weights)[0]
+            await actions[name](recorder, rng.choice(virtual_users), rng)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return recorder, time.perf_counter() - started
+
+
+async def run_auth(args) -> dict:
+    """Auth Service: login and /users/me"""
+    from app import auth, models
+    from app.database import SessionLocal, async_engine
+    from app.main import app
+    from user_service.infrastructure.database.query_counter import install_query_counter
+
+    install_query_counter(async_engine.sync_engine)
+    async with app.router.lifespan_context(app):
+        password = "load-test-password"
+        db = SessionLocal()
+        try:
+            db.query(models.User).delete()
+            hashed = auth.get_password_hash(password)
+            db.add_all(
+                models.User(username=f"loaduser{i}", email=f"loaduser{i}@example.com", hashed_password=hashed)
+                for i in range(args.users)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://auth") as client:
+            virtual_users = []
+            for i in range(min(args.users, args.concurrency * 4)):
+                response = await client.post("/token", data={"username": f"loaduser{i}", "password": password})
+                response.raise_for_status()
+                virtual_users.append({
+                    "username": f"loaduser{i}",
+                    "headers": {"Authorization": f"Bearer {response.json()['access_token']}"},
+                })
+
+            async def login(recorder, user, rng):
+                await recorder.call("login", lambda: client.post(
+                    "/token", data={"username": user["username"], "password": password}
+                ))
+
+            async def users_me(recorder, user, rng):
+                await recorder.call("users_me", lambda: client.get("/users/me", headers=user["headers"]))
+
+            scenarios = [("login", 1, login), ("users_me", 9, users_me)]
+            recorder, elapsed = await drive(scenarios, virtual_users, args.concurrency, args.requests, args.seed)
+    return recorder.report(elapsed)
+
+
+def mint_token(auth_user_id: int, email: str) -> str:
+    """Token as the Auth Service would issue it"""
+    from jose import jwt
+
+    claims = {
+        "sub": email,
+        "user_id": auth_user_id,
+        "email": email,
+        "exp": datetime.now(timezone.utc) + timedelta(hours=1),
+    }
+    return jwt.encode(claims, SECRET_KEY, algorithm="HS256")
+
+
+async def run_users(args) -> dict:
+    """User Service: profile reads, admin list/search, updates, block/restore"""
+    from user_service.domain.models.user import Role, User
+    from user_service.infrastructure.database.database import SessionLocal, engine
+    from user_service.infrastructure.database.query_counter import install_query_counter
+    from user_service.infrastructure.http_clients.auth_client import auth_http
+    from user_service.main import app
+
+    install_query_counter(engine)
+    # Auth Service callbacks from the outbox dispatcher get an in-process stub
+    auth_http.start(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+    async with app.router.lifespan_context(app):
+        db = SessionLocal()
+        try:
+            roles = {role.name: role for role in db.query(Role).all()}
+            started = datetime(2024, 1, 1)
+            first_names = ["Иван", "Мария", "Петр", "Анна", "Олег"]
+
+            def profile(auth_user_id: int, role: str, index: int) -> User:
+                return User(
+                    auth_user_id=auth_user_id,
+                    first_name=first_names[index % len(first_names)],
+                    last_name=f"Фамилия{index}",
+                    email=f"user{auth_user_id}@example.com",
+                    phone=f"+7900{index:07d}",
+                    created_at=started + timedelta(seconds=index),
+                    roles=[roles[role]],
+                )
+
+            db.add(profile(1, "ADMIN", 0))
+            db.add_all(profile(1000 + i, "PATIENT", i) for i in range(args.users))
+            # Block/restore targets, kept apart so virtual users are never blocked
+            db.add_all(profile(900000 + i, "PATIENT", i) for i in range(20))
+            db.commit()
+            ids = dict(db.query(User.auth_user_id, User.id).all())
+        finally:
+            db.close()
+
+        admin_headers = {"Authorization": f"Bearer {mint_token(1, 'user1@example.com')}"}
+        virtual_users = [
+            {
+                "id": ids[1000 + i],
+                "headers": {"Authorization": f"Bearer {mint_token(1000 + i, f'user{1000 + i}@example.com')}"},
+                "etag": None,
+            }
+            for i in range(min(args.users, args.concurrency * 4))
+        ]
+        victims = [ids[900000 + i] for i in range(20)]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://users") as client:
+
+            async def get_profile(recorder, user, rng):
+                response = await recorder.call(
+                    "profile", lambda: client.get(f"/users/{user['id']}", headers=user["headers"])
+                )
+                user["etag"] = response.headers.get("etag")
+
+            async def get_profile_conditional(recorder, user, rng):
+                headers = {**user["headers"], "If-None-Match": user["etag"] or '"none"'}
+                await recorder.call(
+                    "profile_conditional",
+                    lambda: client.get(f"/users/{user['id']}", headers=headers),
+                    expected=(200, 304),
+                )
+
+            async def list_users(recorder, user, rng):
+                await recorder.call("list", lambda: client.get(
+                    "/users", params={"page_size": 50, "page": rng.randint(1, 3)}, headers=admin_headers
+                ))
+
+            async def search_users(recorder, user, rng):
+                await recorder.call("search", lambda: client.get(
+                    "/users", params={"search": rng.choice(first_names), "page_size": 20}, headers=admin_headers
+                ))
+
+            async def update_profile(recorder, user, rng):
+                await recorder.call("update", lambda: client.patch(
+                    f"/users/{user['id']}", json={"phone": f"+7911{rng.randint(0, 9999999):07d}"},
+                    headers=user["headers"]
+                ))
+
+            async def block_restore(recorder, user, rng):
+                victim = rng.choice(victims)
+                await recorder.call("block", lambda: client.post(
+                    f"/users/{victim}/block", json={"reason": "load test"}, headers=admin_headers
+                ), expected=(200, 400))
+                await recorder.call("restore", lambda: client.post(
+                    f"/users/{victim}/restore", headers=admin_headers
+                ), expected=(200, 400))
+
+            scenarios = [
+                ("profile", 40, get_profile),
+                ("profile_conditional", 10, get_profile_conditional),
+                ("list", 15, list_users),
+                ("search", 10, search_users),
+                ("update", 10, update_profile),
+                ("block_restore", 5, block_restore),
+            ]
+            recorder, elapsed = await drive(scenarios, virtual_users, args.concurrency, args.requests, args.seed)
+    await auth_http.close()
+    auth_http.reset_transport()
+    return recorder.report(elapsed)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--service", choices=["auth", "users", "both"], default="both")
+    parser.add_argument("--users", type=int, default=200, help="seeded accounts per service")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--requests", type=int, default=2000, help="scenario runs per service")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--database-url", help="use this database for both services instead of SQLite")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="load-test-") as directory:
+        configure_environment(args, directory)
+        report = {
+            "config": {
+                "database": "postgresql" if args.database_url else "sqlite",
+                "users": args.users,
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "bcrypt_rounds": args.bcrypt_rounds,
+            },
+            "services": {},
+        }
+        if args.service in ("auth", "both"):
+            report["services"]["auth"] = asyncio.run(run_auth(args))
+        if args.service in ("users", "both"):
+            report["services"]["users"] = asyncio.run(run_users(args))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return report
+    for service, results in report["services"].items():
+        print(f"{service}: {results['requests']} requests, {results['rps']} rps, {results['errors']} errors")
+        print(f"  {'operation':<20} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+        for name, op in results["operations"].items():
+            print(
+                f"  {name:<20} {op['requests']:>6} {op['p50_ms']:>8.1f} {op['p95_ms']:>8.1f} "
+                f"{op['p99_ms']:>8.1f} {op['queries_per_request']:>8.1f}"
+            )
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import pytest
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
 
 # Тестовая база данных в памяти (SQLite для тестов)
@@ -10,12 +12,15 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 os.environ["DATABASE_URL"] = SQLALCHEMY_DATABASE_URL
 
 # Теперь импортируем после установки переменной окружения
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app import models
 
 # Создаем engine для тестов (SQLite)
 test_engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+# Async engine без пула: TestClient может запускать запросы в разных event loop
+test_async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=test_async_engine, autoflush=False, expire_on_commit=False)
 
 def override_get_db():
     try:
@@ -24,9 +29,14 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 # Импортируем app после настройки тестовой БД
 from app.main import app
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture(scope="function")
 def db():
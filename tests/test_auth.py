@@ -1,6 +1,7 @@
 import pytest
 from fastapi import status
 from app import auth, schemas
+from app.hashing import PasswordHasher, HashingPoolSaturated, calibrate_rounds, get_hash_rounds
 
 class TestPasswordHashing:
     """Юнит-тесты для хеширования паролей"""
@@ -25,6 +26,47 @@ class TestPasswordHashing:
         hashed = auth.get_password_hash(password)
         assert auth.verify_password(wrong_password, hashed) is False
 
+class TestPasswordHasher:
+    """Юнит-тесты для движка хеширования паролей"""
+    
+    async def test_async_hash_and_verify(self):
+        """Тест асинхронного хеширования и проверки в пуле процессов"""
+        hashed = await auth.get_password_hash_async("testpassword123")
+        assert await auth.verify_password_async("testpassword123", hashed) is True
+        assert await auth.verify_password_async("wrongpassword", hashed) is False
+    
+    def test_inline_mode_counts_operations(self):
+        """Тест счетчиков операций без пула процессов"""
+        hasher = PasswordHasher(workers=0, queue_depth=4)
+        hashed = hasher.hash("testpassword123")
+        assert hasher.verify("testpassword123", hashed) is True
+        stats = hasher.stats()
+        assert stats["in_flight"] == 0
+        assert stats["operations"]["hash"]["count"] == 1
+        assert stats["operations"]["verify"]["count"] == 1
+        assert stats["operations"]["verify"]["total_seconds"] > 0
+    
+    def test_saturated_queue_rejects(self):
+        """Тест быстрого отказа при переполненной очереди"""
+        hasher = PasswordHasher(workers=0, queue_depth=0)
+        with pytest.raises(HashingPoolSaturated):
+            hasher.hash("testpassword123")
+        assert hasher.stats()["operations"]["hash"]["rejected"] == 1
+
+    def test_hash_uses_target_rounds(self):
+        """Тест целевой стоимости bcrypt"""
+        hasher = PasswordHasher(workers=0, rounds=5)
+        hashed = hasher.hash("testpassword123")
+        assert get_hash_rounds(hashed) == 5
+        assert hasher.needs_rehash(hashed) is False
+        hasher.rounds = 6
+        assert hasher.needs_rehash(hashed) is True
+    
+    def test_calibrate_rounds_respects_bounds(self):
+        """Тест подбора стоимости в заданных границах"""
+        assert calibrate_rounds(0.0, min_rounds=4, max_rounds=6, samples=1) == 4
+        assert calibrate_rounds(60.0, min_rounds=4, max_rounds=6, samples=1) == 6
+
 class TestTokenCreation:
     """Юнит-тесты для создания токенов"""
     
@@ -1,5 +1,7 @@
 import pytest
 from fastapi import status
+from app import auth, models
+from app.hashing import get_hash_rounds
 
 class TestUserRegistration:
     """Интеграционные тесты для регистрации пользователей"""
@@ -76,6 +78,38 @@ class TestUserAuthentication:
             }
         )
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_login_rehashes_password_with_target_cost(self, client, db, test_user_data, monkeypatch):
+        """Тест перехеширования пароля с новой стоимостью при входе"""
+        monkeypatch.setattr(auth.password_hasher, "rounds", 4)
+        client.post("/register", json=test_user_data)
+        monkeypatch.setattr(auth.password_hasher, "rounds", 5)
+        response = client.post(
+            "/token",
+            data={
+                "username": test_user_data["username"],
+                "password": test_user_data["password"]
+            }
+        )
+        assert response.status_code == status.HTTP_200_OK
+        user = db.query(models.User).filter(models.User.username == test_user_data["username"]).first()
+        db.refresh(user)
+        assert get_hash_rounds(user.hashed_password) == 5
+        assert auth.verify_password(test_user_data["password"], user.hashed_password) is True
+    
+    def test_login_hashing_pool_saturated(self, client, test_user_data, monkeypatch):
+        """Тест ответа 503 при перегрузке пула хеширования"""
+        client.post("/register", json=test_user_data)
+        monkeypatch.setattr(auth.password_hasher, "queue_depth", 0)
+        response = client.post(
+            "/token",
+            data={
+                "username": test_user_data["username"],
+                "password": test_user_data["password"]
+            }
+        )
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["retry-after"] == "1"
 
 class TestProtectedEndpoints:
     """Интеграционные тесты для защищенных endpoints"""
@@ -102,6 +136,89 @@ class TestProtectedEndpoints:
         data = response.json()
         assert data["username"] == test_user_data["username"]
     
+    def test_claims_mode_skips_database(self, client, db, test_user_data, monkeypatch):
+        """Тест режима доверия claims: /users/me без запроса к БД"""
+        monkeypatch.setattr(auth.settings, "trust_token_claims", True)
+        client.post("/register", json=test_user_data)
+        token = client.post(
+            "/token",
+            data={
+                "username": test_user_data["username"],
+                "password": test_user_data["password"]
+            }
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        response = client.get("/users/me", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["is_active"] is True
+        
+        # Отключение пользователя увеличивает token_version - старый токен отклоняется
+        user = db.query(models.User).filter(models.User.username == test_user_data["username"]).first()
+        user.is_active = False
+        db.commit()
+        assert user.token_version == 2
+        response = client.get("/users/me", headers=headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        
+        # Удаленный пользователь тоже не проходит по claims нового токена
+        user.is_active = True
+        db.commit()
+        token = client.post(
+            "/token",
+            data={
+                "username": test_user_data["username"],
+                "password": test_user_data["password"]
+            }
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/users/me", headers=headers).status_code == status.HTTP_200_OK
+        db.delete(user)
+        db.commit()
+        response = client.get("/users/me", headers=headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_users_me_conditional_get(self, client, db, test_user_data, monkeypatch):
+        """Тест ETag для /users/me: 304 без тела, новая версия - новый ETag"""
+        monkeypatch.setattr(auth.settings, "trust_token_claims", True)
+        client.post("/register", json=test_user_data)
+        token = client.post(
+            "/token",
+            data={
+                "username": test_user_data["username"],
+                "password": test_user_data["password"]
+            }
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        response = client.get("/users/me", headers=headers)
+        etag = response.headers["ETag"]
+        assert etag.startswith('"')
+        
+        response = client.get("/users/me", headers={**headers, "If-None-Match": f'W/"other", {etag}'})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+        
+        # Смена email увеличивает версию: нужен новый токен, ETag меняется
+        user = db.query(models.User).filter(models.User.username == test_user_data["username"]).first()
+        user.email = "changed@example.com"
+        db.commit()
+        assert client.get("/users/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+        token = client.post(
+            "/token",
+            data={
+                "username": test_user_data["username"],
+                "password": test_user_data["password"]
+            }
+        ).json()["access_token"]
+        response = client.get(
+            "/users/me",
+            headers={"Authorization": f"Bearer {token}", "If-None-Match": etag}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+    
     def test_get_current_user_no_token(self, client):
         """Тест доступа без токена"""
         response = client.get("/users/me")
@@ -115,6 +232,49 @@ class TestProtectedEndpoints:
         )
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
+class TestStaticAssets:
+    """Интеграционные тесты раздачи веб-интерфейса"""
+    
+    def test_index_gzip_and_revalidation(self, client):
+        """Сжатый ответ, ETag по содержимому и 304 при повторном запросе"""
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert response.headers["Cache-Control"] == "no-cache"
+        assert b"<html" in response.content.lower()
+        etag = response.headers["ETag"]
+        
+        response = client.get("/static/index.html", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        
+        # Без поддержки сжатия - исходный файл с другим ETag
+        response = client.get("/", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["ETag"] != etag
+    
+    def test_missing_asset(self, client):
+        """Несуществующий файл - 404"""
+        assert client.get("/static/missing.js").status_code == status.HTTP_404_NOT_FOUND
+        assert client.get("/static/../main.py").status_code == status.HTTP_404_NOT_FOUND
+
+class TestMetricsEndpoint:
+    """Интеграционные тесты /metrics"""
+    
+    def test_metrics_exposition(self, client, test_user_data):
+        """Маршруты по шаблону, пулы БД и счетчики bcrypt"""
+        client.post("/register", json=test_user_data)
+        client.get("/users/me")
+        
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert 'http_request_duration_seconds_count{method="POST",route="/register",status="201"}' in body
+        assert 'route="/users/me",status="401"' in body
+        assert 'db_pool_size{pool="sync"}' in body
+        assert 'password_hashing_operations_total{operation="hash",outcome="count"}' in body
+
 class TestHealthCheck:
     """Тесты для health check"""
     
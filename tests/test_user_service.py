@@ -0,0 +1,1158 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List
+import httpx
+import pytest
+from pydantic import TypeAdapter
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from user_service.domain.models.principal import Principal
+from user_service.domain.models.user import Base as UserServiceBase, User, Role
+from user_service.infrastructure.cache.principal_cache import PrincipalCache
+from user_service.infrastructure.cache.count_cache import count_cache
+from user_service.infrastructure.cache.role_registry import role_registry
+from user_service.infrastructure.cache.roster_cache import RosterCache
+from user_service.infrastructure.cache.etag_cache import ProfileEtagCache
+from user_service.application.services import cache_invalidation
+from user_service.infrastructure.http_clients.auth_client import AuthHttpPool, AuthServiceClient
+from user_service.infrastructure.repositories.outbox_repository import OutboxRepository
+from user_service.application.services.auth_sync_dispatcher import AuthSyncDispatcher
+from user_service.domain.models.outbox import (
+    OutboxMessage,
+    OUTBOX_BLOCK,
+    OUTBOX_RESTORE,
+    OUTBOX_UPDATE_ROLES,
+)
+from user_service.infrastructure.repositories import user_repository
+from user_service.infrastructure.repositories.user_repository import UserRepository
+from user_service.infrastructure.search import InMemorySearchBackend
+from user_service.infrastructure.search.base import IlikeSearchBackend
+from user_service.infrastructure.logs import LazyQueueHandler, LoggingPipeline, SamplingFilter
+from user_service.infrastructure.metrics import MetricsRegistry
+from user_service.infrastructure.http_clients.auth_client import auth_client_requests
+from user_service.api.streaming import encode_csv, encode_ndjson, iter_ndjson_lines
+from user_service.api.schemas import UserResponse
+from user_service.api.serialization import FastJSONResponse, dumps
+from user_service.api.etag import etag_matches
+from user_service.api.static_assets import StaticAssets, choose_encoding
+from user_service.api.middleware.auth import get_current_active_user
+from user_service.api.routes import users as users_routes
+from user_service.infrastructure.database.database import get_db
+from user_service.infrastructure.database.query_counter import (
+    assert_max_queries,
+    install_query_counter,
+    track_queries,
+)
+from user_service.api.middleware.query_counter import QueryCounterMiddleware
+from user_service.application.use_cases.bulk_import_users import BulkImportUsersUseCase
+from user_service.application.use_cases.assign_doctor import AssignDoctorUseCase
+from user_service.application.use_cases.bulk_assign_doctor import BulkAssignDoctorUseCase
+from user_service.domain.events.event_bus import EventBus, event_bus
+from user_service.domain.events.events import (
+    UserCreated,
+    UserBlocked,
+    UserUpdated,
+    DoctorAssignedToPatient,
+)
+from user_service.infrastructure.repositories.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+)
+
+@pytest.fixture(scope="function")
+def user_db():
+    """Сессия User Service на SQLite в памяти"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    UserServiceBase.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    # Реестр ролей глобальный, а БД в каждом тесте новая
+    role_registry.clear()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+        role_registry.clear()
+
+def seed_users(db, count, role_name="PATIENT"):
+    """Создание пользователей с одной ролью
+    
+    created_at задается явно: SQLite хранит CURRENT_TIMESTAMP без микросекунд,
+    и строковое сравнение с параметрами-датами было бы некорректным.
+    """
+    created_at = datetime(2024, 1, 1)
+    role = db.query(Role).filter(Role.name == role_name).first() or Role(name=role_name)
+    offset = db.query(User).count()
+    users = []
+    for i in range(offset, offset + count):
+        user = User(
+            auth_user_id=1000 + i,
+            first_name=f"Name{i}",
+            last_name=f"Last{i}",
+            email=f"{role_name.lower()}{i}@example.com",
+            phone=f"+7900{i:07d}",
+            is_blocked=False,
+            created_at=created_at + timedelta(seconds=i // 2),
+            roles=[role]
+        )
+        db.add(user)
+        users.append(user)
+    db.commit()
+    return users
+
+def make_principal(user_id=1, is_blocked=False, roles=("PATIENT",)):
+    return Principal(
+        id=user_id,
+        auth_user_id=100 + user_id,
+        email=f"user{user_id}@example.com",
+        is_blocked=is_blocked,
+        role_names=frozenset(roles)
+    )
+
+class TestPrincipalCache:
+    """Юнит-тесты для кеша principal в User Service"""
+    
+    def test_hit_and_miss_counters(self):
+        """Тест попаданий и промахов"""
+        cache = PrincipalCache(max_size=10, ttl_seconds=60)
+        key = cache.token_key("token")
+        assert cache.get(key) is None
+        cache.put(key, make_principal())
+        assert cache.get(key).id == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+    
+    def test_ttl_capped_at_token_exp(self):
+        """Тест ограничения TTL сроком действия токена"""
+        cache = PrincipalCache(max_size=10, ttl_seconds=60)
+        key = cache.token_key("expired")
+        cache.put(key, make_principal(), token_exp=time.time() - 1)
+        assert cache.get(key) is None
+    
+    def test_lru_eviction(self):
+        """Тест вытеснения самых старых записей"""
+        cache = PrincipalCache(max_size=2, ttl_seconds=60)
+        for user_id in (1, 2, 3):
+            cache.put(f"key{user_id}", make_principal(user_id))
+        assert cache.get("key1") is None
+        assert cache.get("key3").id == 3
+        assert cache.stats()["evictions"] == 1
+    
+    def test_evict_user_drops_all_tokens(self):
+        """Тест инвалидации всех токенов пользователя"""
+        cache = PrincipalCache(max_size=10, ttl_seconds=60)
+        cache.put("a", make_principal(1))
+        cache.put("b", make_principal(1))
+        cache.put("c", make_principal(2))
+        cache.evict_user(1)
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+        assert cache.get("c").id == 2
+    
+    def test_negative_caching(self):
+        """Тест негативного кеширования неизвестных auth_user_id"""
+        cache = PrincipalCache(max_size=10, ttl_seconds=60, negative_ttl_seconds=60)
+        assert cache.is_known_missing(42) is False
+        cache.put_missing(42)
+        assert cache.is_known_missing(42) is True
+        cache.forget_missing(42)
+        assert cache.is_known_missing(42) is False
+
+class TestUserListPagination:
+    """Тесты offset и keyset пагинации списка пользователей"""
+    
+    def test_cursor_roundtrip(self):
+        """Тест кодирования курсора"""
+        created_at = datetime(2024, 1, 2, 3, 4, 5)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+        with pytest.raises(InvalidCursor):
+            decode_cursor("not-a-cursor")
+    
+    def test_keyset_pages_cover_all_users(self, user_db):
+        """Тест обхода всех пользователей курсором без пропусков и повторов"""
+        seed_users(user_db, 7)
+        repo = UserRepository(user_db)
+        seen = []
+        after = None
+        while True:
+            users, has_more = repo.list_users_after(after=after, limit=3)
+            seen.extend(user.id for user in users)
+            if not has_more:
+                break
+            after = (users[-1].created_at, users[-1].id)
+        assert seen == sorted(seen)
+        assert len(seen) == len(set(seen)) == 7
+    
+    def test_offset_limit_applies_to_users(self, user_db):
+        """Тест: LIMIT считается по пользователям, а не по строкам JOIN с ролями"""
+        doctor = Role(name="DOCTOR")
+        for user in seed_users(user_db, 5):
+            user.roles.append(doctor)
+        user_db.commit()
+        users, total = UserRepository(user_db).list_users(skip=0, limit=3, role="DOCTOR")
+        assert total == 5
+        assert len(users) == 3
+        assert all(len(user.roles) == 2 for user in users)
+    
+    def test_ranked_search_page_has_no_cursor(self, user_db, monkeypatch):
+        """Тест: страница поиска упорядочена по релевантности, курсор не выдается"""
+        monkeypatch.setattr(user_repository, "search_backend", IlikeSearchBackend())
+        seed_users(user_db, 4)
+        app = FastAPI()
+        app.include_router(users_routes.router)
+        app.dependency_overrides[get_db] = lambda: user_db
+        app.dependency_overrides[get_current_active_user] = lambda: Principal(
+            1, 1, "admin@example.com", False, frozenset({"ADMIN"})
+        )
+        client = TestClient(app)
+        assert client.get("/users", params={"page_size": 2}).json()["next_cursor"] is not None
+        # Последняя страница ровно заполнена: курсора на пустую страницу нет
+        last = client.get("/users", params={"page_size": 2, "page": 2}).json()
+        assert len(last["users"]) == 2 and last["next_cursor"] is None
+        body = client.get("/users", params={"page_size": 2, "search": "name"}).json()
+        assert len(body["users"]) == 2 and body["total"] == 4
+        assert body["next_cursor"] is None
+
+class TestFastSerialization:
+    """Тесты быстрого пути сериализации списков"""
+
+    def test_rows_match_pydantic_output(self, user_db):
+        """JSON из строк совпадает с JSON из моделей UserResponse"""
+        seed_users(user_db, 3)
+        [doctor] = seed_users(user_db, 1, role_name="DOCTOR")
+        doctor.specialty = "cardiology"
+        doctor.blocked_at = datetime(2024, 2, 1, 12, 30, 15, 123456)
+        user_db.commit()
+        repo = UserRepository(user_db)
+
+        adapter = TypeAdapter(List[UserResponse])
+        from_models = adapter.dump_json(
+            adapter.validate_python(repo.page_users(limit=10), from_attributes=True)
+        )
+        from_rows = dumps(repo.page_user_rows(limit=10))
+
+        assert json.loads(from_rows) == json.loads(from_models)
+
+    def test_response_passes_bytes_through(self):
+        """Готовые байты отдаются без повторного кодирования"""
+        assert FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
+        assert json.loads(FastJSONResponse({"at": datetime(2024, 1, 1)}).body) == {"at": "2024-01-01T00:00:00"}
+
+
+class TestUserCountStrategies:
+    """Тесты стратегий подсчета total"""
+    
+    def test_cached_count_reused_until_cleared(self, user_db):
+        """Тест кеширования точного total до инвалидации"""
+        count_cache.clear()
+        seed_users(user_db, 3)
+        repo = UserRepository(user_db)
+        assert repo.count_users(is_blocked=False, strategy="cached") == (3, True)
+        seed_users(user_db, 2)
+        assert repo.count_users(is_blocked=False, strategy="cached") == (3, False)
+        count_cache.clear()
+        assert repo.count_users(is_blocked=False, strategy="cached") == (5, True)
+    
+    def test_estimate_falls_back_to_exact_without_postgres(self, user_db):
+        """Тест: на SQLite оценка планировщика недоступна, считается точно"""
+        seed_users(user_db, 4)
+        assert UserRepository(user_db).count_users(strategy="estimate") == (4, True)
+
+class TestInMemorySearch:
+    """Тесты in-process триграммного индекса поиска"""
+    
+    @pytest.fixture
+    def backend(self, user_db):
+        users = seed_users(user_db, 3)
+        users[0].first_name, users[0].last_name = "Ivan", "Petrov"
+        users[1].first_name, users[1].last_name = "Ivanna", "Sidorova"
+        users[2].first_name, users[2].last_name = "Petr", "Ivanov"
+        users[2].phone = "+79161234567"
+        user_db.commit()
+        backend = InMemorySearchBackend(threshold=0.3)
+        backend.setup(user_db)
+        return backend
+    
+    def test_ranked_substring_and_typo(self, backend):
+        """Тест ранжирования, поиска по подстроке и с опечаткой"""
+        assert backend.search("ivan")[:1] == [1]
+        assert set(backend.search("ivan")) == {1, 2, 3}
+        assert 2 in backend.search("sidorva")
+    
+    def test_phone_prefix(self, backend):
+        """Тест поиска по префиксу телефона"""
+        assert backend.search("+7 916") == [3]
+        assert backend.search("7916123") == [3]
+    
+    def test_incremental_update(self, backend):
+        """Тест обновления индекса по событиям"""
+        backend.index_user(1, {"last_name": "Smirnov"})
+        assert 1 in backend.search("smirnov")
+        assert 1 not in backend.search("petrov")
+        backend.index_user(10, {"first_name": "Oleg", "email": "oleg@example.com"})
+        assert backend.search("oleg") == [10]
+    
+    def test_results_not_truncated(self, backend):
+        """Тест: все совпадения попадают в total и на последующие страницы"""
+        for user_id in range(100, 1300):
+            backend.index_user(user_id, {"first_name": "Oleg", "last_name": f"User{user_id}"})
+        assert len(backend.search("oleg")) == 1200
+    
+    def test_repository_uses_ranked_index(self, backend, user_db, monkeypatch):
+        """Тест фильтра search в list_users через индекс"""
+        monkeypatch.setattr(user_repository, "search_backend", backend)
+        users, total = UserRepository(user_db).list_users(search="ivan")
+        assert total == 3
+        assert users[0].id == 1
+
+
+class TestRoleRegistry:
+    """Тесты реестра ролей"""
+
+    def test_load_creates_default_roles(self, user_db):
+        """При загрузке создаются недостающие стандартные роли"""
+        role_registry.load(user_db)
+        assert sorted(role_registry.names()) == ["ADMIN", "DOCTOR", "PATIENT"]
+        assert user_db.query(Role).count() == 3
+
+    def test_resolve_known_roles_without_queries(self, user_db):
+        """Известные роли разрешаются без обращения к БД"""
+        role_registry.load(user_db)
+        statements = []
+        event.listen(user_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        roles = role_registry.resolve(user_db, ["DOCTOR", "PATIENT", "DOCTOR"])
+
+        assert [role.name for role in roles] == ["DOCTOR", "PATIENT"]
+        assert all(role in user_db for role in roles)
+        assert statements == []
+
+    def test_unknown_role_created_once(self, user_db):
+        """Неизвестная роль создается и попадает в реестр"""
+        role_registry.load(user_db)
+        [role] = role_registry.resolve(user_db, ["NURSE"])
+        assert role_registry.get_id("NURSE") == role.id
+        assert user_db.query(Role).filter(Role.name == "NURSE").count() == 1
+
+    def test_resolved_roles_assignable_to_user(self, user_db):
+        """Роли из реестра можно назначать пользователю в другой сессии"""
+        role_registry.load(user_db)
+        other = sessionmaker(bind=user_db.get_bind())()
+        user = User(auth_user_id=1, first_name="A", last_name="B", email="a@example.com")
+        user.roles = role_registry.resolve(other, ["ADMIN"])
+        other.add(user)
+        other.commit()
+        assert [role.name for role in other.get(User, user.id).roles] == ["ADMIN"]
+        other.close()
+
+
+class TestUserExport:
+    """Тесты потоковой выгрузки пользователей"""
+
+    def test_rows_streamed_in_chunks_with_roles(self, user_db):
+        """Строки отдаются порциями, роли подгружаются на каждую порцию"""
+        seed_users(user_db, 5)
+        seed_users(user_db, 2, role_name="DOCTOR")
+        chunks = list(UserRepository(user_db).iter_export_rows(chunk_size=3))
+
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+        rows = [row for chunk in chunks for row in chunk]
+        assert [row["roles"] for row in rows] == [["PATIENT"]] * 5 + [["DOCTOR"]] * 2
+
+    def test_filters_applied(self, user_db):
+        """Фильтры совпадают с фильтрами списка"""
+        seed_users(user_db, 3)
+        seed_users(user_db, 2, role_name="DOCTOR")
+        rows = [
+            row
+            for chunk in UserRepository(user_db).iter_export_rows(role="DOCTOR")
+            for row in chunk
+        ]
+        assert [row["email"] for row in rows] == ["doctor3@example.com", "doctor4@example.com"]
+
+    def test_encoders(self):
+        """NDJSON и CSV кодируются построчно"""
+        chunks = [[{"id": 1, "created_at": datetime(2024, 1, 1), "roles": ["ADMIN", "DOCTOR"], "phone": None}]]
+        assert list(encode_ndjson(chunks)) == [
+            b'{"id": 1, "created_at": "2024-01-01T00:00:00", "roles": ["ADMIN", "DOCTOR"], "phone": null}\n'
+        ]
+        csv_body = b"".join(encode_csv(chunks, ("id", "created_at", "roles", "phone"))).decode()
+        assert csv_body.splitlines() == ["id,created_at,roles,phone", "1,2024-01-01T00:00:00,ADMIN;DOCTOR,"]
+
+    def test_csv_formulas_neutralized(self):
+        """Значения, начинающиеся с = + - @, не исполняются как формулы"""
+        chunks = [[{
+            "id": -1, "first_name": '=HYPERLINK("http://evil")', "last_name": "-2+cmd|' /C calc'!A0",
+            "phone": "+7 (900) 123-45-67", "email": "@x",
+        }]]
+        columns = ("id", "first_name", "last_name", "phone", "email")
+        rows = list(csv.reader(io.StringIO(b"".join(encode_csv(chunks, columns)).decode())))
+        assert rows[1] == [
+            "-1", '\'=HYPERLINK("http://evil")', "'-2+cmd|' /C calc'!A0", "+7 (900) 123-45-67", "'@x"
+        ]
+
+    def test_route_streams_on_own_session(self, user_db, monkeypatch):
+        """Тело ответа читается через отдельную сессию, закрываемую после выгрузки"""
+        seed_users(user_db, 3)
+        sessions = []
+
+        def session_factory():
+            session = sessionmaker(bind=user_db.get_bind())()
+            sessions.append(session)
+            return session
+
+        monkeypatch.setattr(users_routes, "SessionLocal", session_factory)
+        app = FastAPI()
+        app.include_router(users_routes.router)
+        app.dependency_overrides[get_current_active_user] = lambda: Principal(
+            1, 1, "admin@example.com", False, frozenset({"ADMIN"})
+        )
+        with TestClient(app).stream("GET", "/users/export", params={"format": "csv"}) as response:
+            lines = list(response.iter_lines())
+        assert response.status_code == 200
+        assert lines[0].startswith("id,") and len(lines) == 4
+        assert len(sessions) == 1 and not sessions[0].in_transaction()
+
+
+class TestDoctorPatients:
+    """Тесты списка пациентов врача"""
+
+    def test_keyset_pages_skip_blocked(self, user_db):
+        """Страницы по курсору содержат только незаблокированных пациентов врача"""
+        [doctor] = seed_users(user_db, 1, role_name="DOCTOR")
+        patients = seed_users(user_db, 6)
+        for patient in patients:
+            patient.assigned_doctor_id = doctor.id
+        patients[2].is_blocked = True
+        user_db.commit()
+        repo = UserRepository(user_db)
+
+        first, has_more = repo.list_patients_after(doctor.id, limit=3)
+        assert has_more
+        second, has_more = repo.list_patients_after(
+            doctor.id, after=(first[-1]["created_at"], first[-1]["id"]), limit=3
+        )
+        assert not has_more
+        expected = [patient.id for patient in patients if not patient.is_blocked]
+        assert [patient["id"] for patient in first + second] == expected
+        assert repo.count_patients(doctor.id) == 5
+
+    def test_roster_cache_invalidation(self, monkeypatch):
+        """Назначение сбрасывает списки обоих врачей, обновление - списки с пациентом"""
+        cache = RosterCache()
+        monkeypatch.setattr(cache_invalidation, "roster_cache", cache)
+        for doctor_id in (1, 2, 3):
+            cache.put(doctor_id, "count", 10, patient_ids=[100 + doctor_id])
+
+        cache_invalidation.invalidate_rosters_on_assignment(DoctorAssignedToPatient(
+            event_id="e", occurred_at=datetime(2024, 1, 1), aggregate_id=7,
+            patient_id=7, doctor_id=1, assigned_by=1, previous_doctor_id=2
+        ))
+        assert cache.get(1, "count") is None and cache.get(2, "count") is None
+        assert cache.get(3, "count") == 10
+
+        cache_invalidation.invalidate_patient_rosters(UserUpdated(
+            event_id="e", occurred_at=datetime(2024, 1, 1), aggregate_id=103, updated_fields={}, updated_by=1
+        ))
+        assert cache.get(3, "count") is None
+
+
+class TestProfileEtag:
+    """Тесты условного GET профиля пользователя"""
+
+    @pytest.fixture
+    def client(self, user_db, monkeypatch):
+        """Клиент роутера пользователей с администратором и отдельным кешем ETag"""
+        cache = ProfileEtagCache()
+        monkeypatch.setattr(users_routes, "profile_etag_cache", cache)
+        monkeypatch.setattr(cache_invalidation, "profile_etag_cache", cache)
+        app = FastAPI()
+        app.include_router(users_routes.router)
+        app.dependency_overrides[get_db] = lambda: user_db
+        app.dependency_overrides[get_current_active_user] = lambda: Principal(
+            1, 1, "admin@example.com", False, frozenset({"ADMIN"})
+        )
+        client = TestClient(app)
+        client.etag_cache = cache
+        return client
+
+    def test_etag_matches(self):
+        """Списки, слабые теги и * в If-None-Match"""
+        assert etag_matches('"a", W/"b"', '"b"')
+        assert etag_matches("*", '"b"')
+        assert not etag_matches('"a"', '"b"')
+        assert not etag_matches(None, '"b"')
+
+    def test_not_modified_without_loading_roles(self, client, user_db):
+        """Повторный запрос с ETag - 304 из кеша без запросов; смена ролей меняет ETag"""
+        [user] = seed_users(user_db, 1)
+        response = client.get(f"/users/{user.id}")
+        etag = response.headers["ETag"]
+        assert response.status_code == 200
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(user_db.get_bind(), "before_cursor_execute", listener)
+        try:
+            response = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+            assert response.status_code == 304 and response.content == b""
+            assert statements == []
+
+            # Без кеша версия читается легким запросом без таблицы ролей
+            client.etag_cache.invalidate(user.id)
+            response = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            assert len(statements) == 1 and "JOIN roles" not in statements[0]
+        finally:
+            event.remove(user_db.get_bind(), "before_cursor_execute", listener)
+
+        doctor_role = Role(name="DOCTOR")
+        user.roles.append(doctor_role)
+        user_db.commit()
+        cache_invalidation.invalidate_profile_etag(UserUpdated(
+            event_id="e", occurred_at=datetime(2024, 1, 1), aggregate_id=user.id, updated_fields={}, updated_by=1
+        ))
+        response = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_edit_within_same_second_changes_etag(self, client, user_db):
+        """Правка в ту же секунду меняет ETag: версия строки, а не updated_at"""
+        [user] = seed_users(user_db, 1)
+        user.first_name = "First"
+        user_db.commit()
+        etag = client.get(f"/users/{user.id}").headers["ETag"]
+
+        user.first_name = "Second"
+        user_db.commit()
+        client.etag_cache.invalidate(user.id)
+        response = client.get(f"/users/{user.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["first_name"] == "Second"
+        assert user.version == 3
+
+
+class TestQueryCounter:
+    """Тесты счетчика SQL-запросов"""
+
+    def test_server_timing_and_budget(self, user_db):
+        """Заголовок Server-Timing и бюджет запросов на endpoint"""
+        [user] = seed_users(user_db, 1)
+        engine = user_db.get_bind()
+        install_query_counter(engine)
+        app = FastAPI()
+        app.add_middleware(QueryCounterMiddleware)
+        app.include_router(users_routes.router)
+        app.dependency_overrides[get_db] = lambda: user_db
+        principal = Principal(user.id, user.auth_user_id, user.email, False, frozenset({"PATIENT"}))
+        app.dependency_overrides[get_current_active_user] = lambda: principal
+        client = TestClient(app)
+
+        with assert_max_queries(1, engine):
+            response = client.get(f"/users/{user.id}")
+        assert response.status_code == 200
+        assert response.headers["Server-Timing"].endswith('desc="1 queries"')
+
+        with pytest.raises(AssertionError, match="at most 0 queries, got 1"):
+            with assert_max_queries(0, engine):
+                client.get(f"/users/{user.id}")
+
+    def test_repeated_statements_flagged(self, user_db):
+        """Ленивая загрузка ролей в цикле видна как повторяющийся запрос"""
+        seed_users(user_db, 6)
+        install_query_counter(user_db.get_bind())
+        user_db.expire_all()
+
+        with track_queries() as stats:
+            users = user_db.query(User).all()
+            [role.name for user in users for role in user.roles]
+
+        assert stats.count == 7
+        [(statement, times)] = stats.repeated(threshold=5)
+        assert times == 6 and "user_roles" in statement
+
+    def test_failed_statement_leaves_no_state(self, user_db):
+        """Упавший запрос не оставляет время старта на соединении"""
+        engine = user_db.get_bind()
+        install_query_counter(engine)
+        with track_queries() as stats:
+            with pytest.raises(Exception):
+                user_db.execute(text("SELECT * FROM missing_table"))
+            user_db.rollback()
+            user_db.execute(text("SELECT 1"))
+        assert stats.count == 1
+        with engine.connect() as conn:
+            assert "query_started" not in conn.info
+
+
+class TestStaticAssets:
+    """Тесты раздачи статических файлов из памяти"""
+
+    def test_choose_encoding(self):
+        """Выбор кодировки с учетом q и доступных вариантов"""
+        available = {"identity": b"", "gzip": b""}
+        assert choose_encoding("gzip, deflate, br", available) == "gzip"
+        assert choose_encoding("gzip;q=0, *;q=0.1", available) == "identity"
+        assert choose_encoding(None, available) == "identity"
+        assert choose_encoding("br;q=1.0, gzip;q=0.5", {**available, "br": b""}) == "br"
+
+    def test_small_and_large_files(self, tmp_path):
+        """Маленькие файлы не сжимаются, CSS кешируется на max_age"""
+        (tmp_path / "tiny.css").write_text("a{}")
+        (tmp_path / "app.css").write_text("body { color: red; }\n" * 100)
+        assets = StaticAssets(str(tmp_path), max_age=600)
+        client = TestClient(assets)
+
+        response = client.get("/app.css", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Cache-Control"] == "public, max-age=600"
+        assert response.headers["Content-Type"] == "text/css; charset=utf-8"
+        assert "gzip" not in assets.get("tiny.css").variants
+        assert client.post("/app.css").status_code == 405
+
+
+class TestLoggingPipeline:
+    """Тесты структурированного логирования"""
+
+    def test_sampling_keeps_fraction_and_warnings(self):
+        """Выборка по самому длинному префиксу; WARNING и выше проходят всегда"""
+        sampler = SamplingFilter({"svc": 1.0, "svc.auth": 0.25})
+        make = lambda name, level: logging.LogRecord(name, level, "", 0, "msg", (), None)
+
+        kept = [sampler.filter(make("svc.auth.child", logging.INFO)) for _ in range(100)]
+        assert sum(kept) == 25
+        assert sampler.filter(make("svc.other", logging.INFO))
+        assert sampler.filter(make("svc.auth", logging.WARNING))
+        assert sampler.sampled_out == 75
+
+    def test_json_lines_written_by_listener(self):
+        """Записи форматируются в JSON фоновым потоком, extra - отдельные поля"""
+        stream = io.StringIO()
+        pipeline = LoggingPipeline()
+        pipeline.setup(level="INFO", fmt="json", sample_rates={"test.quiet": 0.0}, stream=stream)
+        try:
+            logging.getLogger("test.loud").info("user %s found", 7, extra={"roles": ["ADMIN"]})
+            logging.getLogger("test.quiet").info("never written")
+            try:
+                raise ValueError("boom")
+            except ValueError:
+                logging.getLogger("test.loud").error("failed", exc_info=True)
+        finally:
+            pipeline.stop()
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [line["message"] for line in lines] == ["user 7 found", "failed"]
+        assert lines[0]["roles"] == ["ADMIN"] and lines[0]["logger"] == "test.loud"
+        assert "ValueError: boom" in lines[1]["exc_info"]
+        assert pipeline.stats() == {"enabled": False}
+
+    def test_message_rendered_in_calling_thread(self):
+        """Аргументы подставляются при вызове: поздние изменения объекта не попадают в лог"""
+        roles = ["PATIENT"]
+        record = logging.LogRecord("test.args", logging.INFO, "", 0, "roles %s", (roles,), None)
+        prepared = LazyQueueHandler(queue.Queue()).prepare(record)
+        roles.append("ADMIN")
+        assert prepared.args is None
+        assert prepared.getMessage() == "roles ['PATIENT']"
+
+
+class TestMetrics:
+    """Тесты реестра метрик"""
+
+    def test_text_exposition(self):
+        """Накопительные корзины гистограммы, экранирование меток и коллекторы"""
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value, route='/a"b')
+        registry.counter("calls_total", "Calls").inc()
+        registry.add_collector(lambda: [("queue_depth", "gauge", "Depth", [({"name": "q"}, 3)])])
+
+        lines = registry.render().splitlines()
+        assert 'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{route="/a\\"b",le="1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in lines
+        assert 'latency_seconds_count{route="/a\\"b"} 3' in lines
+        assert "calls_total 1" in lines
+        assert "# TYPE queue_depth gauge" in lines and 'queue_depth{name="q"} 3' in lines
+        with pytest.raises(ValueError):
+            registry.gauge("calls_total", "Calls")
+
+
+class TestAutoDoctorAssignment:
+    """Тесты автоматического назначения наименее загруженного врача"""
+
+    def test_least_loaded_doctor_picked(self, user_db):
+        """Пациенты распределяются по счетчикам нагрузки врачей"""
+        doctors = seed_users(user_db, 2, role_name="DOCTOR")
+        patients = seed_users(user_db, 4)
+        use_case = AssignDoctorUseCase(user_db)
+
+        assigned = [use_case.execute(patient.id, None, assigned_by=1).assigned_doctor_id for patient in patients]
+
+        assert assigned == [doctors[0].id, doctors[1].id, doctors[0].id, doctors[1].id]
+        user_db.expire_all()
+        assert [doctor.patient_count for doctor in doctors] == [2, 2]
+
+    def test_specialty_filter_and_reassignment(self, user_db):
+        """Фильтр по специализации; переназначение переносит нагрузку"""
+        general, cardiologist = seed_users(user_db, 2, role_name="DOCTOR")
+        cardiologist.specialty = "cardiology"
+        [patient] = seed_users(user_db, 1)
+        user_db.commit()
+        use_case = AssignDoctorUseCase(user_db)
+
+        use_case.execute(patient.id, general.id, assigned_by=1)
+        use_case.execute(patient.id, None, assigned_by=1, specialty="cardiology")
+
+        user_db.expire_all()
+        assert patient.assigned_doctor_id == cardiologist.id
+        assert (general.patient_count, cardiologist.patient_count) == (0, 1)
+
+    def test_conflict_only_without_matching_doctor(self, user_db):
+        """409 только если подходящего врача нет вообще"""
+        seed_users(user_db, 1, role_name="DOCTOR")
+        [patient] = seed_users(user_db, 1)
+        with pytest.raises(HTTPException) as error:
+            AssignDoctorUseCase(user_db).execute(patient.id, None, assigned_by=1, specialty="neurology")
+        assert error.value.status_code == 409
+
+    def test_recount_repairs_counters(self, user_db):
+        """Пересчет восстанавливает счетчики по назначениям"""
+        [doctor] = seed_users(user_db, 1, role_name="DOCTOR")
+        patients = seed_users(user_db, 3)
+        for patient in patients:
+            patient.assigned_doctor_id = doctor.id
+        patients[0].is_blocked = True
+        user_db.commit()
+
+        UserRepository(user_db).recount_patient_loads()
+
+        user_db.expire_all()
+        assert doctor.patient_count == 2
+
+
+class TestBulkDoctorAssignment:
+    """Тесты массового назначения врача"""
+
+    def test_move_patients_between_doctors(self, user_db, monkeypatch):
+        """Пациенты ушедшего врача переносятся одним UPDATE с пачкой событий"""
+        leaving, successor = seed_users(user_db, 2, role_name="DOCTOR")
+        patients = seed_users(user_db, 3)
+        for patient in patients:
+            AssignDoctorUseCase(user_db).execute(patient.id, leaving.id, assigned_by=1)
+        published = []
+        monkeypatch.setattr(event_bus, "publish", published.append)
+        statements = []
+        event.listen(user_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        result = BulkAssignDoctorUseCase(user_db).execute(successor.id, assigned_by=1, from_doctor_id=leaving.id)
+
+        assert result == {"doctor_id": successor.id, "assigned": 3, "unchanged": 0, "skipped": []}
+        updates = [statement for statement in statements if statement.startswith("UPDATE")]
+        assert sum("assigned_doctor_id=?" in statement for statement in updates) == 1
+        assert [(e.patient_id, e.previous_doctor_id) for e in published] == [(p.id, leaving.id) for p in patients]
+        user_db.expire_all()
+        assert (leaving.patient_count, successor.patient_count) == (0, 3)
+
+    def test_invalid_patients_skipped(self, user_db):
+        """Не найденные и не являющиеся пациентами пользователи пропускаются"""
+        doctor, other_doctor = seed_users(user_db, 2, role_name="DOCTOR")
+        [patient] = seed_users(user_db, 1)
+
+        result = BulkAssignDoctorUseCase(user_db).execute(
+            doctor.id, assigned_by=1, patient_ids=[patient.id, other_doctor.id, 999]
+        )
+
+        assert result["assigned"] == 1
+        assert [item["patient_id"] for item in result["skipped"]] == [other_doctor.id, 999]
+
+
+class TestBulkImport:
+    """Тесты потокового импорта пользователей"""
+
+    @staticmethod
+    def ndjson_row(i, **overrides):
+        row = {
+            "auth_user_id": 5000 + i,
+            "first_name": f"Bulk{i}",
+            "last_name": "Import",
+            "email": f"bulk{i}@example.com",
+            "roles": ["PATIENT"],
+        }
+        row.update(overrides)
+        return json.dumps(row).encode()
+
+    async def test_ndjson_lines_split_across_chunks(self):
+        """Строки собираются из произвольно нарезанных чанков"""
+        async def chunks():
+            for chunk in (b'{"a"', b': 1}\n\n{"b": 2}', b"\n{\"c\": 3}"):
+                yield chunk
+
+        lines = [item async for item in iter_ndjson_lines(chunks())]
+        assert lines == [(1, b'{"a": 1}'), (3, b'{"b": 2}'), (4, b'{"c": 3}')]
+
+    def test_batch_insert_with_row_errors(self, user_db, monkeypatch):
+        """Валидные строки вставляются, ошибочные отчитываются по номеру строки"""
+        seed_users(user_db, 1)
+        published = []
+        monkeypatch.setattr(event_bus, "publish", published.append)
+        lines = [
+            (1, self.ndjson_row(1)),
+            (2, b"not json"),
+            (3, self.ndjson_row(3, email="bad")),
+            (4, self.ndjson_row(4, auth_user_id=5001)),  # дубль внутри импорта
+            (5, self.ndjson_row(5, auth_user_id=1000)),  # уже есть в БД
+            (6, self.ndjson_row(6, roles=["DOCTOR", "PATIENT"])),
+        ]
+
+        use_case = BulkImportUsersUseCase(user_db)
+        use_case.import_batch(lines, created_by=42)
+        result = use_case.result()
+
+        assert result["created"] == 2
+        assert [error["line"] for error in result["errors"]] == [2, 3, 4, 5]
+        assert user_db.query(User).count() == 3
+        doctor = user_db.query(User).filter(User.auth_user_id == 5006).one()
+        assert sorted(role.name for role in doctor.roles) == ["DOCTOR", "PATIENT"]
+        assert [event.auth_user_id for event in published] == [5001, 5006]
+        assert all(isinstance(event, UserCreated) and event.created_by == 42 for event in published)
+
+
+class TestAuthServiceClient:
+    """Тесты общего HTTP-клиента Auth Service на ASGI-заглушке"""
+
+    @pytest.fixture
+    def fake_auth(self):
+        """Заглушка Auth Service, записывающая вызовы"""
+        app = FastAPI()
+        app.state.calls = []
+
+        @app.post("/users/{auth_user_id}/block")
+        async def block(auth_user_id: int, body: dict):
+            app.state.calls.append(("block", auth_user_id, body["reason"]))
+            return {"status": "blocked"}
+
+        @app.post("/users/{auth_user_id}/restore")
+        async def restore(auth_user_id: int):
+            app.state.calls.append(("restore", auth_user_id))
+            return {"status": "restored"}
+
+        return app
+
+    async def test_calls_share_one_client(self, fake_auth):
+        """Все вызовы идут через один клиент пула"""
+        pool = AuthHttpPool()
+        pool.start(transport=httpx.ASGITransport(app=fake_auth))
+        client = AuthServiceClient(base_url="http://auth", http=pool)
+        shared = pool.client
+
+        assert await client.block_user(7, reason="spam") is True
+        assert await client.restore_user(7) is True
+        assert await client.update_user_roles(7, ["DOCTOR"]) is False  # нет такого endpoint
+
+        assert pool.client is shared
+        assert fake_auth.state.calls == [("block", 7, "spam"), ("restore", 7)]
+        assert auth_client_requests.value(method="POST", path="/users/{id}/roles", outcome="4xx") >= 1
+        assert pool.stats()["requests"] == 3
+        await pool.close()
+
+    def test_client_per_event_loop(self, fake_auth):
+        """Каждый цикл событий (asyncio.run в скриптах) получает свой клиент"""
+        pool = AuthHttpPool()
+        pool.start(transport=httpx.ASGITransport(app=fake_auth))
+        client = AuthServiceClient(base_url="http://auth", http=pool)
+
+        async def call(auth_user_id):
+            assert await client.restore_user(auth_user_id) is True
+            return pool.client
+
+        first, second = asyncio.run(call(1)), asyncio.run(call(2))
+        assert first is not second
+        assert fake_auth.state.calls == [("restore", 1), ("restore", 2)]
+        assert len(pool._clients) == 1  # клиент завершенного цикла забыт
+
+    async def test_client_recreated_after_close(self, fake_auth):
+        """После закрытия клиент создается заново при первом вызове"""
+        pool = AuthHttpPool()
+        pool.start(transport=httpx.ASGITransport(app=fake_auth))
+        await pool.close()
+        assert await AuthServiceClient(base_url="http://auth", http=pool).restore_user(1) is True
+        await pool.close()
+
+
+class FakeAuthClient:
+    """Заглушка AuthServiceClient с управляемыми отказами"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    async def block_user(self, auth_user_id, reason=None):
+        self.calls.append(("block", auth_user_id, reason))
+        return not self.fail
+
+    async def restore_user(self, auth_user_id):
+        self.calls.append(("restore", auth_user_id))
+        return not self.fail
+
+    async def update_user_roles(self, auth_user_id, roles):
+        self.calls.append(("update_roles", auth_user_id, roles))
+        return not self.fail
+
+
+class TestAuthSyncOutbox:
+    """Тесты outbox синхронизации с Auth Service"""
+
+    @staticmethod
+    def make_dispatcher(user_db, auth_client, **kwargs):
+        return AuthSyncDispatcher(
+            session_factory=sessionmaker(bind=user_db.get_bind()),
+            auth_client=auth_client,
+            **kwargs
+        )
+
+    async def test_pending_changes_coalesced_per_user(self, user_db):
+        """Из нескольких изменений пользователя отправляется только последнее"""
+        outbox = OutboxRepository(user_db)
+        outbox.add(1, OUTBOX_BLOCK, {"reason": "first"})
+        outbox.add(1, OUTBOX_RESTORE)
+        outbox.add(1, OUTBOX_UPDATE_ROLES, {"roles": ["DOCTOR"]})
+        outbox.add(1, OUTBOX_BLOCK, {"reason": "last"})
+        outbox.add(2, OUTBOX_RESTORE)
+        user_db.commit()
+        auth_client = FakeAuthClient()
+        dispatcher = self.make_dispatcher(user_db, auth_client)
+
+        assert await dispatcher.dispatch_once() == 5
+
+        assert sorted(auth_client.calls, key=str) == sorted([
+            ("block", 1, "last"),
+            ("update_roles", 1, ["DOCTOR"]),
+            ("restore", 2),
+        ], key=str)
+        assert OutboxRepository(user_db).count_by_status() == {
+            "pending": 0, "claimed": 0, "sent": 3, "coalesced": 2, "dead": 0
+        }
+        assert await dispatcher.dispatch_once() == 0
+
+    async def test_failed_delivery_backs_off_then_gives_up(self, user_db):
+        """Неудачная отправка откладывается, после лимита попыток - dead"""
+        OutboxRepository(user_db).add(1, OUTBOX_RESTORE)
+        user_db.commit()
+        dispatcher = self.make_dispatcher(user_db, FakeAuthClient(fail=True), max_attempts=2)
+
+        await dispatcher.dispatch_once()
+        message = user_db.query(OutboxMessage).one()
+        user_db.refresh(message)
+        assert (message.status, message.attempts) == ("pending", 1)
+        assert message.next_attempt_at > datetime.utcnow()
+        assert await dispatcher.dispatch_once() == 0  # еще не пора
+
+        message.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        user_db.commit()
+        await dispatcher.dispatch_once()
+        user_db.refresh(message)
+        assert message.status == "dead"
+
+    async def test_claim_committed_before_http_call(self, user_db):
+        """Во время вызова Auth Service сообщение уже захвачено и транзакция закрыта"""
+        OutboxRepository(user_db).add(1, OUTBOX_RESTORE)
+        user_db.commit()
+        observed = []
+
+        class ObservingAuthClient(FakeAuthClient):
+            async def restore_user(self, auth_user_id):
+                # Отдельная сессия видит зафиксированный захват; повторно сообщение не выбирается
+                observed.append(OutboxRepository(user_db).count_by_status()["claimed"])
+                observed.append(await other.dispatch_once())
+                return await super().restore_user(auth_user_id)
+
+        dispatcher = self.make_dispatcher(user_db, ObservingAuthClient())
+        other = self.make_dispatcher(user_db, FakeAuthClient())
+        assert await dispatcher.dispatch_once() == 1
+        assert observed == [1, 0]
+        assert OutboxRepository(user_db).count_by_status()["sent"] == 1
+
+    async def test_expired_claim_picked_up_again(self, user_db):
+        """Захват упавшего диспетчера истекает, и сообщение отправляется снова"""
+        outbox = OutboxRepository(user_db)
+        message = outbox.add(1, OUTBOX_RESTORE)
+        user_db.commit()
+        outbox.claim([message.id], until=datetime.utcnow() + timedelta(seconds=60))
+        user_db.commit()
+        auth_client = FakeAuthClient()
+        dispatcher = self.make_dispatcher(user_db, auth_client)
+        assert await dispatcher.dispatch_once() == 0
+
+        outbox.claim([message.id], until=datetime.utcnow() - timedelta(seconds=1))
+        user_db.commit()
+        assert await dispatcher.dispatch_once() == 1
+        assert auth_client.calls == [("restore", 1)]
+
+    async def test_newer_message_waits_for_claim_in_flight(self, user_db):
+        """Пока старое сообщение канала отправляется, новое не отправляется параллельно"""
+        outbox = OutboxRepository(user_db)
+        in_flight = outbox.add(1, OUTBOX_BLOCK, {"reason": "old"})
+        user_db.commit()
+        outbox.claim([in_flight.id], until=datetime.utcnow() + timedelta(seconds=60))
+        outbox.add(1, OUTBOX_RESTORE)
+        outbox.add(1, OUTBOX_UPDATE_ROLES, {"roles": ["DOCTOR"]})
+        user_db.commit()
+        auth_client = FakeAuthClient()
+        dispatcher = self.make_dispatcher(user_db, auth_client)
+
+        assert await dispatcher.dispatch_once() == 1
+        assert auth_client.calls == [("update_roles", 1, ["DOCTOR"])]
+
+        outbox.mark([in_flight.id], "sent")
+        user_db.commit()
+        assert await dispatcher.dispatch_once() == 1
+        assert auth_client.calls[-1] == ("restore", 1)
+
+    async def test_finished_messages_purged_after_retention(self, user_db):
+        """Обработанные сообщения старше срока хранения удаляются"""
+        outbox = OutboxRepository(user_db)
+        old, recent, pending = (outbox.add(user_id, OUTBOX_RESTORE) for user_id in (1, 2, 3))
+        user_db.commit()
+        outbox.mark([old.id, recent.id], "sent")
+        user_db.commit()
+        old.processed_at = datetime.utcnow() - timedelta(days=8)
+        user_db.commit()
+        dispatcher = self.make_dispatcher(user_db, FakeAuthClient(), retention_days=7)
+
+        assert await dispatcher.purge_once() == 1
+        assert OutboxRepository(user_db).count_by_status() == {
+            "pending": 1, "claimed": 0, "sent": 1, "coalesced": 0, "dead": 0
+        }
+
+    def test_backoff_grows_and_is_capped(self):
+        """Задержка растет экспоненциально и ограничена сверху"""
+        dispatcher = AuthSyncDispatcher(auth_client=FakeAuthClient(), backoff_base=1.0, backoff_max=10.0)
+        assert 0.5 <= dispatcher.backoff(0) <= 1.0
+        assert 4.0 <= dispatcher.backoff(3) <= 8.0
+        assert dispatcher.backoff(20) <= 10.0
+
+
+def make_blocked_event(user_id=1):
+    return UserBlocked(
+        event_id=f"event-{user_id}",
+        occurred_at=datetime(2024, 1, 1),
+        aggregate_id=user_id,
+        blocked_by=None
+    )
+
+
+class TestAsyncEventBus:
+    """Тесты асинхронной доставки доменных событий"""
+
+    def test_sync_mode_runs_handlers_in_publisher(self):
+        """Без запуска воркеров обработчики выполняются сразу"""
+        bus = EventBus()
+        handled = []
+        bus.subscribe(UserBlocked, handled.append)
+        bus.publish(make_blocked_event())
+        assert len(handled) == 1
+        assert bus.stats()["mode"] == "sync"
+
+    async def test_slow_handler_leaves_request_path(self):
+        """Медленный обработчик не задерживает publish, inline - выполняется сразу"""
+        bus = EventBus()
+        inline, queued = [], []
+
+        async def slow_handler(event):
+            await asyncio.sleep(0.05)
+            queued.append(event.aggregate_id)
+
+        bus.subscribe(UserBlocked, slow_handler)
+        bus.subscribe(UserBlocked, lambda event: inline.append(event.aggregate_id), inline=True)
+        bus.start_async(queue_size=10, workers=2)
+
+        started = time.perf_counter()
+        bus.publish_many([make_blocked_event(1), make_blocked_event(2)])
+        assert time.perf_counter() - started < 0.05
+        assert inline == [1, 2] and queued == []
+
+        await bus.stop()
+        assert sorted(queued) == [1, 2]
+        stats = bus.stats()
+        assert stats["mode"] == "sync"
+        assert stats["handlers"]["TestAsyncEventBus.test_slow_handler_leaves_request_path.<locals>.slow_handler"]["count"] == 2
+
+    async def test_handler_timeout_counted(self):
+        """Обработчик, превысивший таймаут, учитывается в счетчиках"""
+        bus = EventBus()
+
+        async def stuck_handler(event):
+            await asyncio.sleep(1)
+
+        bus.subscribe(UserBlocked, stuck_handler)
+        bus.start_async(workers=1, handler_timeout=0.01)
+        bus.publish(make_blocked_event())
+        await bus.stop()
+        [handler_stats] = bus.stats()["handlers"].values()
+        assert handler_stats["timeouts"] == 1
+
+    async def test_drop_oldest_overflow(self):
+        """При переполнении отбрасываются самые старые события"""
+        bus = EventBus()
+        bus.subscribe(UserBlocked, lambda event: None)
+        bus.start_async(queue_size=1, workers=0, overflow="drop_oldest")
+        for user_id in range(3):
+            bus.publish(make_blocked_event(user_id))
+        assert bus._queue.get_nowait().aggregate_id == 2
+        bus._queue.task_done()
+        assert bus.stats()["dropped"] == 2
+        await bus.stop()
+
+    async def test_inline_overflow(self):
+        """При переполнении обработчики выполняются в публикующем потоке"""
+        bus = EventBus()
+        handled = []
+        bus.subscribe(UserBlocked, lambda event: handled.append((event.aggregate_id, threading.get_ident())))
+        bus.start_async(queue_size=1, workers=0, overflow="inline")
+        bus.publish(make_blocked_event(0))
+        bus.publish(make_blocked_event(1))
+        publisher = await asyncio.to_thread(lambda: bus.publish(make_blocked_event(2)) or threading.get_ident())
+        assert handled == [(1, threading.get_ident()), (2, publisher)]
+        assert bus.stats()["ran_in_publisher"] == 2
+        await bus.stop(drain_timeout=0.01)
+
+    async def test_spill_overflow(self, tmp_path):
+        """Сброшенные на диск события обрабатываются по порядку, раньше более новых"""
+        bus = EventBus()
+        handled = []
+        bus.subscribe(UserBlocked, lambda event: handled.append(event.aggregate_id))
+        bus.start_async(queue_size=1, workers=1, overflow="spill", spill_path=str(tmp_path / "events.spill"))
+        for user_id in range(5):
+            bus.publish(make_blocked_event(user_id))
+        assert bus.stats()["spilled"] == 4
+        await bus.stop()
+        assert handled == [0, 1, 2, 3, 4]
+        assert not (tmp_path / "events.spill").exists()
+
+    async def test_publish_from_thread_after_stop_runs_inline(self):
+        """Публикация из потока, не заметившая остановку шины, выполняется сразу"""
+        bus = EventBus()
+        handled = []
+        bus.subscribe(UserBlocked, lambda event: handled.append(event.aggregate_id))
+        bus.start_async(workers=1)
+        await bus.stop()
+        await asyncio.to_thread(bus._enqueue, make_blocked_event(7))
+        assert handled == [7]
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""ETag helpers for conditional GET"""
+import hashlib
+from typing import Optional
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from version components"""
+    digest = hashlib.blake2b(":".join(str(part) for part in parts).encode("utf-8"), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def profile_etag(user_id: int, version: int, role_ids) -> str:
+    """ETag of a user profile: id, row version and role ids"""
+    return make_etag(user_id, version, ",".join(map(str, sorted(role_ids))))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
@@ -7,6 +7,8 @@ from sqlalchemy.orm import Session
 from user_service.infrastructure.database.database import get_db, settings
 from user_service.infrastructure.repositories.user_repository import UserRepository
 from user_service.infrastructure.http_clients.auth_client import AuthServiceClient
+from user_service.infrastructure.cache.principal_cache import principal_cache
+from user_service.domain.models.principal import Principal
 from user_service.api.schemas import TokenData
 import logging
 
@@ -18,7 +20,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-):
+) -> Principal:
     """Get current user from JWT token"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -26,6 +28,12 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # Tokens already resolved recently skip decoding and the DB lookup
+    cache_key = principal_cache.token_key(token)
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return principal
+    
     # Decode JWT token
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
@@ -35,14 +43,14 @@ async def get_current_user(
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError as e:
-        logger.error(f"JWT decode error: {e}")
+        logger.warning("JWT decode error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Токен невалиден или истек. Получите новый токен в Auth Service.",
             headers={"WWW-Authenticate": "Bearer"},
         )
     except Exception as e:
-        logger.error(f"Unexpected error decoding token: {e}")
+        logger.error("Unexpected error decoding token: %s", e)
         raise credentials_exception
     
     # Get user from User Service by auth_user_id
@@ -52,49 +60,62 @@ async def get_current_user(
     # Try to get auth_user_id from token (Auth Service includes user_id)
     auth_user_id = payload.get("user_id") or payload.get("auth_user_id")
     
-    logger.info(f"Token decoded - username: {username}, user_id: {auth_user_id}, payload keys: {list(payload.keys())}")
+    # Hot path: arguments are formatted only if the record is actually emitted
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Token decoded", extra={"username": username, "auth_user_id": auth_user_id, "claims": sorted(payload)}
+        )
     
     # If user_id is not in token, try to find user by email (fallback)
     if not auth_user_id:
-        logger.warning(f"user_id not found in token payload. Available keys: {list(payload.keys())}")
-        logger.warning(f"Trying to find user by email: {username}")
+        logger.warning("user_id not found in token payload, trying to find user by email: %s", username)
         # Fallback: try to find user by email (assuming username might be email)
         user = user_repo.get_by_email(username)
         if user:
-            logger.info(f"User found by email: {user.id}")
-            return user
+            logger.info("User found by email: %s", user.id)
+            principal = Principal.from_user(user)
+            principal_cache.put(cache_key, principal, payload.get("exp"))
+            return principal
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Пользователь не найден в User Service. Создайте пользователя с auth_user_id из Auth Service.",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    not_found_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=f"Пользователь с auth_user_id={auth_user_id} не найден в User Service. Создайте пользователя в User Service.",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if principal_cache.is_known_missing(auth_user_id):
+        raise not_found_exception
+    
     # Get user from User Service by auth_user_id
     try:
         user = user_repo.get_by_auth_user_id(auth_user_id)
         if user is None:
-            logger.warning(f"User not found in User Service with auth_user_id: {auth_user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Пользователь с auth_user_id={auth_user_id} не найден в User Service. Создайте пользователя в User Service.",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        logger.info(f"User found: {user.id}, email: {user.email}, roles: {[r.name for r in user.roles]}")
+            logger.warning("User not found in User Service with auth_user_id: %s", auth_user_id)
+            principal_cache.put_missing(auth_user_id)
+            raise not_found_exception
+        principal = Principal.from_user(user)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("User resolved", extra={"user_id": user.id, "roles": sorted(principal.role_names)})
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting user from repository: {e}", exc_info=True)
+        logger.error("Error getting user from repository: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при получении пользователя: {str(e)}"
         )
     
-    return user
+    principal_cache.put(cache_key, principal, payload.get("exp"))
+    return principal
 
 
 async def get_current_active_user(
-    current_user = Depends(get_current_user)
-):
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Get current active (non-blocked) user"""
     if current_user.is_blocked:
         raise HTTPException(
@@ -127,14 +148,14 @@ async def get_auth_user_id_from_token(
             )
         return int(auth_user_id)
     except JWTError as e:
-        logger.error(f"JWT decode error: {e}")
+        logger.warning("JWT decode error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Токен невалиден или истек. Получите новый токен в Auth Service.",
             headers={"WWW-Authenticate": "Bearer"},
         )
     except Exception as e:
-        logger.error(f"Unexpected error decoding token: {e}")
+        logger.error("Unexpected error decoding token: %s", e)
         raise credentials_exception
 
 
@@ -0,0 +1,50 @@
+"""Request latency and concurrency metrics"""
+import time
+from user_service.infrastructure.metrics.registry import metrics_registry
+
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+http_requests_in_flight = metrics_registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request
+
+    Requests are labelled with the matched route template (``/users/{user_id}``)
+    rather than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
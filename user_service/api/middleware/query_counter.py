@@ -0,0 +1,41 @@
+"""Per-request SQL query budget reporting"""
+import logging
+from user_service.infrastructure.database.query_counter import track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounterMiddleware:
+    """Pure ASGI middleware reporting the SQL cost of each request
+
+    Adds ``Server-Timing: db;dur=<ms>;desc="<n> queries"`` to responses and
+    logs a warning when one statement repeats ``n_plus_one_threshold`` times,
+    the usual sign of a lazy load inside a loop. Statements executed after
+    the response has started (streaming bodies) are not reported.
+    """
+
+    def __init__(self, app, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    timing = f'db;dur={stats.total_seconds * 1000:.1f};desc="{stats.count} queries"'
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1"))
+                    ]
+                    for statement, times in stats.repeated(self.n_plus_one_threshold):
+                        route = scope.get("route")
+                        logger.warning(
+                            "Possible N+1 in %s %s: statement ran %d times: %s",
+                            scope["method"], getattr(route, "path", scope["path"]), times, statement,
+                        )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -1,15 +1,29 @@
 """User management routes"""
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Iterator, List, Optional, Literal
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from user_service.infrastructure.database.database import get_db
-from user_service.infrastructure.repositories.user_repository import UserRepository
+from user_service.infrastructure.database.database import SessionLocal, get_db
+from user_service.infrastructure.repositories.user_repository import (
+    UserRepository,
+    COUNT_EXACT,
+    EXPORT_COLUMNS,
+)
+from user_service.infrastructure.repositories.pagination import InvalidCursor, decode_cursor, encode_cursor
+from user_service.infrastructure.cache.roster_cache import roster_cache
+from user_service.infrastructure.cache.etag_cache import profile_etag_cache
 from user_service.application.use_cases.create_user import CreateUserUseCase
 from user_service.application.use_cases.update_user import UpdateUserUseCase
 from user_service.application.use_cases.update_roles import UpdateUserRolesUseCase
 from user_service.application.use_cases.assign_doctor import AssignDoctorUseCase
 from user_service.application.use_cases.block_user import BlockUserUseCase
 from user_service.application.use_cases.restore_user import RestoreUserUseCase
+from user_service.application.use_cases.bulk_import_users import BulkImportUsersUseCase
+from user_service.application.use_cases.bulk_assign_doctor import BulkAssignDoctorUseCase
+from user_service.api.streaming import LineTooLong, encode_csv, encode_ndjson, iter_ndjson_lines
+from user_service.api.serialization import FastJSONResponse
+from user_service.api.etag import etag_matches, profile_etag
 from user_service.api.middleware.auth import (
     get_current_active_user,
     require_admin,
@@ -22,11 +36,15 @@ from user_service.api.schemas import (
     UserUpdate,
     UserResponse,
     UserListResponse,
+    DoctorPatientsResponse,
+    BulkImportResponse,
     RoleUpdate,
     AssignDoctorRequest,
+    BulkAssignDoctorRequest,
+    BulkAssignDoctorResponse,
     BlockUserRequest
 )
-from user_service.domain.models.user import User
+from user_service.domain.models.principal import Principal
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -68,7 +86,7 @@ async def register_self(
 async def create_user(
     user_data: UserCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Create a new user (Admin only)
     
@@ -80,14 +98,112 @@ async def create_user(
     return user
 
 
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_users(
+    request: Request,
+    batch_size: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
+):
+    """Bulk import users from an NDJSON body (Admin only)
+    
+    One UserCreate object per line. The body is read as a stream and
+    inserted in batches; invalid rows are reported by line number and
+    do not stop the import.
+    """
+    use_case = BulkImportUsersUseCase(db)
+    batch = []
+    try:
+        async for line in iter_ndjson_lines(request.stream()):
+            batch.append(line)
+            if len(batch) >= batch_size:
+                await run_in_threadpool(use_case.import_batch, batch, current_user.id)
+                batch = []
+    except LineTooLong as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    if batch:
+        await run_in_threadpool(use_case.import_batch, batch, current_user.id)
+    return use_case.result()
+
+
+@router.get("/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    role: Optional[str] = Query(None),
+    is_blocked: Optional[bool] = Query(None),
+    search: Optional[str] = Query(None),
+    current_user: Principal = Depends(require_admin)
+):
+    """Export users matching the filters as NDJSON or CSV (Admin only)
+    
+    Rows are streamed from a server-side cursor, so memory use does not
+    depend on the table size. In CSV, text cells that a spreadsheet would
+    evaluate as a formula get a leading ``'``; numbers and phone numbers
+    such as ``+7 900 123-45-67`` are written unchanged.
+    """
+    chunks = _export_chunks(role=role, is_blocked=is_blocked, search=search)
+    if format == "csv":
+        body = encode_csv(chunks, EXPORT_COLUMNS + ("roles",))
+        media_type = "text/csv; charset=utf-8"
+    else:
+        body = encode_ndjson(chunks)
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+    )
+
+
+def _export_chunks(**filters) -> Iterator[List[dict]]:
+    """Export rows on a session owned by the response body
+    
+    The body is streamed after the endpoint returns, when the ``get_db``
+    session may already be closed (FastAPI before 0.118).
+    """
+    db = SessionLocal()
+    try:
+        yield from UserRepository(db).iter_export_rows(**filters)
+    finally:
+        db.close()
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    """Get user by ID (self or admin)"""
+    """Get user by ID (self or admin)
+
+    Supports conditional GET: a matching ``If-None-Match`` is answered with
+    304 from the cached ETag, or from a light version query that does not
+    load the roles.
+    """
+    # Users can only view their own profile unless they are admin
+    if user_id != current_user.id and not current_user.is_admin():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
     user_repo = UserRepository(db)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etag = profile_etag_cache.get(user_id)
+        if etag is None:
+            version = user_repo.get_profile_version(user_id)
+            if version is not None:
+                etag = profile_etag(user_id, *version)
+                profile_etag_cache.put(user_id, etag)
+        if etag is not None and etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
     user = user_repo.get_by_id(user_id)
     
     if not user:
@@ -96,13 +212,9 @@ async def get_user(
             detail="User not found"
         )
     
-    # Users can only view their own profile unless they are admin
-    if user_id != current_user.id and not current_user.is_admin():
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
+    etag = profile_etag(user_id, user.version, [role.id for role in user.roles])
+    profile_etag_cache.put(user_id, etag)
+    response.headers["ETag"] = etag
     return user
 
 
@@ -113,27 +225,62 @@ async def list_users(
     role: Optional[str] = Query(None),
     is_blocked: Optional[bool] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from next_cursor; switches to keyset pagination and ignores page"
+    ),
+    count: Optional[Literal["exact", "cached", "estimate"]] = Query(
+        None,
+        description="How to compute total: exact (default in offset mode), cached or estimate"
+    ),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """List users with filters (Admin only)"""
     user_repo = UserRepository(db)
+    filters = {"role": role, "is_blocked": is_blocked, "search": search}
+    
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        users, has_more = user_repo.list_user_rows_after(after=after, limit=page_size, **filters)
+        total, total_exact = None, True
+        if count is not None:
+            total, total_exact = user_repo.count_users(strategy=count, **filters)
+        # Rows are already shaped like UserListResponse: encode them directly
+        return FastJSONResponse({
+            "users": users,
+            "total": total,
+            "total_exact": total_exact,
+            "page": None,
+            "page_size": page_size,
+            "next_cursor": encode_cursor(users[-1]["created_at"], users[-1]["id"]) if has_more else None,
+        })
+    
     skip = (page - 1) * page_size
     
-    users, total = user_repo.list_users(
-        skip=skip,
-        limit=page_size,
-        role=role,
-        is_blocked=is_blocked,
-        search=search
-    )
+    total, total_exact = user_repo.count_users(strategy=count or COUNT_EXACT, **filters)
+    # One extra row tells whether another page follows
+    users = user_repo.page_user_rows(skip=skip, limit=page_size + 1, **filters)
+    has_more = len(users) > page_size
+    users = users[:page_size]
     
-    return UserListResponse(
-        users=users,
-        total=total,
-        page=page,
-        page_size=page_size
-    )
+    # Offset pages also return a cursor so clients can switch to keyset paging;
+    # search results are ranked by relevance, which a created_at/id cursor cannot resume
+    has_more = has_more and not search
+    return FastJSONResponse({
+        "users": users,
+        "total": total,
+        "total_exact": total_exact,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": encode_cursor(users[-1]["created_at"], users[-1]["id"]) if has_more else None,
+    })
 
 
 @router.patch("/{user_id}", response_model=UserResponse)
@@ -141,7 +288,7 @@ async def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Update user data (self or admin)"""
     # Users can only update their own profile unless they are admin
@@ -161,7 +308,7 @@ async def update_user_roles(
     user_id: int,
     role_data: RoleUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Update user roles (Admin only)"""
     use_case = UpdateUserRolesUseCase(db)
@@ -169,16 +316,101 @@ async def update_user_roles(
     return user
 
 
+@router.post("/assign-doctor/bulk", response_model=BulkAssignDoctorResponse)
+async def bulk_assign_doctor(
+    request: BulkAssignDoctorRequest,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
+):
+    """Assign a doctor to many patients in one transaction (Admin only)"""
+    if (request.patient_ids is None) == (request.from_doctor_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Specify either patient_ids or from_doctor_id"
+        )
+    use_case = BulkAssignDoctorUseCase(db)
+    return use_case.execute(
+        request.doctor_id,
+        assigned_by=current_user.id,
+        patient_ids=request.patient_ids,
+        from_doctor_id=request.from_doctor_id
+    )
+
+
+@router.get("/{doctor_id}/patients", response_model=DoctorPatientsResponse)
+async def list_doctor_patients(
+    doctor_id: int,
+    page_size: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_doctor_or_admin)
+):
+    """List unblocked patients of a doctor (the doctor themself or Admin)"""
+    is_own_roster = current_user.id == doctor_id and current_user.is_doctor()
+    if not is_own_roster and not current_user.is_admin():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    try:
+        after = decode_cursor(cursor) if cursor is not None else None
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    user_repo = UserRepository(db)
+    if not is_own_roster:
+        doctor = user_repo.get_by_id(doctor_id)
+        if not doctor or not doctor.is_doctor():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Doctor not found"
+            )
+    
+    page_key = ("page", cursor, page_size)
+    page = roster_cache.get(doctor_id, page_key)
+    if page is None:
+        patients, has_more = user_repo.list_patients_after(doctor_id, after=after, limit=page_size)
+        page = (patients, encode_cursor(patients[-1]["created_at"], patients[-1]["id"]) if has_more else None)
+        roster_cache.put(doctor_id, page_key, page, patient_ids=[patient["id"] for patient in patients])
+    
+    total = roster_cache.get(doctor_id, "count")
+    if total is None:
+        total = user_repo.count_patients(doctor_id)
+        roster_cache.put(doctor_id, "count", total)
+    
+    patients, next_cursor = page
+    return FastJSONResponse({
+        "doctor_id": doctor_id,
+        "patients": patients,
+        "total": total,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+    })
+
+
 @router.post("/{patient_id}/assign-doctor", response_model=UserResponse)
 async def assign_doctor(
     patient_id: int,
     request: AssignDoctorRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_doctor_or_admin)
+    current_user: Principal = Depends(require_doctor_or_admin)
 ):
-    """Assign a doctor to a patient (Doctor or Admin)"""
+    """Assign a doctor to a patient (Doctor or Admin)
+    
+    Without doctor_id the doctor with the fewest active patients is picked,
+    optionally among doctors with the given specialty.
+    """
     use_case = AssignDoctorUseCase(db)
-    patient = use_case.execute(patient_id, request.doctor_id, assigned_by=current_user.id)
+    patient = use_case.execute(
+        patient_id,
+        request.doctor_id,
+        assigned_by=current_user.id,
+        specialty=request.specialty
+    )
     return patient
 
 
@@ -187,7 +419,7 @@ async def block_user(
     user_id: int,
     block_data: BlockUserRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Block a user (Admin only)"""
     use_case = BlockUserUseCase(db)
@@ -199,7 +431,7 @@ async def block_user(
 async def restore_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Restore user access (Admin only)"""
     use_case = RestoreUserUseCase(db)
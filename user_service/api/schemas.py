@@ -1,7 +1,7 @@
 """Pydantic schemas for User Service API"""
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Optional, List
 
 
 class UserBase(BaseModel):
@@ -31,6 +31,7 @@ class UserUpdate(BaseModel):
     middle_name: Optional[str] = Field(None, max_length=100)
     phone: Optional[str] = Field(None, max_length=20)
     email: Optional[EmailStr] = None
+    specialty: Optional[str] = Field(None, max_length=100, description="Doctor specialty tag")
 
 
 class RoleResponse(BaseModel):
@@ -49,6 +50,7 @@ class UserResponse(UserBase):
     is_blocked: bool
     roles: List[RoleResponse] = []
     assigned_doctor_id: Optional[int] = None
+    specialty: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     blocked_at: Optional[datetime] = None
@@ -59,9 +61,34 @@ class UserResponse(UserBase):
 class UserListResponse(BaseModel):
     """Response schema for user list"""
     users: List[UserResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # Not computed in cursor mode unless ?count= is given
+    total_exact: bool = True  # False for cached or planner-estimated totals
+    page: Optional[int] = None  # Only set in offset mode
     page_size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+
+
+class DoctorPatientsResponse(BaseModel):
+    """Response schema for a doctor's patient roster"""
+    doctor_id: int
+    patients: List[UserResponse]
+    total: int  # Unblocked patients of the doctor
+    page_size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+
+
+class BulkImportError(BaseModel):
+    """Rejected NDJSON row"""
+    line: int
+    detail: Any
+
+
+class BulkImportResponse(BaseModel):
+    """Schema for bulk import summary"""
+    created: int
+    failed: int
+    errors: List[BulkImportError]
+    errors_truncated: bool = False  # Only the first errors are listed
 
 
 class RoleUpdate(BaseModel):
@@ -71,7 +98,35 @@ class RoleUpdate(BaseModel):
 
 class AssignDoctorRequest(BaseModel):
     """Schema for assigning a doctor to a patient"""
+    doctor_id: Optional[int] = Field(
+        None,
+        description="ID of the doctor to assign; omit to pick the least-loaded doctor"
+    )
+    specialty: Optional[str] = Field(None, description="Only with auto-assignment: required doctor specialty")
+
+
+class BulkAssignDoctorRequest(BaseModel):
+    """Schema for assigning a doctor to many patients"""
     doctor_id: int = Field(..., description="ID of the doctor to assign")
+    patient_ids: Optional[List[int]] = Field(None, max_length=10000, description="Patients to assign")
+    from_doctor_id: Optional[int] = Field(
+        None,
+        description="Instead of patient_ids: move all patients of this doctor"
+    )
+
+
+class SkippedPatient(BaseModel):
+    """Patient left out of a bulk assignment"""
+    patient_id: int
+    detail: str
+
+
+class BulkAssignDoctorResponse(BaseModel):
+    """Schema for bulk assignment summary"""
+    doctor_id: int
+    assigned: int
+    unchanged: int  # Already assigned to the doctor
+    skipped: List[SkippedPatient]
 
 
 class BlockUserRequest(BaseModel):
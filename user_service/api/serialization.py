@@ -0,0 +1,38 @@
+"""Fast JSON serialization for API responses
+
+List endpoints encode plain row dicts straight to JSON bytes, with no
+pydantic models at all. orjson is optional: without it rows are encoded
+with the standard library.
+"""
+import json
+from datetime import datetime
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        # Same format as pydantic: UTC offsets are written as "Z"
+        return value.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode plain Python data (dicts, lists, datetimes) to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by ``dumps`` (orjson if installed); bytes are sent as they are"""
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
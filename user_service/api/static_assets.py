@@ -0,0 +1,158 @@
+"""Precompressed in-memory static file serving"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from user_service.api.etag import etag_matches
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Preferred order when the client accepts several encodings equally
+ENCODINGS = ("br", "gzip", "identity")
+
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 256
+
+
+@dataclass
+class StaticAsset:
+    """One file with its precompressed variants"""
+    media_type: str
+    digest: str
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: str) -> str:
+        # Strong ETags must differ between encodings of the same content
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.digest}{suffix}"'
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}"""
+    accepted: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: Optional[str], available) -> str:
+    """Best available content coding for an Accept-Encoding header"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*")
+    identity_q = accepted.get("identity", wildcard if wildcard is not None else 1.0)
+    best, best_q = "identity", 0.0
+    for encoding in ENCODINGS[:-1]:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best if best_q > 0 and best_q >= identity_q else "identity"
+
+
+class StaticAssets:
+    """ASGI app serving a directory from memory
+
+    Files are read and compressed once (gzip, and brotli when installed), so
+    requests cost a dict lookup. Responses carry content-hashed ETags and
+    negotiate ``Accept-Encoding``; HTML is revalidated on every use
+    (``no-cache``), other assets are cached for ``max_age`` seconds.
+    """
+
+    def __init__(self, directory: str, max_age: int = 3600, min_compress_size: int = MIN_COMPRESS_SIZE):
+        self.directory = directory
+        self.max_age = max_age
+        self.min_compress_size = min_compress_size
+        self._assets: Optional[Dict[str, StaticAsset]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read and precompress every file under the directory"""
+        assets: Dict[str, StaticAsset] = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path, "rb") as asset_file:
+                    content = asset_file.read()
+                relative = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                assets[relative] = self._build(relative, content)
+        with self._lock:
+            self._assets = assets
+
+    def _build(self, name: str, content: bytes) -> StaticAsset:
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        asset = StaticAsset(media_type, hashlib.blake2b(content, digest_size=12).hexdigest())
+        asset.variants["identity"] = content
+        if len(content) >= self.min_compress_size:
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < len(content):
+                asset.variants["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(content, quality=11)
+                if len(compressed) < len(content):
+                    asset.variants["br"] = compressed
+        return asset
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """Asset by path relative to the directory (loaded on first use)"""
+        if self._assets is None:
+            self.load()
+        return self._assets.get(path.lstrip("/"))
+
+    def response(self, path: str, request: Request) -> Response:
+        """Negotiated response for an asset (304 on a matching ETag)"""
+        asset = self.get(path)
+        if asset is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        encoding = choose_encoding(request.headers.get("accept-encoding"), asset.variants)
+        etag = asset.etag(encoding)
+        cache_control = "no-cache" if asset.media_type.startswith("text/html") else f"public, max-age={self.max_age}"
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        body = asset.variants[encoding]
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(body, media_type=asset.media_type, headers=headers)
+
+    def stats(self) -> dict:
+        """Number of files and bytes held per encoding"""
+        assets = self._assets or {}
+        sizes: Dict[str, int] = {}
+        for asset in assets.values():
+            for encoding, body in asset.variants.items():
+                sizes[encoding] = sizes.get(encoding, 0) + len(body)
+        return {"files": len(assets), "bytes": sizes}
+
+    async def __call__(self, scope, receive, send) -> None:
+        request = Request(scope, receive)
+        if request.method not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        else:
+            # Under a Mount the matched prefix is part of root_path
+            response = self.response(scope["path"][len(scope.get("root_path", "")):], request)
+        await response(scope, receive, send)
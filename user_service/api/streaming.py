@@ -0,0 +1,86 @@
+"""Helpers for streamed request and response bodies"""
+import csv
+import io
+import json
+import re
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Sequence, Tuple
+
+# Longest accepted NDJSON line (one user profile is well under 1 KB)
+MAX_LINE_BYTES = 64 * 1024
+
+
+class LineTooLong(ValueError):
+    """NDJSON line exceeds MAX_LINE_BYTES"""
+
+
+async def iter_ndjson_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split a streamed body into (line_number, line) pairs, skipping blank lines"""
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise LineTooLong(f"Line {line_number + 1} exceeds {MAX_LINE_BYTES} bytes")
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_ndjson(chunks: Iterable[List[dict]]) -> Iterator[bytes]:
+    """One JSON object per line, one body chunk per row chunk"""
+    for rows in chunks:
+        yield "".join(
+            json.dumps(row, ensure_ascii=False, default=_json_default) + "\n" for row in rows
+        ).encode("utf-8")
+
+
+# Cells starting with these are evaluated as formulas by spreadsheet applications
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+# Signed numbers and phone numbers: no formula can be built from these characters
+_PLAIN_NUMBER = re.compile(r"[+-]?[\d\s().-]*\d[\d\s().-]*")
+
+
+def csv_safe(value: str) -> str:
+    """Neutralize spreadsheet formulas in user-supplied text (CSV injection)"""
+    if value.startswith(FORMULA_PREFIXES) and not _PLAIN_NUMBER.fullmatch(value):
+        return "'" + value
+    return value
+
+
+def encode_csv(chunks: Iterable[List[dict]], columns: Sequence[str]) -> Iterator[bytes]:
+    """CSV with a header row; list values are joined with ';'
+
+    Text cells that would start a formula are prefixed with ``'``, except
+    plain numbers and phone numbers.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in chunks:
+        for row in rows:
+            writer.writerow([
+                csv_safe(";".join(value)) if isinstance(value, list)
+                else value.isoformat() if isinstance(value, datetime)
+                else "" if value is None
+                else csv_safe(value) if isinstance(value, str)
+                else value
+                for value in (row[column] for column in columns)
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
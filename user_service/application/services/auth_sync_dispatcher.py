@@ -0,0 +1,249 @@
+"""Background dispatcher draining the Auth Service outbox"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional
+from sqlalchemy.orm import Session
+from user_service.domain.models.outbox import (
+    OUTBOX_BLOCK,
+    OUTBOX_RESTORE,
+    OUTBOX_UPDATE_ROLES,
+    OUTBOX_SENT,
+    OUTBOX_COALESCED,
+    OUTBOX_DEAD,
+)
+from user_service.infrastructure.database.database import SessionLocal, settings
+from user_service.infrastructure.http_clients.auth_client import AuthServiceClient
+from user_service.infrastructure.repositories.outbox_repository import OutboxRepository
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimedMessage(NamedTuple):
+    """Outbox message fields read inside the claim transaction"""
+    id: int
+    auth_user_id: int
+    operation: str
+    payload: dict
+    attempts: int
+
+
+class AuthSyncDispatcher:
+    """Sends outbox messages to the Auth Service in batches
+    
+    Per user only the newest pending message of each channel (access,
+    roles) is sent; older ones are marked coalesced. Failed calls are
+    retried with exponential backoff and jitter until ``max_attempts``.
+    Claimed messages are leased for ``lease_seconds``, which must outlast
+    the Auth Service calls of a batch. Finished messages are deleted
+    ``retention_days`` after processing, checked every ``purge_interval``.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        auth_client: Optional[AuthServiceClient] = None,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_attempts: int = 10,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+        lease_seconds: float = 60.0,
+        retention_days: float = 7.0,
+        purge_interval: float = 3600.0
+    ):
+        self.session_factory = session_factory
+        self.auth_client = auth_client or AuthServiceClient()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.retention_days = retention_days
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stats = {"sent": 0, "coalesced": 0, "retried": 0, "dead": 0, "batches": 0, "purged": 0}
+    
+    def start(self) -> None:
+        """Start the dispatch loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="auth-sync-dispatcher")
+    
+    async def stop(self) -> None:
+        """Stop the dispatch loop; undelivered messages stay in the outbox"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    def notify(self) -> None:
+        """Wake the loop up after a message was committed"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    def stats(self) -> dict:
+        """Dispatch counters"""
+        return dict(self._stats, running=self._task is not None and not self._task.done())
+    
+    def backoff(self, attempts: int) -> float:
+        """Delay before the next attempt (exponential with jitter)"""
+        delay = min(self.backoff_base * 2 ** attempts, self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+    
+    async def dispatch_once(self) -> int:
+        """Process one batch of due messages; returns the number sent or coalesced
+        
+        Messages are claimed and the claim is committed before any Auth
+        Service call, so no row lock or transaction stays open during HTTP.
+        Claims of a dispatcher that died mid-batch expire after the lease.
+        A user's channel with a claim in flight (possibly on another
+        instance) is left pending until that claim resolves, so calls for
+        the same user and channel never overlap.
+        """
+        db = self.session_factory()
+        try:
+            outbox = OutboxRepository(db)
+            
+            def claim():
+                messages = outbox.fetch_due(self.batch_size)
+                if not messages:
+                    db.rollback()
+                    return [], []
+                auth_user_ids = {message.auth_user_id for message in messages}
+                latest = outbox.latest_pending_ids(auth_user_ids)
+                in_flight = outbox.claimed_channels(auth_user_ids)
+                to_send: List[ClaimedMessage] = []
+                coalesced: List[int] = []
+                for message in messages:
+                    key = (message.auth_user_id, message.channel)
+                    if latest.get(key) != message.id:
+                        coalesced.append(message.id)
+                    elif key not in in_flight:
+                        to_send.append(ClaimedMessage(
+                            message.id, message.auth_user_id, message.operation, message.payload or {}, message.attempts
+                        ))
+                outbox.mark(coalesced, OUTBOX_COALESCED)
+                outbox.claim(
+                    [message.id for message in to_send],
+                    until=datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+                )
+                db.commit()
+                return to_send, coalesced
+            
+            to_send, coalesced = await asyncio.to_thread(claim)
+            if not to_send and not coalesced:
+                return 0
+            
+            # One message per user and channel, so sending concurrently keeps order
+            results = await asyncio.gather(*(self._send(message) for message in to_send))
+            
+            sent: List[int] = []
+            dead: List[int] = []
+            retries: List[ClaimedMessage] = []
+            for message, delivered in zip(to_send, results):
+                if delivered:
+                    sent.append(message.id)
+                elif message.attempts + 1 >= self.max_attempts:
+                    dead.append(message.id)
+                else:
+                    retries.append(message)
+            
+            def finish():
+                now = datetime.utcnow()
+                outbox.mark(sent, OUTBOX_SENT)
+                outbox.mark(dead, OUTBOX_DEAD, error="Maximum number of attempts reached")
+                for message in retries:
+                    outbox.retry_later(
+                        message.id,
+                        message.attempts + 1,
+                        "Auth Service call failed",
+                        now + timedelta(seconds=self.backoff(message.attempts))
+                    )
+                db.commit()
+            
+            await asyncio.to_thread(finish)
+            for message_id in dead:
+                logger.error(f"Giving up on outbox message {message_id} after {self.max_attempts} attempts")
+            self._stats["sent"] += len(sent)
+            self._stats["coalesced"] += len(coalesced)
+            self._stats["retried"] += len(retries)
+            self._stats["dead"] += len(dead)
+            self._stats["batches"] += 1
+            return len(to_send) + len(coalesced)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    async def purge_once(self) -> int:
+        """Delete finished messages older than the retention period"""
+        db = self.session_factory()
+        try:
+            older_than = datetime.utcnow() - timedelta(days=self.retention_days)
+            purged = await asyncio.to_thread(OutboxRepository(db).purge_finished, older_than)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self._stats["purged"] += purged
+        return purged
+    
+    async def _send(self, message: ClaimedMessage) -> bool:
+        payload = message.payload
+        if message.operation == OUTBOX_BLOCK:
+            return await self.auth_client.block_user(message.auth_user_id, payload.get("reason"))
+        if message.operation == OUTBOX_RESTORE:
+            return await self.auth_client.restore_user(message.auth_user_id)
+        if message.operation == OUTBOX_UPDATE_ROLES:
+            return await self.auth_client.update_user_roles(message.auth_user_id, payload.get("roles", []))
+        logger.error(f"Unknown outbox operation: {message.operation}")
+        return False
+    
+    async def _run(self) -> None:
+        while True:
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + self.purge_interval
+                try:
+                    await self.purge_once()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Outbox purge failed: {e}")
+            try:
+                fetched = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {e}")
+                fetched = 0
+            # A full batch means more messages are probably due
+            if fetched >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+# Global dispatcher instance
+auth_sync_dispatcher = AuthSyncDispatcher(
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval_seconds,
+    max_attempts=settings.outbox_max_attempts,
+    backoff_base=settings.outbox_backoff_base_seconds,
+    backoff_max=settings.outbox_backoff_max_seconds,
+    lease_seconds=settings.outbox_claim_lease_seconds,
+    retention_days=settings.outbox_retention_days,
+)
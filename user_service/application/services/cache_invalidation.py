@@ -0,0 +1,76 @@
+"""Domain event handlers that keep in-process caches consistent"""
+from user_service.domain.events.event_bus import event_bus
+from user_service.domain.events.events import (
+    UserCreated,
+    UserUpdated,
+    UserBlocked,
+    UserAccessRestored,
+    UserRoleChanged,
+    DoctorAssignedToPatient,
+)
+from user_service.infrastructure.cache.principal_cache import principal_cache
+from user_service.infrastructure.cache.count_cache import count_cache
+from user_service.infrastructure.cache.roster_cache import roster_cache
+from user_service.infrastructure.cache.etag_cache import profile_etag_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+_registered = False
+
+
+def evict_principal(event) -> None:
+    """Drop cached principals of the changed user"""
+    principal_cache.evict_user(event.aggregate_id)
+
+
+def forget_missing_principal(event: UserCreated) -> None:
+    """Drop the negative cache entry once the profile exists"""
+    principal_cache.forget_missing(event.auth_user_id)
+
+
+def clear_user_counts(event) -> None:
+    """Drop cached user list totals; any filter may be affected"""
+    count_cache.clear()
+
+
+def invalidate_rosters_on_assignment(event: DoctorAssignedToPatient) -> None:
+    """Drop the rosters of the new and the previous doctor"""
+    roster_cache.invalidate_doctor(event.doctor_id)
+    roster_cache.invalidate_doctor(event.previous_doctor_id)
+
+
+def clear_rosters(event) -> None:
+    """Blocking moves a patient out of (or back into) an unknown doctor's roster"""
+    roster_cache.clear()
+
+
+def invalidate_patient_rosters(event: UserUpdated) -> None:
+    """Drop cached roster pages that show the updated user"""
+    roster_cache.invalidate_patient(event.aggregate_id)
+
+
+def invalidate_profile_etag(event) -> None:
+    """Changed profiles must not be answered with 304"""
+    profile_etag_cache.invalidate(event.aggregate_id)
+
+
+def setup_cache_invalidation() -> None:
+    """Subscribe cache invalidation handlers to the event bus (idempotent)"""
+    global _registered
+    if _registered:
+        return
+    for event_type in (UserBlocked, UserAccessRestored, UserRoleChanged, UserUpdated):
+        event_bus.subscribe(event_type, evict_principal, inline=True)
+    event_bus.subscribe(UserCreated, forget_missing_principal, inline=True)
+    # UserUpdated can change search matches, restore changes is_blocked
+    for event_type in (UserCreated, UserBlocked, UserAccessRestored, UserRoleChanged, UserUpdated):
+        event_bus.subscribe(event_type, clear_user_counts, inline=True)
+    event_bus.subscribe(DoctorAssignedToPatient, invalidate_rosters_on_assignment, inline=True)
+    for event_type in (UserBlocked, UserAccessRestored):
+        event_bus.subscribe(event_type, clear_rosters, inline=True)
+    event_bus.subscribe(UserUpdated, invalidate_patient_rosters, inline=True)
+    for event_type in (UserUpdated, UserRoleChanged, UserBlocked, UserAccessRestored, DoctorAssignedToPatient):
+        event_bus.subscribe(event_type, invalidate_profile_etag, inline=True)
+    _registered = True
+    logger.info("Cache invalidation handlers registered")
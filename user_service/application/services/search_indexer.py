@@ -0,0 +1,36 @@
+"""Domain event handlers that keep the search index up to date"""
+from user_service.domain.events.event_bus import event_bus
+from user_service.domain.events.events import UserCreated, UserUpdated
+from user_service.infrastructure.search import search_backend
+import logging
+
+logger = logging.getLogger(__name__)
+
+_registered = False
+
+
+def index_created_user(event: UserCreated) -> None:
+    """Add a new user to the search index"""
+    search_backend.index_user(event.aggregate_id, {
+        "first_name": event.first_name,
+        "last_name": event.last_name,
+        "middle_name": event.middle_name,
+        "email": event.email,
+        "phone": event.phone,
+    })
+
+
+def index_updated_user(event: UserUpdated) -> None:
+    """Re-index the changed fields of a user"""
+    search_backend.index_user(event.aggregate_id, event.updated_fields)
+
+
+def setup_search_indexing() -> None:
+    """Subscribe search index handlers to the event bus (idempotent)"""
+    global _registered
+    if _registered:
+        return
+    event_bus.subscribe(UserCreated, index_created_user)
+    event_bus.subscribe(UserUpdated, index_updated_user)
+    _registered = True
+    logger.info(f"Search indexing handlers registered ({search_backend.name} backend)")
@@ -5,6 +5,8 @@ from user_service.application.use_cases.update_roles import UpdateUserRolesUseCa
 from user_service.application.use_cases.assign_doctor import AssignDoctorUseCase
 from user_service.application.use_cases.block_user import BlockUserUseCase
 from user_service.application.use_cases.restore_user import RestoreUserUseCase
+from user_service.application.use_cases.bulk_import_users import BulkImportUsersUseCase
+from user_service.application.use_cases.bulk_assign_doctor import BulkAssignDoctorUseCase
 
 __all__ = [
     "CreateUserUseCase",
@@ -13,4 +15,6 @@ __all__ = [
     "AssignDoctorUseCase",
     "BlockUserUseCase",
     "RestoreUserUseCase",
+    "BulkImportUsersUseCase",
+    "BulkAssignDoctorUseCase",
 ]
@@ -1,5 +1,6 @@
 """Use case: Assign doctor to patient"""
 from datetime import datetime
+from typing import Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from user_service.domain.models.user import User
@@ -16,9 +17,21 @@ class AssignDoctorUseCase:
         self.user_repo = UserRepository(db)
         self.db = db
     
-    def execute(self, patient_id: int, doctor_id: int, assigned_by: int) -> User:
-        """Execute assign doctor use case"""
-        patient = self.user_repo.get_by_id(patient_id)
+    def execute(
+        self,
+        patient_id: int,
+        doctor_id: Optional[int],
+        assigned_by: int,
+        specialty: Optional[str] = None
+    ) -> User:
+        """Execute assign doctor use case
+        
+        Without ``doctor_id`` the least-loaded doctor (optionally with the
+        given ``specialty``) is picked from the per-doctor load counters.
+        """
+        # The patient row stays locked so concurrent assignments of the same
+        # patient cannot both decrement the previous doctor's counter
+        patient = self.user_repo.get_for_update(patient_id)
         if not patient:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -31,6 +44,15 @@ class AssignDoctorUseCase:
                 detail="User is not a patient"
             )
         
+        if doctor_id is None:
+            doctor_id = self.user_repo.pick_least_loaded_doctor(specialty)
+            # None only when no doctor matches: locked doctors are waited for
+            if doctor_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="No available doctor" + (f" with specialty {specialty}" if specialty else "")
+                )
+        
         doctor = self.user_repo.get_by_id(doctor_id)
         if not doctor:
             raise HTTPException(
@@ -45,7 +67,11 @@ class AssignDoctorUseCase:
             )
         
         # Assign doctor
+        previous_doctor_id = patient.assigned_doctor_id
         patient.assigned_doctor_id = doctor_id
+        if previous_doctor_id != doctor_id and not patient.is_blocked:
+            self.user_repo.adjust_patient_count(previous_doctor_id, -1)
+            self.user_repo.adjust_patient_count(doctor_id, 1)
         patient = self.user_repo.update(patient)
         
         # Emit domain event
@@ -55,7 +81,8 @@ class AssignDoctorUseCase:
             aggregate_id=patient.id,
             patient_id=patient_id,
             doctor_id=doctor_id,
-            assigned_by=assigned_by
+            assigned_by=assigned_by,
+            previous_doctor_id=previous_doctor_id
         )
         event_bus.publish(event)
         
@@ -6,7 +6,9 @@ from user_service.domain.models.user import User
 from user_service.domain.events.events import UserBlocked
 from user_service.domain.events.event_bus import event_bus
 from user_service.infrastructure.repositories.user_repository import UserRepository
-from user_service.infrastructure.http_clients.auth_client import AuthServiceClient
+from user_service.infrastructure.repositories.outbox_repository import OutboxRepository
+from user_service.domain.models.outbox import OUTBOX_BLOCK
+from user_service.application.services.auth_sync_dispatcher import auth_sync_dispatcher
 from user_service.api.schemas import BlockUserRequest
 import uuid
 
@@ -16,12 +18,12 @@ class BlockUserUseCase:
     
     def __init__(self, db: Session):
         self.user_repo = UserRepository(db)
-        self.auth_client = AuthServiceClient()
+        self.outbox = OutboxRepository(db)
         self.db = db
     
     async def execute(self, user_id: int, block_data: BlockUserRequest, blocked_by: int) -> User:
         """Execute block user use case"""
-        user = self.user_repo.get_by_id(user_id)
+        user = self.user_repo.get_for_update(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -38,7 +40,12 @@ class BlockUserUseCase:
         user.is_blocked = True
         user.blocked_at = datetime.utcnow()
         user.blocked_by = blocked_by
+        # A blocked patient no longer counts towards the doctor's load
+        self.user_repo.adjust_patient_count(user.assigned_doctor_id, -1)
+        # Auth Service sync is committed together with the profile change
+        self.outbox.add(user.auth_user_id, OUTBOX_BLOCK, {"reason": block_data.reason})
         user = self.user_repo.update(user)
+        auth_sync_dispatcher.notify()
         
         # Emit domain event
         event = UserBlocked(
@@ -50,8 +57,5 @@ class BlockUserUseCase:
         )
         event_bus.publish(event)
         
-        # Synchronize with Auth Service
-        await self.auth_client.block_user(user.auth_user_id, block_data.reason)
-        
         return user
 
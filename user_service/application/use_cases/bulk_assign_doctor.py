@@ -0,0 +1,99 @@
+"""Use case: Assign a doctor to many patients"""
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from user_service.domain.models.user import User, Role
+from user_service.domain.events.events import DoctorAssignedToPatient
+from user_service.domain.events.event_bus import event_bus
+from user_service.infrastructure.repositories.user_repository import UserRepository
+import uuid
+
+
+class BulkAssignDoctorUseCase:
+    """Use case for assigning one doctor to many patients in one transaction"""
+    
+    def __init__(self, db: Session):
+        self.user_repo = UserRepository(db)
+        self.db = db
+    
+    def execute(
+        self,
+        doctor_id: int,
+        assigned_by: int,
+        patient_ids: Optional[List[int]] = None,
+        from_doctor_id: Optional[int] = None
+    ) -> dict:
+        """Execute bulk assign doctor use case
+        
+        Patients are given either as ``patient_ids`` or as all patients
+        currently assigned to ``from_doctor_id``.
+        """
+        is_doctor = self.db.scalar(
+            select(User.id).where(User.id == doctor_id, User.roles.any(Role.name == "DOCTOR"))
+        )
+        if is_doctor is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Doctor not found"
+            )
+        
+        # One set-based query validates every patient and locks the rows
+        statement = select(User.id, User.assigned_doctor_id, User.is_blocked).where(
+            User.roles.any(Role.name == "PATIENT")
+        )
+        if patient_ids is not None:
+            statement = statement.where(User.id.in_(set(patient_ids)))
+        else:
+            statement = statement.where(User.assigned_doctor_id == from_doctor_id)
+        patients = self.db.execute(self.user_repo.lock_rows(statement)).all()
+        
+        skipped = []
+        if patient_ids is not None:
+            found = {patient.id for patient in patients}
+            skipped = [
+                {"patient_id": patient_id, "detail": "Patient not found"}
+                for patient_id in dict.fromkeys(patient_ids)
+                if patient_id not in found
+            ]
+        moved = [patient for patient in patients if patient.assigned_doctor_id != doctor_id]
+        
+        if moved:
+            self.db.execute(
+                update(User)
+                .where(User.id.in_([patient.id for patient in moved]))
+                .values(assigned_doctor_id=doctor_id)
+                .execution_options(synchronize_session=False)
+            )
+            # Load counters: blocked patients do not count
+            released = Counter(
+                patient.assigned_doctor_id for patient in moved
+                if not patient.is_blocked and patient.assigned_doctor_id is not None
+            )
+            for previous_doctor_id, count in released.items():
+                self.user_repo.adjust_patient_count(previous_doctor_id, -count)
+            self.user_repo.adjust_patient_count(doctor_id, sum(not patient.is_blocked for patient in moved))
+            self.db.commit()
+            
+            now = datetime.utcnow()
+            event_bus.publish_many([
+                DoctorAssignedToPatient(
+                    event_id=str(uuid.uuid4()),
+                    occurred_at=now,
+                    aggregate_id=patient.id,
+                    patient_id=patient.id,
+                    doctor_id=doctor_id,
+                    assigned_by=assigned_by,
+                    previous_doctor_id=patient.assigned_doctor_id
+                )
+                for patient in moved
+            ])
+        
+        return {
+            "doctor_id": doctor_id,
+            "assigned": len(moved),
+            "unchanged": len(patients) - len(moved),
+            "skipped": skipped,
+        }
@@ -0,0 +1,147 @@
+"""Use case: Bulk import users"""
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+import json
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from user_service.domain.models.user import User, user_roles
+from user_service.domain.events.events import UserCreated
+from user_service.domain.events.event_bus import event_bus
+from user_service.infrastructure.cache.role_registry import role_registry
+from user_service.api.schemas import UserCreate
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Errors listed in the response; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+
+class BulkImportUsersUseCase:
+    """Use case for importing many users with batched multi-row inserts"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.created = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+    
+    def import_batch(self, lines: Sequence[Tuple[int, bytes]], created_by: Optional[int] = None) -> None:
+        """Validate and insert one batch of NDJSON lines; ``created_by`` goes on the UserCreated events"""
+        rows: List[Tuple[int, UserCreate]] = []
+        seen_auth_ids = set()
+        seen_emails = set()
+        for line_number, line in lines:
+            try:
+                user_data = UserCreate.model_validate(json.loads(line))
+            except (ValueError, ValidationError) as e:
+                self._fail(line_number, self._describe(e))
+                continue
+            if user_data.auth_user_id in seen_auth_ids or user_data.email in seen_emails:
+                self._fail(line_number, "Duplicate auth_user_id or email within the import")
+                continue
+            seen_auth_ids.add(user_data.auth_user_id)
+            seen_emails.add(user_data.email)
+            rows.append((line_number, user_data))
+        
+        rows = self._drop_existing(rows)
+        if not rows:
+            return
+        
+        names = sorted({name for _, user_data in rows for name in user_data.roles})
+        roles = dict(zip(names, role_registry.resolve(self.db, names)))
+        try:
+            result = self.db.execute(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "auth_user_id": user_data.auth_user_id,
+                        "first_name": user_data.first_name,
+                        "last_name": user_data.last_name,
+                        "middle_name": user_data.middle_name,
+                        "email": user_data.email,
+                        "phone": user_data.phone,
+                        "is_blocked": False,
+                    }
+                    for _, user_data in rows
+                ]
+            )
+            user_ids = result.scalars().all()
+            role_links = [
+                {"user_id": user_id, "role_id": roles[name].id}
+                for user_id, (_, user_data) in zip(user_ids, rows)
+                for name in dict.fromkeys(user_data.roles)
+            ]
+            if role_links:
+                self.db.execute(insert(user_roles), role_links)
+            self.db.commit()
+        except Exception as e:
+            # A concurrent insert won a unique constraint race; report the whole batch
+            self.db.rollback()
+            logger.error(f"Bulk import batch failed: {e}")
+            for line_number, _ in rows:
+                self._fail(line_number, "Batch insert failed, retry these rows")
+            return
+        
+        self.created += len(rows)
+        logger.info("Bulk import by user %s: created %d users", created_by, len(rows))
+        now = datetime.utcnow()
+        event_bus.publish_many([
+            UserCreated(
+                event_id=str(uuid.uuid4()),
+                occurred_at=now,
+                aggregate_id=user_id,
+                auth_user_id=user_data.auth_user_id,
+                email=user_data.email,
+                first_name=user_data.first_name,
+                last_name=user_data.last_name,
+                middle_name=user_data.middle_name,
+                phone=user_data.phone,
+                roles=list(dict.fromkeys(user_data.roles)),
+                created_by=created_by
+            )
+            for user_id, (_, user_data) in zip(user_ids, rows)
+        ])
+    
+    def result(self) -> dict:
+        """Import summary"""
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+    
+    def _drop_existing(self, rows: List[Tuple[int, UserCreate]]) -> List[Tuple[int, UserCreate]]:
+        """Set-based check against profiles that already exist"""
+        if not rows:
+            return rows
+        auth_ids = [user_data.auth_user_id for _, user_data in rows]
+        emails = [user_data.email for _, user_data in rows]
+        existing_auth_ids = set(self.db.scalars(select(User.auth_user_id).where(User.auth_user_id.in_(auth_ids))))
+        existing_emails = set(self.db.scalars(select(User.email).where(User.email.in_(emails))))
+        remaining = []
+        for line_number, user_data in rows:
+            if user_data.auth_user_id in existing_auth_ids:
+                self._fail(line_number, f"User with auth_user_id {user_data.auth_user_id} already exists")
+            elif user_data.email in existing_emails:
+                self._fail(line_number, "Email already registered")
+            else:
+                remaining.append((line_number, user_data))
+        return remaining
+    
+    def _fail(self, line_number: int, detail) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "detail": detail})
+    
+    @staticmethod
+    def _describe(error: Exception):
+        if isinstance(error, ValidationError):
+            return [
+                {"loc": list(item["loc"]), "msg": item["msg"]}
+                for item in error.errors(include_url=False)
+            ]
+        return f"Invalid JSON: {error}"
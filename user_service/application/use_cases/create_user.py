@@ -1,12 +1,13 @@
 """Use case: Create user"""
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from user_service.domain.models.user import User, Role
+from user_service.domain.models.user import User
 from user_service.domain.events.events import UserCreated
 from user_service.domain.events.event_bus import event_bus
-from user_service.infrastructure.repositories.user_repository import UserRepository, RoleRepository
+from user_service.infrastructure.repositories.user_repository import UserRepository
+from user_service.infrastructure.cache.role_registry import role_registry
 from user_service.api.schemas import UserCreate
 import uuid
 
@@ -16,10 +17,9 @@ class CreateUserUseCase:
     
     def __init__(self, db: Session):
         self.user_repo = UserRepository(db)
-        self.role_repo = RoleRepository(db)
         self.db = db
     
-    def execute(self, user_data: UserCreate, created_by: int = None) -> User:
+    def execute(self, user_data: UserCreate, created_by: Optional[int] = None) -> User:
         """Execute create user use case"""
         # Check if user with this auth_user_id already exists
         existing_user = self.user_repo.get_by_auth_user_id(user_data.auth_user_id)
@@ -49,12 +49,7 @@ class CreateUserUseCase:
         )
         
         # Assign roles
-        role_objects = []
-        for role_name in user_data.roles:
-            role = self.role_repo.get_or_create(role_name)
-            role_objects.append(role)
-        
-        user.roles = role_objects
+        user.roles = role_registry.resolve(self.db, user_data.roles)
         
         # Save user
         user = self.user_repo.create(user)
@@ -70,7 +65,8 @@ class CreateUserUseCase:
             last_name=user.last_name,
             middle_name=user.middle_name,
             phone=user.phone,
-            roles=[role.name for role in user.roles]
+            roles=[role.name for role in user.roles],
+            created_by=created_by
         )
         event_bus.publish(event)
         
@@ -6,7 +6,9 @@ from user_service.domain.models.user import User
 from user_service.domain.events.events import UserAccessRestored
 from user_service.domain.events.event_bus import event_bus
 from user_service.infrastructure.repositories.user_repository import UserRepository
-from user_service.infrastructure.http_clients.auth_client import AuthServiceClient
+from user_service.infrastructure.repositories.outbox_repository import OutboxRepository
+from user_service.domain.models.outbox import OUTBOX_RESTORE
+from user_service.application.services.auth_sync_dispatcher import auth_sync_dispatcher
 import uuid
 
 
@@ -15,12 +17,12 @@ class RestoreUserUseCase:
     
     def __init__(self, db: Session):
         self.user_repo = UserRepository(db)
-        self.auth_client = AuthServiceClient()
+        self.outbox = OutboxRepository(db)
         self.db = db
     
     async def execute(self, user_id: int, restored_by: int) -> User:
         """Execute restore user use case"""
-        user = self.user_repo.get_by_id(user_id)
+        user = self.user_repo.get_for_update(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -37,7 +39,11 @@ class RestoreUserUseCase:
         user.is_blocked = False
         user.blocked_at = None
         user.blocked_by = None
+        self.user_repo.adjust_patient_count(user.assigned_doctor_id, 1)
+        # Auth Service sync is committed together with the profile change
+        self.outbox.add(user.auth_user_id, OUTBOX_RESTORE)
         user = self.user_repo.update(user)
+        auth_sync_dispatcher.notify()
         
         # Emit domain event
         event = UserAccessRestored(
@@ -48,8 +54,5 @@ class RestoreUserUseCase:
         )
         event_bus.publish(event)
         
-        # Synchronize with Auth Service
-        await self.auth_client.restore_user(user.auth_user_id)
-        
         return user
 
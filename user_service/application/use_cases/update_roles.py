@@ -5,8 +5,11 @@ from fastapi import HTTPException, status
 from user_service.domain.models.user import User
 from user_service.domain.events.events import UserRoleChanged
 from user_service.domain.events.event_bus import event_bus
-from user_service.infrastructure.repositories.user_repository import UserRepository, RoleRepository
-from user_service.infrastructure.http_clients.auth_client import AuthServiceClient
+from user_service.infrastructure.repositories.user_repository import UserRepository
+from user_service.infrastructure.cache.role_registry import role_registry
+from user_service.infrastructure.repositories.outbox_repository import OutboxRepository
+from user_service.domain.models.outbox import OUTBOX_UPDATE_ROLES
+from user_service.application.services.auth_sync_dispatcher import auth_sync_dispatcher
 from user_service.api.schemas import RoleUpdate
 import uuid
 
@@ -16,8 +19,7 @@ class UpdateUserRolesUseCase:
     
     def __init__(self, db: Session):
         self.user_repo = UserRepository(db)
-        self.role_repo = RoleRepository(db)
-        self.auth_client = AuthServiceClient()
+        self.outbox = OutboxRepository(db)
         self.db = db
     
     async def execute(self, user_id: int, role_data: RoleUpdate, changed_by: int) -> User:
@@ -32,15 +34,12 @@ class UpdateUserRolesUseCase:
         old_roles = [role.name for role in user.roles]
         
         # Update roles
-        new_role_objects = []
-        for role_name in role_data.roles:
-            role = self.role_repo.get_or_create(role_name)
-            new_role_objects.append(role)
-        
-        user.roles = new_role_objects
-        user = self.user_repo.update(user)
-        
+        user.roles = role_registry.resolve(self.db, role_data.roles)
         new_roles = [role.name for role in user.roles]
+        # Auth Service sync is committed together with the profile change
+        self.outbox.add(user.auth_user_id, OUTBOX_UPDATE_ROLES, {"roles": new_roles})
+        user = self.user_repo.update(user)
+        auth_sync_dispatcher.notify()
         
         # Emit domain event
         event = UserRoleChanged(
@@ -53,8 +52,5 @@ class UpdateUserRolesUseCase:
         )
         event_bus.publish(event)
         
-        # Synchronize with Auth Service
-        await self.auth_client.update_user_roles(user.auth_user_id, new_roles)
-        
         return user
 
@@ -46,6 +46,10 @@ class UpdateUserUseCase:
             user.phone = user_data.phone
             updated_fields["phone"] = user_data.phone
         
+        if user_data.specialty is not None:
+            user.specialty = user_data.specialty
+            updated_fields["specialty"] = user_data.specialty
+        
         if user_data.email is not None:
             # Check if email is already taken by another user
             existing_user = self.user_repo.get_by_email(user_data.email)
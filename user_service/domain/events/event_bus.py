@@ -1,34 +1,320 @@
 """Event bus for domain events"""
-from typing import List, Callable, Any
+from typing import Iterable, List, Callable, Any, Dict, Optional, Tuple
 from user_service.domain.events.events import DomainEvent
+import asyncio
+import inspect
 import logging
+import os
+import pickle
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Overflow policies for the async dispatch queue; with "inline" a full queue
+# runs the handlers in the publisher (publish is synchronous and on the loop
+# thread cannot wait for space without stalling the workers)
+OVERFLOW_INLINE = "inline"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_SPILL = "spill"
+
 
 class EventBus:
-    """Simple in-memory event bus for domain events"""
-    
+    """Simple in-memory event bus for domain events
+
+    Handlers run synchronously inside ``publish`` until ``start_async`` is
+    called. In async mode events are put on a bounded queue and handled by
+    worker tasks on the event loop; handlers subscribed with ``inline=True``
+    (e.g. cache invalidation) still run in the publisher.
+    """
+
     def __init__(self):
-        self._handlers: dict[type, List[Callable]] = {}
-    
-    def subscribe(self, event_type: type, handler: Callable[[DomainEvent], None]):
-        """Subscribe handler to event type"""
+        self._handlers: dict[type, List[Tuple[Callable, bool]]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._handler_timeout = 5.0
+        self._overflow = OVERFLOW_INLINE
+        self._spill_path: Optional[str] = None
+        # While spilled events are waiting, new events are spilled behind them
+        self._spilling = False
+        self._spill_offset = 0
+        self._reset_stats()
+
+    @property
+    def is_async(self) -> bool:
+        return self._queue is not None
+
+    def subscribe(self, event_type: type, handler: Callable[[DomainEvent], None], inline: bool = False):
+        """Subscribe handler to event type
+
+        ``inline`` handlers always run in the publisher, also in async mode.
+        """
         if event_type not in self._handlers:
             self._handlers[event_type] = []
-        self._handlers[event_type].append(handler)
-    
+        self._handlers[event_type].append((handler, inline))
+
     def publish(self, event: DomainEvent):
         """Publish domain event"""
+        handlers = self._handlers.get(type(event))
+        if not handlers:
+            return
+        self._count("published")
+        if not self.is_async:
+            self._run_inline(event, handlers)
+            return
+        self._run_inline(event, [(handler, inline) for handler, inline in handlers if inline])
+        if any(not inline for _, inline in handlers):
+            self._enqueue(event)
+
+    def publish_many(self, events: Iterable[DomainEvent]):
+        """Publish a batch of domain events in order"""
+        for event in events:
+            self.publish(event)
+
+    def start_async(
+        self,
+        queue_size: int = 1000,
+        workers: int = 4,
+        handler_timeout: float = 5.0,
+        overflow: str = OVERFLOW_INLINE,
+        spill_path: Optional[str] = None
+    ) -> None:
+        """Switch to async dispatch on the running event loop"""
+        if self.is_async:
+            return
+        if overflow not in (OVERFLOW_INLINE, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if overflow == OVERFLOW_SPILL and not spill_path:
+            raise ValueError("The spill overflow policy needs a spill_path")
+        self._handler_timeout = handler_timeout
+        self._overflow = overflow
+        self._spill_path = spill_path
+        # Events spilled before a restart are replayed first
+        self._spilling = bool(spill_path) and os.path.exists(spill_path)
+        self._spill_offset = 0
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue(maxsize=queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"event-bus-worker-{i}") for i in range(workers)
+        ]
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Drain the queue and return to synchronous dispatch"""
+        if not self.is_async:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Event bus stopped with {self._queue.qsize()} undelivered events")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        with self._lock:
+            # Publishers in worker threads check this under the lock and run handlers inline
+            self._queue = None
+            self._loop = None
+
+    async def _drain(self) -> None:
+        while True:
+            await self._queue.join()
+            if not self._spilling:
+                return
+            self._refill_from_spill()
+
+    def stats(self) -> dict:
+        """Queue depth, event counters and per-handler latency"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["handlers"] = {name: dict(values) for name, values in self._handler_stats.items()}
+        stats["mode"] = "async" if self.is_async else "sync"
+        stats["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+
+    def _reset_stats(self) -> None:
+        self._stats: Dict[str, int] = {
+            "published": 0,
+            "enqueued": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "ran_in_publisher": 0,
+            "max_queue_depth": 0,
+        }
+        self._handler_stats: Dict[str, Dict[str, Any]] = {}
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    def _enqueue(self, event: DomainEvent) -> None:
+        """Hand an event to the workers (callable from any thread)"""
+        with self._lock:
+            loop = self._loop
+        if loop is None:
+            # Stopped after publish checked is_async
+            self._run_inline(event, self._queued_handlers(event))
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is not loop:
+            # Publisher runs in a worker thread (e.g. run_in_threadpool)
+            future = asyncio.run_coroutine_threadsafe(self._put_from_thread(event), loop)
+            if self._overflow == OVERFLOW_INLINE and not future.result():
+                self._run_overflow_inline(event)
+            return
+
+        if not self._put_or_overflow(event):
+            self._run_overflow_inline(event)
+
+    async def _put_from_thread(self, event: DomainEvent) -> bool:
+        """Queue an event on the loop; False if it is left to the publisher"""
+        if self._queue is None:
+            # The bus stopped while this call was in flight
+            if self._overflow != OVERFLOW_INLINE:
+                await asyncio.to_thread(self._run_inline, event, self._queued_handlers(event))
+                return True
+            return False
+        return self._put_or_overflow(event)
+
+    def _put_or_overflow(self, event: DomainEvent) -> bool:
+        """Queue, drop the oldest or spill (loop thread); False if the publisher must run it"""
+        if self._spilling:
+            # Keep order: nothing may overtake the events waiting in the spill file
+            self._spill(event)
+            return True
+        if self._queue.full():
+            if self._overflow == OVERFLOW_INLINE:
+                return False
+            if self._overflow == OVERFLOW_SPILL:
+                self._spilling = True
+                self._spill(event)
+                return True
+            self._drop_oldest()
+        self._put_nowait(event)
+        return True
+
+    def _queued_handlers(self, event: DomainEvent) -> List[Tuple[Callable, bool]]:
+        return [(h, i) for h, i in self._handlers.get(type(event), []) if not i]
+
+    def _run_overflow_inline(self, event: DomainEvent) -> None:
+        """Queue is full: run the queued handlers in the publisher"""
+        self._count("ran_in_publisher")
+        self._run_inline(event, self._queued_handlers(event))
+
+    def _put_nowait(self, event: DomainEvent) -> None:
+        self._queue.put_nowait(event)
+        self._after_put()
+
+    def _after_put(self) -> None:
+        depth = self._queue.qsize()
+        with self._lock:
+            self._stats["enqueued"] += 1
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+
+    def _drop_oldest(self) -> None:
+        try:
+            dropped = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        self._queue.task_done()
+        self._count("dropped")
+        logger.warning(f"Event queue full, dropped {type(dropped).__name__}")
+
+    def _spill(self, event: DomainEvent) -> None:
+        """Append an event to the spill file; it is moved back to the queue in order"""
+        with self._lock:
+            with open(self._spill_path, "ab") as spill_file:
+                pickle.dump(event, spill_file)
+            self._stats["spilled"] += 1
+
+    def _refill_from_spill(self) -> None:
+        """Move spilled events, oldest first, into free queue slots (loop thread)
+
+        When the file is used up, new events go to the queue again.
+        """
+        if not self._spilling or self._queue.full():
+            return
+        with self._lock:
+            if not os.path.exists(self._spill_path):
+                self._spilling, self._spill_offset = False, 0
+                return
+            with open(self._spill_path, "rb") as spill_file:
+                spill_file.seek(self._spill_offset)
+                while not self._queue.full():
+                    try:
+                        event = pickle.load(spill_file)
+                    except EOFError:
+                        os.remove(self._spill_path)
+                        self._spilling, self._spill_offset = False, 0
+                        return
+                    self._queue.put_nowait(event)
+                    self._spill_offset = spill_file.tell()
+
+    async def _worker(self) -> None:
+        while True:
+            self._refill_from_spill()
+            try:
+                event = await asyncio.wait_for(self._queue.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+            try:
+                await self._dispatch(event)
+            finally:
+                self._queue.task_done()
+
+    async def _dispatch(self, event: DomainEvent) -> None:
+        for handler, inline in self._handlers.get(type(event), []):
+            if inline:
+                continue
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                if inspect.iscoroutinefunction(handler):
+                    await asyncio.wait_for(handler(event), timeout=self._handler_timeout)
+                else:
+                    # A sync handler cannot be interrupted; the worker stops waiting for it
+                    await asyncio.wait_for(asyncio.to_thread(handler, event), timeout=self._handler_timeout)
+            except asyncio.TimeoutError:
+                outcome = "timeouts"
+                logger.error(f"Handler {handler.__qualname__} timed out on {type(event).__name__}")
+            except Exception as e:
+                outcome = "errors"
+                logger.error(f"Error handling event {type(event).__name__}: {e}")
+            self._record(handler, time.perf_counter() - started, outcome)
+
+    def _run_inline(self, event: DomainEvent, handlers: List[Tuple[Callable, bool]]) -> None:
         event_type = type(event)
-        if event_type in self._handlers:
-            for handler in self._handlers[event_type]:
-                try:
-                    handler(event)
-                except Exception as e:
-                    logger.error(f"Error handling event {event_type.__name__}: {e}")
+        for handler, _ in handlers:
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                handler(event)
+            except Exception as e:
+                outcome = "errors"
+                logger.error(f"Error handling event {event_type.__name__}: {e}")
+            self._record(handler, time.perf_counter() - started, outcome)
+
+    def _record(self, handler: Callable, elapsed: float, outcome: str) -> None:
+        name = getattr(handler, "__qualname__", repr(handler))
+        with self._lock:
+            stats = self._handler_stats.setdefault(
+                name, {"count": 0, "errors": 0, "timeouts": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            stats["count"] += 1
+            stats["total_seconds"] += elapsed
+            if elapsed > stats["max_seconds"]:
+                stats["max_seconds"] = elapsed
+            if outcome != "ok":
+                stats[outcome] += 1
 
 
 # Global event bus instance
 event_bus = EventBus()
-
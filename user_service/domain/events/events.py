@@ -22,6 +22,7 @@ class UserCreated(DomainEvent):
     middle_name: Optional[str] = None
     phone: Optional[str] = None
     roles: List[str] = None  # List of role names
+    created_by: Optional[int] = None  # User ID who created the profile (None for self-registration)
 
 
 @dataclass
@@ -45,6 +46,7 @@ class DoctorAssignedToPatient(DomainEvent):
     patient_id: int
     doctor_id: int
     assigned_by: int  # User ID who made the assignment
+    previous_doctor_id: Optional[int] = None
 
 
 @dataclass
@@ -1,4 +1,6 @@
 """Domain models for User Service"""
 from user_service.domain.models.user import User, Role, Base
+from user_service.domain.models.principal import Principal
+from user_service.domain.models.outbox import OutboxMessage
 
-__all__ = ["User", "Role", "Base"]
+__all__ = ["User", "Role", "Base", "Principal", "OutboxMessage"]
@@ -0,0 +1,48 @@
+"""Outbox of pending Auth Service synchronizations"""
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from user_service.domain.models.user import Base
+
+# Outbox operations (one per Auth Service endpoint)
+OUTBOX_BLOCK = "block"
+OUTBOX_RESTORE = "restore"
+OUTBOX_UPDATE_ROLES = "update_roles"
+
+# Message states
+OUTBOX_PENDING = "pending"
+OUTBOX_CLAIMED = "claimed"  # Being sent; next_attempt_at is the lease expiry
+OUTBOX_SENT = "sent"
+OUTBOX_COALESCED = "coalesced"  # Superseded by a newer message for the same user
+OUTBOX_DEAD = "dead"  # Gave up after the maximum number of attempts
+
+
+def outbox_channel(operation: str) -> str:
+    """Messages on the same channel of a user supersede each other"""
+    return "roles" if operation == OUTBOX_UPDATE_ROLES else "access"
+
+
+class OutboxMessage(Base):
+    """Auth Service call recorded in the same transaction as the profile change"""
+    __tablename__ = "auth_sync_outbox"
+    __table_args__ = (
+        # Dispatcher scan: due pending messages in order
+        Index("ix_auth_sync_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    auth_user_id = Column(Integer, nullable=False, index=True)
+    operation = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default=OUTBOX_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    @property
+    def channel(self) -> str:
+        return outbox_channel(self.operation)
+    
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, auth_user_id={self.auth_user_id}, operation={self.operation})>"
@@ -0,0 +1,44 @@
+"""Authenticated principal snapshot"""
+from dataclasses import dataclass
+from typing import FrozenSet
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of the authenticated user
+
+    Route dependencies return this instead of a session-bound ``User`` so it
+    can be cached and shared between requests safely.
+    """
+    id: int
+    auth_user_id: int
+    email: str
+    is_blocked: bool
+    role_names: FrozenSet[str]
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        """Build a principal from a loaded ``User`` (roles must be loaded)"""
+        return cls(
+            id=user.id,
+            auth_user_id=user.auth_user_id,
+            email=user.email,
+            is_blocked=user.is_blocked,
+            role_names=frozenset(role.name for role in user.roles),
+        )
+
+    def has_role(self, role_name: str) -> bool:
+        """Check if user has a specific role"""
+        return role_name in self.role_names
+
+    def is_patient(self) -> bool:
+        """Check if user is a patient"""
+        return self.has_role("PATIENT")
+
+    def is_doctor(self) -> bool:
+        """Check if user is a doctor"""
+        return self.has_role("DOCTOR")
+
+    def is_admin(self) -> bool:
+        """Check if user is an admin"""
+        return self.has_role("ADMIN")
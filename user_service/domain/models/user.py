@@ -1,7 +1,7 @@
 """User domain model"""
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table, Index, literal_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.orm import declarative_base
@@ -21,6 +21,14 @@ user_roles = Table(
 class User(Base):
     """User aggregate root"""
     __tablename__ = "user_profiles"
+    __table_args__ = (
+        # Keyset pagination order for user lists
+        Index("ix_user_profiles_created_at_id", "created_at", "id"),
+        # Doctor rosters: filter on (doctor, blocked), keyset order from the tail
+        Index("ix_user_profiles_doctor_blocked", "assigned_doctor_id", "is_blocked", "created_at", "id"),
+        # Least-loaded doctor lookup
+        Index("ix_user_profiles_specialty_load", "specialty", "patient_count"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     auth_user_id = Column(Integer, unique=True, index=True, nullable=False)  # Reference to Auth Service user
@@ -40,6 +48,9 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     blocked_at = Column(DateTime(timezone=True), nullable=True)
     blocked_by = Column(Integer, ForeignKey('user_profiles.id'), nullable=True)
+    # Incremented by every UPDATE of the row (profile ETag); updated_at only has
+    # the database clock resolution (whole seconds on SQLite)
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
     
     # Relationships
     roles = relationship("Role", secondary=user_roles, back_populates="users")
@@ -47,6 +58,11 @@ class User(Base):
     assigned_doctor = relationship("User", remote_side=[id], foreign_keys=[assigned_doctor_id], backref="patients")
     # patients relationship is handled by backref from assigned_doctor
     
+    # Doctor fields: specialty tag and number of unblocked assigned patients,
+    # maintained incrementally by assignment, block and restore
+    specialty = Column(String, nullable=True)
+    patient_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, name={self.first_name} {self.last_name})>"
     
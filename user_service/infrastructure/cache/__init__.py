@@ -0,0 +1,19 @@
+"""In-process caches for User Service"""
+from user_service.infrastructure.cache.principal_cache import PrincipalCache, principal_cache
+from user_service.infrastructure.cache.count_cache import CountCache, count_cache
+from user_service.infrastructure.cache.role_registry import RoleRegistry, role_registry
+from user_service.infrastructure.cache.roster_cache import RosterCache, roster_cache
+from user_service.infrastructure.cache.etag_cache import ProfileEtagCache, profile_etag_cache
+
+__all__ = [
+    "PrincipalCache",
+    "principal_cache",
+    "CountCache",
+    "count_cache",
+    "RoleRegistry",
+    "role_registry",
+    "RosterCache",
+    "roster_cache",
+    "ProfileEtagCache",
+    "profile_etag_cache",
+]
@@ -0,0 +1,55 @@
+"""TTL cache of user list totals keyed by filters"""
+import threading
+import time
+from typing import Dict, Hashable, Optional, Tuple
+from user_service.infrastructure.database.database import settings
+
+
+class CountCache:
+    """Exact totals of filtered user lists, reused for a short TTL
+
+    Any change that may move users in or out of a filter clears the whole
+    cache, so entries only go stale through changes made by other processes.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_size: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._totals: Dict[Hashable, Tuple[int, float]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> Optional[int]:
+        """Cached total for a filter tuple"""
+        with self._lock:
+            entry = self._totals.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._totals.pop(key, None)
+                self._misses += 1
+                return None
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, total: int) -> None:
+        """Remember an exact total"""
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._totals) >= self.max_size:
+                self._totals.clear()
+            self._totals[key] = (total, time.monotonic() + self.ttl_seconds)
+
+    def clear(self) -> None:
+        """Drop all totals"""
+        with self._lock:
+            self._totals.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {"size": len(self._totals), "hits": self._hits, "misses": self._misses}
+
+
+# Global count cache instance
+count_cache = CountCache(ttl_seconds=settings.user_count_cache_ttl_seconds)
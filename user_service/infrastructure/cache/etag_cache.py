@@ -0,0 +1,59 @@
+"""TTL cache of user profile ETags"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from user_service.infrastructure.database.database import settings
+
+
+class ProfileEtagCache:
+    """Current ETag of each user profile (LRU with TTL)
+
+    Lets ``If-None-Match`` revalidations be answered with 304 without a
+    database query. Local changes evict entries through domain events; the
+    TTL bounds staleness caused by other service instances.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 10.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._etags: "OrderedDict[int, tuple[str, float]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, user_id: int) -> Optional[str]:
+        """Cached ETag of a profile"""
+        with self._lock:
+            entry = self._etags.get(user_id)
+            if entry is None or entry[1] <= time.monotonic():
+                self._etags.pop(user_id, None)
+                self._misses += 1
+                return None
+            self._etags.move_to_end(user_id)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, user_id: int, etag: str) -> None:
+        """Remember the ETag computed from the database"""
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._etags[user_id] = (etag, time.monotonic() + self.ttl_seconds)
+            self._etags.move_to_end(user_id)
+            while len(self._etags) > self.max_size:
+                self._etags.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget the ETag of a changed profile"""
+        with self._lock:
+            self._etags.pop(user_id, None)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {"size": len(self._etags), "hits": self._hits, "misses": self._misses}
+
+
+# Global ETag cache instance
+profile_etag_cache = ProfileEtagCache(ttl_seconds=settings.profile_etag_ttl_seconds)
@@ -0,0 +1,145 @@
+"""Token-keyed cache of authenticated principals"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+from user_service.domain.models.principal import Principal
+from user_service.infrastructure.database.database import settings
+
+
+class PrincipalCache:
+    """Bounded LRU/TTL cache: token digest -> Principal
+
+    Entries never outlive the token ``exp``. Unknown ``auth_user_id`` values
+    are cached separately (negative caching) with a shorter TTL.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60.0, negative_ttl_seconds: float = 10.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[Principal, float]]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+        self._missing: Dict[int, float] = {}
+        self._hits = 0
+        self._misses = 0
+        self._negative_hits = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        """Cache key for a raw token (the token itself is never stored)"""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Principal]:
+        """Get a cached principal, counting hits and misses"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            principal, expires_at = entry
+            if expires_at <= now:
+                self._remove(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return principal
+
+    def put(self, key: str, principal: Principal, token_exp: Optional[float] = None) -> None:
+        """Cache a principal; the TTL is capped at the token ``exp`` (unix time)"""
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (principal, time.monotonic() + ttl)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def is_known_missing(self, auth_user_id: int) -> bool:
+        """Whether the profile for ``auth_user_id`` was recently not found"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            expires_at = self._missing.get(auth_user_id)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._missing[auth_user_id]
+                return False
+            self._negative_hits += 1
+            return True
+
+    def put_missing(self, auth_user_id: int) -> None:
+        """Remember that no profile exists for ``auth_user_id``"""
+        if not self.enabled or self.negative_ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._missing) >= self.max_size:
+                self._missing.clear()
+            self._missing[auth_user_id] = time.monotonic() + self.negative_ttl_seconds
+
+    def forget_missing(self, auth_user_id: int) -> None:
+        """Drop the negative entry once the profile is created"""
+        with self._lock:
+            self._missing.pop(auth_user_id, None)
+
+    def evict_user(self, user_id: int) -> None:
+        """Evict every cached token of a user profile"""
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._missing.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "negative_size": len(self._missing),
+                "hits": self._hits,
+                "misses": self._misses,
+                "negative_hits": self._negative_hits,
+                "evictions": self._evictions,
+            }
+
+    def _remove(self, key: str) -> None:
+        principal, _ = self._entries.pop(key)
+        keys = self._keys_by_user.get(principal.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[principal.id]
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_max_size,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    negative_ttl_seconds=settings.principal_cache_negative_ttl_seconds,
+)
@@ -0,0 +1,107 @@
+"""Process-wide registry of roles"""
+import threading
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from user_service.domain.models.user import Role
+
+# Roles known to the service; created at startup if missing
+DEFAULT_ROLES = ("PATIENT", "DOCTOR", "ADMIN")
+
+
+class RoleRegistry:
+    """Role name -> id map loaded once and shared by all requests
+
+    Cached roles are kept as detached instances and merged into the caller's
+    session with ``load=False``, so resolving a known role never queries
+    the database. Unknown names trigger one refresh and are then created.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._roles: Dict[str, Role] = {}
+        self._loaded = False
+        self._refreshes = 0
+        self._created = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, db: Session, ensure: Iterable[str] = DEFAULT_ROLES) -> None:
+        """Load all roles, creating the ``ensure`` ones if missing"""
+        self.refresh(db)
+        missing = [name for name in ensure if name not in self._roles]
+        if missing:
+            self._create(db, missing)
+
+    def refresh(self, db: Session) -> None:
+        """Reload the name -> id map from the database"""
+        rows = db.execute(select(Role.id, Role.name, Role.description, Role.created_at)).all()
+        roles = {row.name: self._detached(row) for row in rows}
+        with self._lock:
+            self._roles = roles
+            self._loaded = True
+            self._refreshes += 1
+
+    def names(self) -> List[str]:
+        """Names of the cached roles"""
+        return list(self._roles)
+
+    def get_id(self, name: str) -> Optional[int]:
+        """Cached id of a role (None if unknown)"""
+        role = self._roles.get(name)
+        return role.id if role is not None else None
+
+    def resolve(self, db: Session, names: Iterable[str]) -> List[Role]:
+        """Role instances bound to ``db`` for ``names`` (order kept, duplicates dropped)"""
+        names = list(dict.fromkeys(names))
+        if not self._loaded or any(name not in self._roles for name in names):
+            self.refresh(db)
+            missing = [name for name in names if name not in self._roles]
+            if missing:
+                self._create(db, missing)
+        return [db.merge(self._roles[name], load=False) for name in names]
+
+    def clear(self) -> None:
+        """Forget all roles; the next resolve reloads them"""
+        with self._lock:
+            self._roles = {}
+            self._loaded = False
+
+    def stats(self) -> dict:
+        """Registry size and reload counters"""
+        return {
+            "size": len(self._roles),
+            "refreshes": self._refreshes,
+            "created": self._created,
+        }
+
+    def _create(self, db: Session, names: List[str]) -> None:
+        """Create missing roles (committed immediately, like RoleRepository.get_or_create)"""
+        for name in names:
+            role = db.query(Role).filter(Role.name == name).first()
+            if role is None:
+                role = Role(name=name)
+                db.add(role)
+                db.commit()
+                db.refresh(role)
+            with self._lock:
+                self._roles[name] = self._detached(role)
+                self._created += 1
+
+    @staticmethod
+    def _detached(source) -> Role:
+        """Detached copy that is safe to share between sessions"""
+        role = Role(
+            id=source.id,
+            name=source.name,
+            description=source.description,
+            created_at=source.created_at,
+        )
+        make_transient_to_detached(role)
+        return role
+
+
+# Global role registry instance
+role_registry = RoleRegistry()
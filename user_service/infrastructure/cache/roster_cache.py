@@ -0,0 +1,73 @@
+"""TTL cache of doctor patient rosters"""
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+from user_service.infrastructure.database.database import settings
+
+
+class RosterCache:
+    """Roster pages and patient counts per doctor, reused for a short TTL
+
+    Entries are grouped by doctor so an assignment only drops the rosters
+    of the doctors involved. Patients seen in cached pages are indexed so
+    profile updates evict just the pages that show them.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_doctors: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_doctors = max_doctors
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Dict[Hashable, Tuple[Any, float]]] = {}
+        self._doctors_by_patient: Dict[int, Set[int]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, doctor_id: int, key: Hashable) -> Optional[Any]:
+        """Cached value (page or count) of a doctor's roster"""
+        with self._lock:
+            entry = self._entries.get(doctor_id, {}).get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._misses += 1
+                return None
+            self._hits += 1
+            return entry[0]
+
+    def put(self, doctor_id: int, key: Hashable, value: Any, patient_ids=()) -> None:
+        """Remember a value; ``patient_ids`` are the patients it shows"""
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if doctor_id not in self._entries and len(self._entries) >= self.max_doctors:
+                self._entries.clear()
+                self._doctors_by_patient.clear()
+            self._entries.setdefault(doctor_id, {})[key] = (value, time.monotonic() + self.ttl_seconds)
+            for patient_id in patient_ids:
+                self._doctors_by_patient.setdefault(patient_id, set()).add(doctor_id)
+
+    def invalidate_doctor(self, doctor_id: Optional[int]) -> None:
+        """Drop every cached page and count of a doctor"""
+        if doctor_id is None:
+            return
+        with self._lock:
+            self._entries.pop(doctor_id, None)
+
+    def invalidate_patient(self, patient_id: int) -> None:
+        """Drop the rosters of doctors whose cached pages show a patient"""
+        with self._lock:
+            for doctor_id in self._doctors_by_patient.pop(patient_id, set()):
+                self._entries.pop(doctor_id, None)
+
+    def clear(self) -> None:
+        """Drop all rosters"""
+        with self._lock:
+            self._entries.clear()
+            self._doctors_by_patient.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {"doctors": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+# Global roster cache instance
+roster_cache = RosterCache(ttl_seconds=settings.roster_cache_ttl_seconds)
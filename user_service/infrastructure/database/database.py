@@ -1,10 +1,12 @@
 """Database configuration for User Service"""
-from sqlalchemy import create_engine, text
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 import re
+from user_service.infrastructure.metrics.pool import timed_pool
 
 
 class Settings(BaseSettings):
@@ -24,6 +26,63 @@ class Settings(BaseSettings):
         default="http://localhost:8000",
         alias="AUTH_SERVICE_URL"
     )
+    # Shared HTTP client for Auth Service calls (keep-alive pool)
+    auth_http_timeout_seconds: float = Field(default=10.0, alias="AUTH_HTTP_TIMEOUT_SECONDS")
+    auth_http_max_connections: int = Field(default=20, alias="AUTH_HTTP_MAX_CONNECTIONS")
+    auth_http_max_keepalive_connections: int = Field(default=10, alias="AUTH_HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    auth_http_keepalive_expiry_seconds: float = Field(default=30.0, alias="AUTH_HTTP_KEEPALIVE_EXPIRY_SECONDS")
+    # HTTP/2 is used only if the h2 package is installed (pip install httpx[http2])
+    auth_http2: bool = Field(default=True, alias="AUTH_HTTP2")
+    
+    # Outbox dispatcher for Auth Service synchronization
+    outbox_batch_size: int = Field(default=100, alias="OUTBOX_BATCH_SIZE")
+    outbox_poll_interval_seconds: float = Field(default=1.0, alias="OUTBOX_POLL_INTERVAL_SECONDS")
+    outbox_max_attempts: int = Field(default=10, alias="OUTBOX_MAX_ATTEMPTS")
+    outbox_backoff_base_seconds: float = Field(default=1.0, alias="OUTBOX_BACKOFF_BASE_SECONDS")
+    outbox_backoff_max_seconds: float = Field(default=300.0, alias="OUTBOX_BACKOFF_MAX_SECONDS")
+    # How long a claimed message is reserved for one dispatcher (longer than AUTH_HTTP_TIMEOUT_SECONDS)
+    outbox_claim_lease_seconds: float = Field(default=60.0, alias="OUTBOX_CLAIM_LEASE_SECONDS")
+    # Sent, coalesced and dead messages are deleted this long after processing
+    outbox_retention_days: float = Field(default=7.0, alias="OUTBOX_RETENTION_DAYS")
+    
+    # Domain event dispatch: sync (in the request) or async (queue + workers)
+    event_bus_mode: str = Field(default="sync", alias="EVENT_BUS_MODE")
+    event_bus_queue_size: int = Field(default=1000, alias="EVENT_BUS_QUEUE_SIZE")
+    event_bus_workers: int = Field(default=4, alias="EVENT_BUS_WORKERS")
+    event_bus_handler_timeout_seconds: float = Field(default=5.0, alias="EVENT_BUS_HANDLER_TIMEOUT_SECONDS")
+    # Full queue policy: inline (handlers run in the publisher), drop_oldest or spill (to EVENT_BUS_SPILL_PATH)
+    event_bus_overflow: str = Field(default="inline", alias="EVENT_BUS_OVERFLOW")
+    event_bus_spill_path: Optional[str] = Field(default=None, alias="EVENT_BUS_SPILL_PATH")
+    
+    # Principal cache for the auth middleware (0 disables it)
+    principal_cache_max_size: int = Field(default=10000, alias="PRINCIPAL_CACHE_MAX_SIZE")
+    principal_cache_ttl_seconds: float = Field(default=60.0, alias="PRINCIPAL_CACHE_TTL_SECONDS")
+    principal_cache_negative_ttl_seconds: float = Field(default=10.0, alias="PRINCIPAL_CACHE_NEGATIVE_TTL_SECONDS")
+    
+    # TTL of cached user list totals (count=cached)
+    user_count_cache_ttl_seconds: float = Field(default=30.0, alias="USER_COUNT_CACHE_TTL_SECONDS")
+    # TTL of cached profile ETags (bounds staleness across instances)
+    profile_etag_ttl_seconds: float = Field(default=10.0, alias="PROFILE_ETAG_TTL_SECONDS")
+    # TTL of cached doctor patient rosters
+    roster_cache_ttl_seconds: float = Field(default=60.0, alias="ROSTER_CACHE_TTL_SECONDS")
+    # Cache-Control max-age of static assets (HTML is always revalidated)
+    static_max_age_seconds: int = Field(default=3600, alias="STATIC_MAX_AGE_SECONDS")
+    
+    # Logging: level, json or text lines, and per-logger sampling of records
+    # below WARNING, e.g. LOG_SAMPLE_RATES='{"user_service.api.middleware.auth": 0.01}'
+    log_level: str = Field(default="INFO", alias="LOG_LEVEL")
+    log_format: str = Field(default="json", alias="LOG_FORMAT")
+    log_sample_rates: Dict[str, float] = Field(default_factory=dict, alias="LOG_SAMPLE_RATES")
+    # Records queued for the writer thread; overflow is dropped, not waited for
+    log_queue_size: int = Field(default=10000, alias="LOG_QUEUE_SIZE")
+    
+    # Opt-in per-request SQL counting (Server-Timing header, N+1 warnings)
+    query_counter_enabled: bool = Field(default=False, alias="QUERY_COUNTER_ENABLED")
+    query_counter_n_plus_one_threshold: int = Field(default=5, alias="QUERY_COUNTER_N_PLUS_ONE_THRESHOLD")
+    
+    # Search backend for the user list: auto, pg_trgm, memory or ilike
+    search_backend: str = Field(default="auto", alias="SEARCH_BACKEND")
+    search_similarity_threshold: float = Field(default=0.3, alias="SEARCH_SIMILARITY_THRESHOLD")
     
     model_config = SettingsConfigDict(
         env_file=".env", 
@@ -65,9 +124,13 @@ except Exception:
 connect_args = {
     "connect_timeout": 10,
 }
+if database_url.startswith("sqlite"):
+    # SQLite (tests) does not accept connect_timeout
+    connect_args = {"check_same_thread": False}
 
 engine = create_engine(
     database_url,
+    poolclass=timed_pool(name="user_service"),  # checkout wait is exported by /metrics
     pool_pre_ping=True,
     pool_size=5,
     max_overflow=10,
@@ -78,6 +141,30 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def add_missing_columns(table) -> List[str]:
+    """create_all only creates new tables; add columns introduced later
+    
+    Only nullable columns and columns with a literal server default can be
+    added to a populated table, which is what new columns here use.
+    Returns the names of the added columns so callers can backfill them.
+    """
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    added = []
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            default = column.server_default.arg if column.server_default is not None else None
+            if isinstance(default, str):
+                ddl += f" DEFAULT {default}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            conn.execute(text(ddl))
+            added.append(column.name)
+    return added
+
+
 def get_db():
     """Dependency for getting database session"""
     db = SessionLocal()
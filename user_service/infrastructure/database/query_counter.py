@@ -0,0 +1,86 @@
+"""Per-request SQL statement counting and N+1 detection"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """Statements executed within one request or test block"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_seconds += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least ``threshold`` times (likely N+1)"""
+        return [(statement, times) for statement, times in self.statements.most_common() if times >= threshold]
+
+
+# Mutable stats object of the current request; shared with threadpool workers
+# because run_in_threadpool copies the context
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# Start times live on the execution context: a failed statement never reaches
+# after_cursor_execute, and its context is discarded with it
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def install_query_counter(engine: Engine) -> None:
+    """Hook statement timing into an engine (idempotent)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count statements executed inside the block (engine must be instrumented)"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(budget: int, engine: Engine) -> Iterator[QueryStats]:
+    """Fail when more than ``budget`` statements run on ``engine`` inside the block
+
+    Test helper: ``with assert_max_queries(2, engine): client.get(...)``.
+    Counts statements from every thread, so it works with TestClient, which
+    runs the application in its own event loop thread.
+    """
+    stats = QueryStats()
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, 0.0)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    if stats.count > budget:
+        listing = "\n".join(f"  {times}x {statement}" for statement, times in stats.statements.most_common())
+        raise AssertionError(f"Expected at most {budget} queries, got {stats.count}:\n{listing}")
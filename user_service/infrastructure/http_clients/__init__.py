@@ -1,2 +1,5 @@
 """HTTP clients for inter-service communication"""
 
+from user_service.infrastructure.http_clients.auth_client import AuthHttpPool, AuthServiceClient, auth_http
+
+__all__ = ["AuthHttpPool", "AuthServiceClient", "auth_http"]
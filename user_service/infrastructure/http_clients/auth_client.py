@@ -1,18 +1,179 @@
 """HTTP client for Auth Service integration"""
+import asyncio
 import httpx
+import importlib.util
+import re
+import threading
+import time
 from typing import Optional, Dict, Any
 from user_service.infrastructure.database.database import settings
+from user_service.infrastructure.metrics.registry import metrics_registry
 import logging
 
 logger = logging.getLogger(__name__)
 
+auth_client_duration = metrics_registry.histogram(
+    "auth_client_request_duration_seconds",
+    "Auth Service call latency",
+    ["method", "path"],
+)
+auth_client_requests = metrics_registry.counter(
+    "auth_client_requests_total",
+    "Auth Service calls by outcome (status class or error)",
+    ["method", "path", "outcome"],
+)
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper counting requests, errors and new connections"""
+    
+    def __init__(self, transport: httpx.AsyncBaseTransport, pool: "AuthHttpPool"):
+        self._transport = transport
+        self._pool = pool
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # httpcore reports connection setup through the trace extension
+        request.extensions = {**request.extensions, "trace": self._pool._trace}
+        self._pool._count("requests")
+        # Numeric ids are folded so every user shares one series
+        path = _ID_SEGMENT.sub("/{id}", request.url.path)
+        outcome = "error"
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+            outcome = f"{response.status_code // 100}xx"
+            return response
+        except Exception:
+            self._pool._count("errors")
+            raise
+        finally:
+            auth_client_duration.observe(time.perf_counter() - started, method=request.method, path=path)
+            auth_client_requests.inc(method=request.method, path=path, outcome=outcome)
+    
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class AuthHttpPool:
+    """Process-wide keep-alive HTTP client shared by all AuthServiceClient calls
+    
+    Started and closed in the application lifespan. An httpx client belongs
+    to the event loop that opened its connections, so one client is kept per
+    running loop: scripts using ``asyncio.run`` or tests with their own loop
+    get a client of their own, created on first use. Tests can install an
+    in-process transport, e.g. ``httpx.ASGITransport(app=fake_auth_app)``.
+    """
+    
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True
+    ):
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._clients: Dict[Optional[asyncio.AbstractEventLoop], httpx.AsyncClient] = {}
+        self._transport: Optional[httpx.AsyncBaseTransport] = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "connections_opened": 0, "http2_connections": 0}
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client of the running event loop (created lazily)"""
+        with self._lock:
+            return self._client_for(_running_loop())
+    
+    def start(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """Create the client of the running loop (idempotent)
+
+        ``transport`` replaces the network transport for clients created
+        from now on; call it before the clients are used, previous clients
+        are not closed.
+        """
+        with self._lock:
+            if transport is not None:
+                self._transport = transport
+                self._clients.clear()
+            loop = _running_loop()
+            if loop is not None:
+                self._client_for(loop)
+    
+    async def close(self) -> None:
+        """Close the client of the running loop and its connections"""
+        with self._lock:
+            client = self._clients.pop(_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+    
+    def _client_for(self, loop: Optional[asyncio.AbstractEventLoop]) -> httpx.AsyncClient:
+        """Client of ``loop``, created if missing or closed (lock held)"""
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # Clients of finished loops cannot be used or closed any more
+            for stale in [other for other in self._clients if other is not None and other.is_closed()]:
+                del self._clients[stale]
+            inner = self._transport or httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+            client = self._clients[loop] = httpx.AsyncClient(
+                transport=_MeteredTransport(inner, self),
+                timeout=self.timeout,
+            )
+        return client
+    
+    def reset_transport(self) -> None:
+        """Forget an installed test transport (takes effect on the next start)"""
+        self._transport = None
+    
+    def stats(self) -> dict:
+        """Request and connection reuse counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["connections_reused"] = max(stats["requests"] - stats["errors"] - stats["connections_opened"], 0)
+        stats["http2_enabled"] = self.http2
+        return stats
+    
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+    
+    async def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self._count("connections_opened")
+        elif event_name == "http2.send_connection_init.complete":
+            self._count("http2_connections")
+
+
+# Global pool shared by all AuthServiceClient instances
+auth_http = AuthHttpPool(
+    timeout=settings.auth_http_timeout_seconds,
+    max_connections=settings.auth_http_max_connections,
+    max_keepalive_connections=settings.auth_http_max_keepalive_connections,
+    keepalive_expiry=settings.auth_http_keepalive_expiry_seconds,
+    http2=settings.auth_http2,
+)
+
 
 class AuthServiceClient:
     """Client for communicating with Auth Service"""
     
-    def __init__(self, base_url: Optional[str] = None):
+    def __init__(self, base_url: Optional[str] = None, http: Optional[AuthHttpPool] = None):
         self.base_url = base_url or settings.auth_service_url
-        self.timeout = 10.0
+        self.http = http or auth_http
     
     async def update_user_roles(self, auth_user_id: int, roles: list[str]) -> bool:
         """
@@ -20,14 +181,14 @@ class AuthServiceClient:
         This is a placeholder - Auth Service needs to implement this endpoint
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # This endpoint should be implemented in Auth Service
-                response = await client.post(
-                    f"{self.base_url}/users/{auth_user_id}/roles",
-                    json={"roles": roles}
-                )
-                response.raise_for_status()
-                return True
+            client = self.http.client
+            # This endpoint should be implemented in Auth Service
+            response = await client.post(
+                f"{self.base_url}/users/{auth_user_id}/roles",
+                json={"roles": roles}
+            )
+            response.raise_for_status()
+            return True
         except Exception as e:
             logger.error(f"Failed to update user roles in Auth Service: {e}")
             return False
@@ -38,14 +199,14 @@ class AuthServiceClient:
         This invalidates tokens and prevents login
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # This endpoint should be implemented in Auth Service
-                response = await client.post(
-                    f"{self.base_url}/users/{auth_user_id}/block",
-                    json={"reason": reason}
-                )
-                response.raise_for_status()
-                return True
+            client = self.http.client
+            # This endpoint should be implemented in Auth Service
+            response = await client.post(
+                f"{self.base_url}/users/{auth_user_id}/block",
+                json={"reason": reason}
+            )
+            response.raise_for_status()
+            return True
         except Exception as e:
             logger.error(f"Failed to block user in Auth Service: {e}")
             return False
@@ -55,13 +216,13 @@ class AuthServiceClient:
         Restore user access in Auth Service
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # This endpoint should be implemented in Auth Service
-                response = await client.post(
-                    f"{self.base_url}/users/{auth_user_id}/restore"
-                )
-                response.raise_for_status()
-                return True
+            client = self.http.client
+            # This endpoint should be implemented in Auth Service
+            response = await client.post(
+                f"{self.base_url}/users/{auth_user_id}/restore"
+            )
+            response.raise_for_status()
+            return True
         except Exception as e:
             logger.error(f"Failed to restore user in Auth Service: {e}")
             return False
@@ -71,11 +232,11 @@ class AuthServiceClient:
         Get user from Auth Service by ID
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/users/{auth_user_id}")
-                if response.status_code == 200:
-                    return response.json()
-                return None
+            client = self.http.client
+            response = await client.get(f"{self.base_url}/users/{auth_user_id}")
+            if response.status_code == 200:
+                return response.json()
+            return None
         except Exception as e:
             logger.error(f"Failed to get user from Auth Service: {e}")
             return None
@@ -87,14 +248,14 @@ class AuthServiceClient:
         Note: This requires a valid token, so it's better to include user_id in JWT token
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Auth Service might have an endpoint to get user by username
-                # For now, we'll try /users/me which requires token
-                # In production, Auth Service should include user_id in JWT token
-                response = await client.get(f"{self.base_url}/users/me")
-                if response.status_code == 200:
-                    return response.json()
-                return None
+            client = self.http.client
+            # Auth Service might have an endpoint to get user by username
+            # For now, we'll try /users/me which requires token
+            # In production, Auth Service should include user_id in JWT token
+            response = await client.get(f"{self.base_url}/users/me")
+            if response.status_code == 200:
+                return response.json()
+            return None
         except Exception as e:
             logger.error(f"Failed to get user by username from Auth Service: {e}")
             return None
@@ -0,0 +1,16 @@
+"""Structured, non-blocking logging"""
+from user_service.infrastructure.logs.formatters import JsonFormatter
+from user_service.infrastructure.logs.pipeline import (
+    LazyQueueHandler,
+    LoggingPipeline,
+    SamplingFilter,
+    logging_pipeline,
+)
+
+__all__ = [
+    "JsonFormatter",
+    "LazyQueueHandler",
+    "LoggingPipeline",
+    "SamplingFilter",
+    "logging_pipeline",
+]
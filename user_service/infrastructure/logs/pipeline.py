@@ -0,0 +1,144 @@
+"""Non-blocking logging pipeline: sampling, queue and a background writer"""
+import copy
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from user_service.infrastructure.logs.formatters import JsonFormatter
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records below WARNING, per logger
+
+    ``rates`` maps logger name prefixes to the kept fraction (0..1); the
+    longest matching prefix wins. Sampling is counter based, so a rate of
+    0.1 keeps exactly every tenth record of that logger.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._lock = threading.Lock()
+        self._seen: Dict[str, int] = {}
+        self._sampled_out = 0
+
+    def rate_for(self, name: str) -> float:
+        best, rate = -1, 1.0
+        for prefix, prefix_rate in self.rates.items():
+            if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                best, rate = len(prefix), prefix_rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        with self._lock:
+            seen = self._seen.get(record.name, 0) + 1
+            self._seen[record.name] = seen
+            keep = rate > 0 and int(seen * rate) != int((seen - 1) * rate)
+            if not keep:
+                self._sampled_out += 1
+        return keep
+
+    @property
+    def sampled_out(self) -> int:
+        return self._sampled_out
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread
+
+    Like the stock handler, the message text is rendered in the logging
+    thread, since arguments (ORM objects, mutable containers) may change or
+    be unsafe to touch from another thread; the formatted line (JSON, extras,
+    timestamps) and the write happen on the listener. A full queue drops the
+    record instead of blocking the request.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks keep frames alive; render them while they are current
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    """Root logger -> sampling -> bounded queue -> writer thread"""
+
+    def __init__(self):
+        self._handler: Optional[LazyQueueHandler] = None
+        self._listener: Optional[QueueListener] = None
+        self._filter: Optional[SamplingFilter] = None
+        self._previous_level = logging.WARNING
+
+    def setup(
+        self,
+        level: str = "INFO",
+        fmt: str = "json",
+        sample_rates: Optional[Dict[str, float]] = None,
+        queue_size: int = 10000,
+        stream=None
+    ) -> None:
+        """Install the pipeline on the root logger (replaces a previous one)"""
+        self.stop()
+        if fmt not in ("json", "text"):
+            raise ValueError(f"Unknown log format: {fmt}")
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._filter = SamplingFilter(sample_rates)
+        self._handler = LazyQueueHandler(log_queue)
+        self._handler.addFilter(self._filter)
+        self._listener = QueueListener(log_queue, writer, respect_handler_level=True)
+        root = logging.getLogger()
+        self._previous_level = root.level
+        root.setLevel(level.upper())
+        root.addHandler(self._handler)
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Flush queued records and detach from the root logger"""
+        if self._handler is None:
+            return
+        root = logging.getLogger()
+        root.removeHandler(self._handler)
+        root.setLevel(self._previous_level)
+        self._listener.stop()
+        self._handler = None
+        self._listener = None
+
+    def stats(self) -> dict:
+        """Queue depth, dropped and sampled-out record counts"""
+        if self._handler is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "queue_depth": self._handler.queue.qsize(),
+            "dropped": self._handler.dropped,
+            "sampled_out": self._filter.sampled_out,
+        }
+
+
+# Global logging pipeline instance
+logging_pipeline = LoggingPipeline()
@@ -0,0 +1,22 @@
+"""Prometheus-compatible runtime metrics"""
+from user_service.infrastructure.metrics.registry import (
+    CONTENT_TYPE,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    metrics_registry,
+)
+from user_service.infrastructure.metrics.pool import pool_checkout_wait, pool_collector, timed_pool
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "metrics_registry",
+    "pool_checkout_wait",
+    "pool_collector",
+    "timed_pool",
+]
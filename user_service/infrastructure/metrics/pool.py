@@ -0,0 +1,49 @@
+"""Connection pool instrumentation"""
+import time
+from sqlalchemy.pool import QueuePool
+from user_service.infrastructure.metrics.registry import metrics_registry
+
+pool_checkout_wait = metrics_registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["pool"],
+)
+
+
+def timed_pool(base: type = QueuePool, name: str = "default") -> type:
+    """Pool class recording how long each checkout waits
+
+    The name is a class attribute, so pools recreated by ``dispose()`` keep it.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return base._do_get(self)
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - started, pool=self.metrics_name)
+
+    return type(f"Timed{base.__name__}", (base,), {"metrics_name": name, "_do_get": _do_get})
+
+
+
+def pool_collector(pools: dict):
+    """Collector reporting utilization of ``{name: engine}`` pools at scrape time"""
+
+    def collect():
+        families = {
+            "db_pool_size": ("Configured pool size", []),
+            "db_pool_checked_out": ("Connections currently checked out", []),
+            "db_pool_overflow": ("Connections open beyond the pool size", []),
+        }
+        for name, engine in pools.items():
+            pool = engine.pool
+            if not isinstance(pool, QueuePool):
+                continue
+            labels = {"pool": name}
+            families["db_pool_size"][1].append((labels, pool.size()))
+            families["db_pool_checked_out"][1].append((labels, pool.checkedout()))
+            families["db_pool_overflow"][1].append((labels, max(pool.overflow(), 0)))
+        return [(name, "gauge", documentation, samples) for name, (documentation, samples) in families.items()]
+
+    return collect
@@ -3,5 +3,6 @@ from user_service.infrastructure.repositories.user_repository import (
     UserRepository,
     RoleRepository,
 )
+from user_service.infrastructure.repositories.outbox_repository import OutboxRepository
 
-__all__ = ["UserRepository", "RoleRepository"]
+__all__ = ["UserRepository", "RoleRepository", "OutboxRepository"]
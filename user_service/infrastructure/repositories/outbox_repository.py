@@ -0,0 +1,145 @@
+"""Outbox repository implementation"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from user_service.domain.models.outbox import (
+    OutboxMessage,
+    outbox_channel,
+    OUTBOX_PENDING,
+    OUTBOX_CLAIMED,
+    OUTBOX_SENT,
+    OUTBOX_COALESCED,
+    OUTBOX_DEAD,
+)
+
+
+class OutboxRepository:
+    """Repository for Auth Service outbox messages"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def add(self, auth_user_id: int, operation: str, payload: Optional[dict] = None) -> OutboxMessage:
+        """Stage a message in the current transaction (committed by the caller)"""
+        message = OutboxMessage(
+            auth_user_id=auth_user_id,
+            operation=operation,
+            payload=payload or {},
+            status=OUTBOX_PENDING,
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        self.db.add(message)
+        return message
+    
+    def fetch_due(self, limit: int, now: Optional[datetime] = None) -> List[OutboxMessage]:
+        """Due messages oldest first: pending ones and claims whose lease expired
+        
+        On PostgreSQL rows are locked with SKIP LOCKED until the caller
+        commits its claim, so several service instances can drain the outbox
+        without sending a message twice.
+        """
+        query = (
+            self.db.query(OutboxMessage)
+            .filter(
+                OutboxMessage.status.in_((OUTBOX_PENDING, OUTBOX_CLAIMED)),
+                OutboxMessage.next_attempt_at <= (now or datetime.utcnow())
+            )
+            .order_by(OutboxMessage.id)
+            .limit(limit)
+        )
+        if self.db.get_bind().dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+        return query.all()
+    
+    def latest_pending_ids(self, auth_user_ids: Iterable[int]) -> Dict[Tuple[int, str], int]:
+        """Newest pending or claimed message id per (auth_user_id, channel), due or not"""
+        rows = (
+            self.db.query(OutboxMessage.auth_user_id, OutboxMessage.operation, func.max(OutboxMessage.id))
+            .filter(
+                OutboxMessage.status.in_((OUTBOX_PENDING, OUTBOX_CLAIMED)),
+                OutboxMessage.auth_user_id.in_(list(auth_user_ids))
+            )
+            .group_by(OutboxMessage.auth_user_id, OutboxMessage.operation)
+            .all()
+        )
+        latest: Dict[Tuple[int, str], int] = {}
+        for auth_user_id, operation, message_id in rows:
+            key = (auth_user_id, outbox_channel(operation))
+            latest[key] = max(latest.get(key, 0), message_id)
+        return latest
+    
+    def claimed_channels(self, auth_user_ids: Iterable[int], now: Optional[datetime] = None) -> Set[Tuple[int, str]]:
+        """(auth_user_id, channel) pairs with a claim still in flight (lease not expired)"""
+        rows = (
+            self.db.query(OutboxMessage.auth_user_id, OutboxMessage.operation)
+            .filter(
+                OutboxMessage.status == OUTBOX_CLAIMED,
+                OutboxMessage.next_attempt_at > (now or datetime.utcnow()),
+                OutboxMessage.auth_user_id.in_(list(auth_user_ids))
+            )
+            .distinct()
+            .all()
+        )
+        return {(auth_user_id, outbox_channel(operation)) for auth_user_id, operation in rows}
+    
+    def claim(self, ids: List[int], until: datetime) -> None:
+        """Lease messages to this dispatcher until ``until`` (committed before sending)"""
+        if not ids:
+            return
+        self.db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids))
+            .values(status=OUTBOX_CLAIMED, next_attempt_at=until),
+            execution_options={"synchronize_session": False}
+        )
+    
+    def mark(self, ids: List[int], status: str, error: Optional[str] = None) -> None:
+        """Finish messages as sent, coalesced or dead"""
+        if not ids:
+            return
+        self.db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids))
+            .values(status=status, last_error=error, processed_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False}
+        )
+    
+    def retry_later(self, message_id: int, attempts: int, error: str, next_attempt_at: datetime) -> None:
+        """Record a failed attempt and release the claim until the next one"""
+        self.db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id == message_id)
+            .values(status=OUTBOX_PENDING, attempts=attempts, last_error=error, next_attempt_at=next_attempt_at),
+            execution_options={"synchronize_session": False}
+        )
+    
+    def purge_finished(self, older_than: datetime, batch_size: int = 1000) -> int:
+        """Delete sent, coalesced and dead messages processed before ``older_than``
+        
+        Deletes in batches, each committed, so no long transaction holds the table.
+        """
+        purged = 0
+        while True:
+            ids = select(OutboxMessage.id).where(
+                OutboxMessage.status.in_((OUTBOX_SENT, OUTBOX_COALESCED, OUTBOX_DEAD)),
+                OutboxMessage.processed_at < older_than
+            ).limit(batch_size)
+            deleted = self.db.execute(
+                delete(OutboxMessage).where(OutboxMessage.id.in_(ids.scalar_subquery())),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+            self.db.commit()
+            purged += deleted
+            if deleted < batch_size:
+                return purged
+    
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of messages per status"""
+        rows = self.db.query(OutboxMessage.status, func.count(OutboxMessage.id)).group_by(OutboxMessage.status)
+        counts = {
+            status: 0 for status in (OUTBOX_PENDING, OUTBOX_CLAIMED, OUTBOX_SENT, OUTBOX_COALESCED, OUTBOX_DEAD)
+        }
+        counts.update(dict(rows.all()))
+        return counts
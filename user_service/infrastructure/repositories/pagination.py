@@ -0,0 +1,25 @@
+"""Opaque cursors for keyset pagination"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+class InvalidCursor(ValueError):
+    """Cursor is malformed or was not produced by this service"""
+
+
+def encode_cursor(created_at: datetime, user_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque URL-safe string"""
+    raw = json.dumps([created_at.isoformat(), user_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by ``encode_cursor``"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, user_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(user_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
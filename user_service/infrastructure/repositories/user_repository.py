@@ -1,8 +1,49 @@
 """User repository implementation"""
-from typing import Optional, List
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from user_service.domain.models.user import User, Role
+from typing import Iterator, Optional, List, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, func, select, tuple_, update
+from user_service.domain.models.user import User, Role, user_roles
+from user_service.infrastructure.cache.count_cache import count_cache
+from user_service.infrastructure.search import search_backend
+
+# Strategies for computing list totals
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATE = "estimate"
+
+# Columns of UserResponse rows for the serialization fast path (roles added separately)
+RESPONSE_COLUMNS = (
+    "first_name",
+    "last_name",
+    "middle_name",
+    "email",
+    "phone",
+    "id",
+    "auth_user_id",
+    "is_blocked",
+    "assigned_doctor_id",
+    "specialty",
+    "created_at",
+    "updated_at",
+    "blocked_at",
+)
+
+# Columns of exported user rows (roles are added per chunk)
+EXPORT_COLUMNS = (
+    "id",
+    "auth_user_id",
+    "first_name",
+    "last_name",
+    "middle_name",
+    "email",
+    "phone",
+    "is_blocked",
+    "assigned_doctor_id",
+    "created_at",
+    "updated_at",
+    "blocked_at",
+)
 
 
 class UserRepository:
@@ -23,6 +64,17 @@ class UserRepository:
         from sqlalchemy.orm import joinedload
         return self.db.query(User).options(joinedload(User.roles)).filter(User.id == user_id).first()
     
+    def get_profile_version(self, user_id: int) -> Optional[Tuple[int, List[int]]]:
+        """Row version and role ids of a profile, without loading roles"""
+        rows = self.db.execute(
+            select(User.version, user_roles.c.role_id)
+            .outerjoin(user_roles, user_roles.c.user_id == User.id)
+            .where(User.id == user_id)
+        ).all()
+        if not rows:
+            return None
+        return rows[0].version, sorted(row.role_id for row in rows if row.role_id is not None)
+    
     def get_by_auth_user_id(self, auth_user_id: int) -> Optional[User]:
         """Get user by Auth Service user ID"""
         from sqlalchemy.orm import joinedload
@@ -43,55 +95,314 @@ class UserRepository:
         self.db.delete(user)
         self.db.commit()
     
-    def list_users(
+    def _filtered_query(
         self,
-        skip: int = 0,
-        limit: int = 100,
         role: Optional[str] = None,
         is_blocked: Optional[bool] = None,
-        search: Optional[str] = None
-    ) -> tuple[List[User], int]:
-        """List users with filters and pagination"""
-        from sqlalchemy.orm import joinedload
+        search: Optional[str] = None,
+        ranked: bool = False
+    ):
+        """Base query for user lists with filters applied
         
+        With ``ranked`` the search backend orders matches by relevance first.
+        """
         query = self.db.query(User)
         
-        # Eager load roles to avoid lazy loading issues
-        query = query.options(joinedload(User.roles))
-        
-        # Apply filters
+        # EXISTS instead of a JOIN keeps exactly one row per user
         if role:
-            query = query.join(User.roles).filter(Role.name == role)
+            query = query.filter(User.roles.any(Role.name == role))
         
         if is_blocked is not None:
             query = query.filter(User.is_blocked == is_blocked)
         
         if search:
-            search_filter = or_(
-                User.first_name.ilike(f"%{search}%"),
-                User.last_name.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
-                User.phone.ilike(f"%{search}%")
-            )
-            query = query.filter(search_filter)
+            query = search_backend.apply(query, search, ranked=ranked)
         
-        total = query.count()
-        users = query.offset(skip).limit(limit).all()
+        return query
+    
+    def count_users(
+        self,
+        role: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        search: Optional[str] = None,
+        strategy: str = COUNT_EXACT
+    ) -> Tuple[int, bool]:
+        """Count users matching the filters
         
+        Returns the total and whether it is an exact, freshly computed value.
+        """
+        query = self._filtered_query(role=role, is_blocked=is_blocked, search=search)
+        
+        if strategy == COUNT_ESTIMATE and self.db.get_bind().dialect.name == "postgresql":
+            return self._estimate_count(query), False
+        
+        if strategy == COUNT_CACHED:
+            key = (role, is_blocked, search)
+            total = count_cache.get(key)
+            if total is not None:
+                return total, False
+            total = query.count()
+            count_cache.put(key, total)
+            return total, True
+        
+        return query.count(), True
+    
+    def _estimate_count(self, query) -> int:
+        """Row estimate from the Postgres planner (no table scan)"""
+        statement = query.with_entities(User.id).statement
+        compiled = statement.compile(dialect=self.db.get_bind().dialect)
+        plan = self.db.connection().exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params
+        ).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+    
+    def page_users(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        role: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        search: Optional[str] = None
+    ) -> List[User]:
+        """Page of users with filters and offset pagination (no total)"""
+        query = self._filtered_query(role=role, is_blocked=is_blocked, search=search, ranked=True)
+        
+        # Roles are loaded with a separate IN query so LIMIT applies to users
+        return (
+            query.options(selectinload(User.roles))
+            .order_by(User.created_at, User.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+    
+    def list_users(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        role: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        search: Optional[str] = None
+    ) -> tuple[List[User], int]:
+        """List users with filters and offset pagination"""
+        total, _ = self.count_users(role=role, is_blocked=is_blocked, search=search)
+        users = self.page_users(skip=skip, limit=limit, role=role, is_blocked=is_blocked, search=search)
         return users, total
     
+    def page_user_rows(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        role: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        search: Optional[str] = None
+    ) -> List[dict]:
+        """Same page as ``page_users`` as plain dicts shaped like UserResponse"""
+        query = self._filtered_query(role=role, is_blocked=is_blocked, search=search, ranked=True)
+        query = query.order_by(User.created_at, User.id).offset(skip).limit(limit)
+        return self._response_rows(query)
+    
+    def list_user_rows_after(
+        self,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+        role: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        search: Optional[str] = None
+    ) -> tuple[List[dict], bool]:
+        """Same page as ``list_users_after`` as plain dicts shaped like UserResponse"""
+        query = self._filtered_query(role=role, is_blocked=is_blocked, search=search)
+        if after is not None:
+            query = query.filter(tuple_(User.created_at, User.id) > tuple_(*after))
+        rows = self._response_rows(query.order_by(User.created_at, User.id).limit(limit + 1))
+        return rows[:limit], len(rows) > limit
+    
+    def _response_rows(self, query) -> List[dict]:
+        """Run a User query as column tuples and attach roles with one IN query"""
+        rows = [
+            dict(row)
+            for row in self.db.execute(
+                query.with_entities(*(getattr(User, name) for name in RESPONSE_COLUMNS)).statement
+            ).mappings()
+        ]
+        roles_by_user = {row["id"]: [] for row in rows}
+        if roles_by_user:
+            role_rows = self.db.execute(
+                select(user_roles.c.user_id, Role.id, Role.name, Role.description)
+                .join(Role, Role.id == user_roles.c.role_id)
+                .where(user_roles.c.user_id.in_(roles_by_user))
+                .order_by(user_roles.c.user_id, Role.id)
+            )
+            for user_id, role_id, name, description in role_rows:
+                roles_by_user[user_id].append({"id": role_id, "name": name, "description": description})
+        for row in rows:
+            row["roles"] = roles_by_user[row["id"]]
+        return rows
+    
+    def list_users_after(
+        self,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+        role: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        search: Optional[str] = None
+    ) -> tuple[List[User], bool]:
+        """List users with filters and keyset pagination on (created_at, id)
+        
+        Returns the page and whether more rows follow it.
+        """
+        query = self._filtered_query(role=role, is_blocked=is_blocked, search=search)
+        if after is not None:
+            query = query.filter(tuple_(User.created_at, User.id) > tuple_(*after))
+        
+        users = (
+            query.options(selectinload(User.roles))
+            .order_by(User.created_at, User.id)
+            .limit(limit + 1)
+            .all()
+        )
+        
+        return users[:limit], len(users) > limit
+    
+    def iter_export_rows(
+        self,
+        role: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        search: Optional[str] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[List[dict]]:
+        """Stream users matching the filters as chunks of plain dicts
+        
+        Rows come from a server-side cursor (``yield_per``), no ORM objects
+        are built, and role names are fetched with one IN query per chunk,
+        so memory stays bounded by ``chunk_size``.
+        """
+        query = self._filtered_query(role=role, is_blocked=is_blocked, search=search)
+        statement = (
+            query.with_entities(*(getattr(User, name) for name in EXPORT_COLUMNS))
+            .order_by(User.created_at, User.id)
+            .statement
+            .execution_options(yield_per=chunk_size)
+        )
+        
+        result = self.db.execute(statement)
+        try:
+            for partition in result.mappings().partitions():
+                rows = [dict(row) for row in partition]
+                roles_by_user = {row["id"]: [] for row in rows}
+                role_rows = self.db.execute(
+                    select(user_roles.c.user_id, Role.name)
+                    .join(Role, Role.id == user_roles.c.role_id)
+                    .where(user_roles.c.user_id.in_(roles_by_user))
+                    .order_by(user_roles.c.user_id, Role.name)
+                )
+                for user_id, role_name in role_rows:
+                    roles_by_user[user_id].append(role_name)
+                for row in rows:
+                    row["roles"] = roles_by_user[row["id"]]
+                yield rows
+        finally:
+            result.close()
+    
     def get_doctors(self) -> List[User]:
         """Get all users with DOCTOR role"""
         return self.db.query(User).join(User.roles).filter(Role.name == "DOCTOR").all()
     
-    def get_patients_by_doctor(self, doctor_id: int) -> List[User]:
-        """Get all patients assigned to a specific doctor"""
+    def lock_rows(self, statement):
+        """SELECT ... FOR UPDATE on PostgreSQL (SQLite serializes writers anyway)"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            return statement.with_for_update(of=User.__table__)
+        return statement
+    
+    def get_for_update(self, user_id: int) -> Optional[User]:
+        """Get user by ID, locking the row until the transaction ends"""
+        return self.db.scalars(
+            self.lock_rows(select(User).options(selectinload(User.roles)).where(User.id == user_id))
+        ).first()
+    
+    def pick_least_loaded_doctor(self, specialty: Optional[str] = None) -> Optional[int]:
+        """ID of the unblocked doctor with the fewest patients, None if there is none
+        
+        On PostgreSQL the chosen row stays locked until commit and rows locked
+        by concurrent assignments are skipped, so parallel requests spread
+        over doctors instead of queueing on the same one. If every matching
+        doctor is locked, the pick waits for a lock instead of reporting none.
+        """
+        statement = (
+            select(User.id)
+            .where(User.roles.any(Role.name == "DOCTOR"), User.is_blocked == False)
+            .order_by(User.patient_count, User.id)
+            .limit(1)
+        )
+        if specialty:
+            statement = statement.where(User.specialty == specialty)
+        if self.db.get_bind().dialect.name != "postgresql":
+            return self.db.scalars(statement).first()
+        doctor_id = self.db.scalars(statement.with_for_update(of=User.__table__, skip_locked=True)).first()
+        if doctor_id is None:
+            doctor_id = self.db.scalars(statement.with_for_update(of=User.__table__)).first()
+        return doctor_id
+    
+    def adjust_patient_count(self, doctor_id: Optional[int], delta: int) -> None:
+        """Atomically shift a doctor's load counter (part of the caller's transaction)"""
+        if doctor_id is None or delta == 0:
+            return
+        self.db.execute(
+            update(User)
+            .where(User.id == doctor_id)
+            # updated_at and version track profile edits, not load changes
+            .values(patient_count=User.patient_count + delta, updated_at=User.updated_at, version=User.version)
+            .execution_options(synchronize_session=False)
+        )
+    
+    def recount_patient_loads(self) -> None:
+        """Rebuild every load counter from the assignments (repair/backfill)"""
+        patient = User.__table__.alias("patient")
+        self.db.execute(
+            update(User)
+            .where(User.roles.any(Role.name == "DOCTOR"))
+            .values(updated_at=User.updated_at, version=User.version, patient_count=(
+                select(func.count(patient.c.id))
+                .where(patient.c.assigned_doctor_id == User.id, patient.c.is_blocked == False)
+                .scalar_subquery()
+            ))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+    
+    def _patients_query(self, doctor_id: int):
+        """Unblocked patients of a doctor (served by ix_user_profiles_doctor_blocked)"""
         return self.db.query(User).filter(
             and_(
                 User.assigned_doctor_id == doctor_id,
                 User.is_blocked == False
             )
-        ).all()
+        )
+    
+    def get_patients_by_doctor(self, doctor_id: int) -> List[User]:
+        """Get all patients assigned to a specific doctor"""
+        return self._patients_query(doctor_id).all()
+    
+    def count_patients(self, doctor_id: int) -> int:
+        """Number of unblocked patients of a doctor"""
+        return self._patients_query(doctor_id).count()
+    
+    def list_patients_after(
+        self,
+        doctor_id: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100
+    ) -> tuple[List[dict], bool]:
+        """Page of a doctor's patients with keyset pagination on (created_at, id)
+        
+        Returns rows shaped like UserResponse and whether more rows follow.
+        """
+        query = self._patients_query(doctor_id)
+        if after is not None:
+            query = query.filter(tuple_(User.created_at, User.id) > tuple_(*after))
+        
+        patients = self._response_rows(query.order_by(User.created_at, User.id).limit(limit + 1))
+        return patients[:limit], len(patients) > limit
 
 
 class RoleRepository:
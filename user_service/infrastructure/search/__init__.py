@@ -0,0 +1,31 @@
+"""Search backends for the user list ``search`` filter"""
+from user_service.infrastructure.database.database import engine, settings
+from user_service.infrastructure.search.base import SearchBackend, IlikeSearchBackend
+from user_service.infrastructure.search.memory import InMemorySearchBackend
+from user_service.infrastructure.search.postgres import PgTrgmSearchBackend
+
+
+def create_search_backend(name: str, dialect_name: str) -> SearchBackend:
+    """Create a backend by name; ``auto`` picks pg_trgm on Postgres, memory otherwise"""
+    if name == "auto":
+        name = "pg_trgm" if dialect_name == "postgresql" else "memory"
+    if name == "pg_trgm":
+        return PgTrgmSearchBackend()
+    if name == "memory":
+        return InMemorySearchBackend(threshold=settings.search_similarity_threshold)
+    if name == "ilike":
+        return IlikeSearchBackend()
+    raise ValueError(f"Unknown search backend: {name}")
+
+
+# Global search backend instance
+search_backend = create_search_backend(settings.search_backend, engine.dialect.name)
+
+__all__ = [
+    "SearchBackend",
+    "IlikeSearchBackend",
+    "InMemorySearchBackend",
+    "PgTrgmSearchBackend",
+    "create_search_backend",
+    "search_backend",
+]
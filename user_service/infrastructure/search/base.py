@@ -0,0 +1,57 @@
+"""Search backend interface for the user list ``search`` filter"""
+import re
+from abc import ABC, abstractmethod
+from typing import Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Query, Session
+from user_service.domain.models.user import User
+
+# Fields covered by the search filter
+SEARCH_FIELDS = ("first_name", "last_name", "middle_name", "email", "phone")
+
+_PHONE_LIKE = re.compile(r"\+?[\d\s\-()]*\d[\d\s\-()]*")
+_NON_DIGITS = re.compile(r"\D")
+
+
+def phone_prefix(term: str) -> Optional[str]:
+    """Digits of a term that looks like a phone number (prefix), else None"""
+    stripped = term.strip()
+    if not _PHONE_LIKE.fullmatch(stripped):
+        return None
+    return _NON_DIGITS.sub("", stripped)
+
+
+class SearchBackend(ABC):
+    """Applies the ``search`` filter (and optional ranking) to user queries"""
+
+    name = "base"
+
+    def setup(self, db: Session) -> None:
+        """Prepare indexes at startup"""
+
+    def index_user(self, user_id: int, fields: dict) -> None:
+        """Add or update a user document (incremental maintenance)"""
+
+    @abstractmethod
+    def apply(self, query: Query, term: str, ranked: bool = False) -> Query:
+        """Filter ``query`` to users matching ``term``; order by relevance if ``ranked``"""
+
+    def stats(self) -> dict:
+        """Backend state for diagnostics"""
+        return {"backend": self.name}
+
+
+class IlikeSearchBackend(SearchBackend):
+    """Substring match with ILIKE over each field (sequential scan, no ranking)"""
+
+    name = "ilike"
+
+    def apply(self, query: Query, term: str, ranked: bool = False) -> Query:
+        return query.filter(
+            or_(
+                User.first_name.icontains(term, autoescape=True),
+                User.last_name.icontains(term, autoescape=True),
+                User.email.icontains(term, autoescape=True),
+                User.phone.icontains(term, autoescape=True),
+            )
+        )
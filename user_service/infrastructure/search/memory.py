@@ -0,0 +1,151 @@
+"""In-process trigram search index (SQLite, tests, small deployments)"""
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import case, false
+from sqlalchemy.orm import Query, Session
+from user_service.domain.models.user import User
+from user_service.infrastructure.search.base import (
+    SEARCH_FIELDS,
+    IlikeSearchBackend,
+    SearchBackend,
+    phone_prefix,
+)
+
+
+def _words(text: str) -> List[str]:
+    return "".join(ch if ch.isalnum() else " " for ch in text.lower()).split()
+
+
+def word_trigrams(text: str) -> Set[str]:
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space"""
+    grams = set()
+    for word in _words(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def inner_trigrams(text: str) -> Set[str]:
+    """Unpadded trigrams of each word (substring matching)"""
+    grams = set()
+    for word in _words(text):
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+class InMemorySearchBackend(SearchBackend):
+    """Trigram inverted index with ranked results and phone prefix matching
+
+    A user scores the larger of two fractions: query word trigrams found in
+    the document (tolerates typos) and unpadded query trigrams found in it
+    (substring matches). The index is built once at startup and then kept up
+    to date from domain events; it only sees changes made by this process.
+    """
+
+    name = "memory"
+
+    def __init__(self, threshold: float = 0.3):
+        self.threshold = threshold
+        self.ready = False
+        self._fallback = IlikeSearchBackend()
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Set[int]] = {}
+        self._documents: Dict[int, dict] = {}
+        self._trigrams: Dict[int, Set[str]] = {}
+        self._phones: List[Tuple[str, int]] = []
+
+    def setup(self, db: Session) -> None:
+        """Build the index from the database"""
+        columns = [getattr(User, field) for field in SEARCH_FIELDS]
+        rows = db.query(User.id, *columns).yield_per(1000)
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._trigrams.clear()
+            self._phones.clear()
+            for row in rows:
+                self._index(row[0], dict(zip(SEARCH_FIELDS, row[1:])))
+            self.ready = True
+
+    def index_user(self, user_id: int, fields: dict) -> None:
+        with self._lock:
+            document = dict(self._documents.get(user_id, {}))
+            document.update({k: v for k, v in fields.items() if k in SEARCH_FIELDS})
+            self._remove(user_id)
+            self._index(user_id, document)
+
+    def search(self, term: str) -> List[int]:
+        """All user ids matching ``term``, most relevant first
+
+        Not truncated: the list feeds both the total count and every page.
+        """
+        padded = word_trigrams(term)
+        inner = inner_trigrams(term)
+        digits = phone_prefix(term)
+        scores: Dict[int, float] = {}
+        with self._lock:
+            for grams in (padded, inner):
+                if not grams:
+                    continue
+                hits = Counter()
+                for gram in grams:
+                    hits.update(self._postings.get(gram, ()))
+                for user_id, count in hits.items():
+                    score = count / len(grams)
+                    if score >= self.threshold and score > scores.get(user_id, 0.0):
+                        scores[user_id] = score
+            if digits:
+                start = bisect_left(self._phones, (digits, -1))
+                for phone, user_id in self._phones[start:]:
+                    if not phone.startswith(digits):
+                        break
+                    scores[user_id] = 1.0
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [user_id for user_id, _ in ranked]
+
+    def apply(self, query: Query, term: str, ranked: bool = False) -> Query:
+        if not self.ready:
+            return self._fallback.apply(query, term, ranked)
+        user_ids = self.search(term)
+        if not user_ids:
+            return query.filter(false())
+        query = query.filter(User.id.in_(user_ids))
+        if ranked:
+            query = query.order_by(case({user_id: rank for rank, user_id in enumerate(user_ids)}, value=User.id))
+        return query
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "ready": self.ready,
+                "documents": len(self._documents),
+                "trigrams": len(self._postings),
+            }
+
+    def _index(self, user_id: int, document: dict) -> None:
+        text = " ".join(str(document[field]) for field in SEARCH_FIELDS if document.get(field))
+        grams = word_trigrams(text) | inner_trigrams(text)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(user_id)
+        self._documents[user_id] = document
+        self._trigrams[user_id] = grams
+        digits = phone_prefix(document.get("phone") or "")
+        if digits:
+            insort(self._phones, (digits, user_id))
+
+    def _remove(self, user_id: int) -> None:
+        for gram in self._trigrams.pop(user_id, ()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(user_id)
+                if not postings:
+                    del self._postings[gram]
+        document = self._documents.pop(user_id, None)
+        digits = phone_prefix((document or {}).get("phone") or "")
+        if digits:
+            position = bisect_left(self._phones, (digits, user_id))
+            if position < len(self._phones) and self._phones[position] == (digits, user_id):
+                del self._phones[position]
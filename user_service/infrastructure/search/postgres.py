@@ -0,0 +1,68 @@
+"""pg_trgm search backend (GIN trigram index)"""
+from sqlalchemy import func, literal, literal_column, or_, text, String
+from sqlalchemy.orm import Query, Session
+from user_service.domain.models.user import User
+from user_service.infrastructure.search.base import IlikeSearchBackend, SearchBackend, phone_prefix
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Must match the indexed expression exactly for the planner to use the index
+SEARCH_TEXT_SQL = (
+    "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || "
+    "coalesce(middle_name, '') || ' ' || coalesce(email, '') || ' ' || coalesce(phone, ''))"
+)
+
+SETUP_STATEMENTS = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_user_profiles_search_trgm ON user_profiles USING gin (({SEARCH_TEXT_SQL}) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_user_profiles_phone_prefix ON user_profiles (phone text_pattern_ops)",
+)
+
+
+class PgTrgmSearchBackend(SearchBackend):
+    """Substring and fuzzy (word similarity) search served by a GIN trigram index
+
+    Phone numbers are part of the trigram text (substring matches) and are
+    also matched by prefix, ignoring formatting, through a ``text_pattern_ops``
+    index.
+    Falls back to ILIKE if the extension cannot be installed.
+    """
+
+    name = "pg_trgm"
+
+    def __init__(self):
+        self.available = True
+        self._fallback = IlikeSearchBackend()
+        self._search_text = literal_column(SEARCH_TEXT_SQL, String)
+
+    def setup(self, db: Session) -> None:
+        try:
+            for statement in SETUP_STATEMENTS:
+                db.execute(text(statement))
+            db.commit()
+            self.available = True
+        except Exception as e:
+            db.rollback()
+            self.available = False
+            logger.warning(f"pg_trgm search is unavailable, falling back to ILIKE: {e}")
+
+    def apply(self, query: Query, term: str, ranked: bool = False) -> Query:
+        if not self.available:
+            return self._fallback.apply(query, term, ranked)
+        needle = literal(term.strip().lower(), String)
+        predicates = [
+            self._search_text.contains(term.strip().lower(), autoescape=True),
+            self._search_text.op("%>")(needle),
+        ]
+        digits = phone_prefix(term)
+        if digits:
+            predicates.append(User.phone.startswith(digits, autoescape=True))
+            predicates.append(User.phone.startswith("+" + digits, autoescape=True))
+        query = query.filter(or_(*predicates))
+        if ranked:
+            query = query.order_by(func.word_similarity(needle, self._search_text).desc())
+        return query
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "available": self.available}
@@ -1,30 +1,101 @@
 """Main application entry point for User Service"""
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from sqlalchemy import text
-from user_service.infrastructure.database.database import engine, get_db
+from user_service.infrastructure.database.database import (
+    engine,
+    get_db,
+    SessionLocal,
+    settings,
+    add_missing_columns,
+)
+from user_service.domain.events.event_bus import event_bus
 from user_service.infrastructure.database.base import Base
+from user_service.domain.models.user import User
 from user_service.api.routes.users import router as users_router
 from user_service.application.services.auth_event_handler import setup_auth_event_handlers
+from user_service.application.services.cache_invalidation import setup_cache_invalidation
+from user_service.application.services.search_indexer import setup_search_indexing
+from user_service.application.services.auth_sync_dispatcher import auth_sync_dispatcher
+from user_service.infrastructure.search import search_backend
+from user_service.infrastructure.repositories.user_repository import UserRepository
+from user_service.infrastructure.cache.principal_cache import principal_cache
+from user_service.infrastructure.cache.role_registry import role_registry
+from user_service.infrastructure.http_clients.auth_client import auth_http
+from user_service.api.static_assets import StaticAssets
+from user_service.infrastructure.logs import logging_pipeline
+from user_service.infrastructure.metrics import CONTENT_TYPE, metrics_registry, pool_collector
+from user_service.api.middleware.metrics import MetricsMiddleware
+from user_service.api.middleware.query_counter import QueryCounterMiddleware
+from user_service.infrastructure.database.query_counter import install_query_counter
+
+# Web UI served from memory, compressed once at startup
+static_assets = StaticAssets("user_service/api/static", max_age=settings.static_max_age_seconds)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - create tables on startup"""
+    # Log records are written by a background thread, off the request path
+    logging_pipeline.setup(
+        level=settings.log_level,
+        fmt=settings.log_format,
+        sample_rates=settings.log_sample_rates,
+        queue_size=settings.log_queue_size
+    )
+    # Cache invalidation must be active even if the database is unavailable
+    setup_cache_invalidation()
+    setup_search_indexing()
+    static_assets.load()
+    if settings.event_bus_mode == "async":
+        # Cache invalidation handlers stay inline, the rest leave the request path
+        event_bus.start_async(
+            queue_size=settings.event_bus_queue_size,
+            workers=settings.event_bus_workers,
+            handler_timeout=settings.event_bus_handler_timeout_seconds,
+            overflow=settings.event_bus_overflow,
+            spill_path=settings.event_bus_spill_path
+        )
+    # One keep-alive HTTP client for all Auth Service calls
+    auth_http.start()
     try:
         Base.metadata.create_all(bind=engine)
+        # create_all only builds new tables; add columns and indexes introduced later
+        added_columns = add_missing_columns(User.__table__)
+        for index in User.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
         print("✅ Database tables created successfully")
         
+        db = SessionLocal()
+        try:
+            # Role name -> id map shared by all requests
+            role_registry.load(db)
+            # Doctor load counters: one-off backfill when the column is new;
+            # later they are kept current by assignments
+            if "patient_count" in added_columns:
+                UserRepository(db).recount_patient_loads()
+            # Search indexes (pg_trgm) or the in-process index
+            search_backend.setup(db)
+        finally:
+            db.close()
+        print(f"✅ Roles loaded: {', '.join(sorted(role_registry.names()))}")
+        print(f"✅ Search backend ready: {search_backend.name}")
+        
         # Setup event handlers for Auth Service events
         setup_auth_event_handlers()
         print("✅ Auth Service event handlers registered")
+        
+        # Deliver outbox messages to the Auth Service in the background
+        auth_sync_dispatcher.start()
     except Exception as e:
         print(f"⚠️  Warning: Could not create database tables: {e}")
         print("⚠️  Make sure PostgreSQL is running and USER_SERVICE_DATABASE_URL is correct")
     yield
+    await auth_sync_dispatcher.stop()
+    await event_bus.stop()
+    await auth_http.close()
+    logging_pipeline.stop()
 
 
 app = FastAPI(
@@ -34,6 +105,17 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# SQL statement count and time per request (development and load tests)
+if settings.query_counter_enabled:
+    install_query_counter(engine)
+    app.add_middleware(
+        QueryCounterMiddleware,
+        n_plus_one_threshold=settings.query_counter_n_plus_one_threshold
+    )
+
+# Latency histograms and in-flight gauge for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -43,17 +125,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Подключение статических файлов
-app.mount("/static", StaticFiles(directory="user_service/api/static"), name="static")
+# Подключение статических файлов (сжатые копии в памяти)
+app.mount("/static", static_assets, name="static")
 
 # Include routers
 app.include_router(users_router)
 
 
 @app.get("/")
-def root():
+def root(request: Request):
     """Root endpoint - возвращает веб-интерфейс"""
-    return FileResponse("user_service/api/static/index.html")
+    return static_assets.response("index.html", request)
+
+
+def event_bus_collector():
+    """EventBus queue and per-handler timings as metric families"""
+    stats = event_bus.stats()
+    handlers = stats["handlers"]
+    return [
+        ("event_bus_queue_depth", "gauge", "Events waiting for async workers", [({}, stats["queue_depth"])]),
+        ("event_bus_events_total", "counter", "Events by dispatch outcome", [
+            ({"outcome": outcome}, stats[outcome])
+            for outcome in ("published", "enqueued", "dropped", "spilled", "ran_in_publisher")
+        ]),
+        ("event_bus_handler_seconds_total", "counter", "Total event handler run time", [
+            ({"handler": name}, values["total_seconds"]) for name, values in handlers.items()
+        ]),
+        ("event_bus_handler_runs_total", "counter", "Event handler runs", [
+            ({"handler": name}, values["count"]) for name, values in handlers.items()
+        ]),
+        ("event_bus_handler_max_seconds", "gauge", "Slowest event handler run", [
+            ({"handler": name}, values["max_seconds"]) for name, values in handlers.items()
+        ]),
+        ("event_bus_handler_failures_total", "counter", "Event handler errors and timeouts", [
+            ({"handler": name, "kind": kind}, values[kind])
+            for name, values in handlers.items()
+            for kind in ("errors", "timeouts")
+        ]),
+    ]
+
+
+metrics_registry.add_collector(pool_collector({"user_service": engine}))
+metrics_registry.add_collector(event_bus_collector)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics_registry.render(), media_type=CONTENT_TYPE)
 
 
 @app.get("/health")
@@ -65,7 +184,13 @@ def health_check():
         return {
             "status": "healthy",
             "database": "connected",
-            "service": "user-service"
+            "service": "user-service",
+            "principal_cache": principal_cache.stats(),
+            "role_registry": role_registry.stats(),
+            "auth_http": auth_http.stats(),
+            "auth_sync": auth_sync_dispatcher.stats(),
+            "event_bus": event_bus.stats(),
+            "logging": logging_pipeline.stats()
         }
     except Exception as e:
         return {